@@ -5,40 +5,128 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.user import User
 from app.core.config import settings
+from app.services.principal import Principal, TokenClaims, principal_cache
 from app.utils.database import get_db
+from typing import Optional
+from uuid import UUID
 
 # OAuth2 scheme for JWT authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+def credentials_exception() -> HTTPException:
+    """
+    Build the 401 raised for any token that cannot be resolved to a user.
+    """
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+def decode_token(token: Optional[str]) -> TokenClaims:
+    """
+    Verify a JWT and return its claims, served from the principal cache when possible.
+    
+    Args:
+        token: Raw JWT.
+    
+    Returns:
+        Verified token claims.
+    
+    Raises:
+        HTTPException: If the token is missing or invalid.
+    """
+    if not token:
+        raise credentials_exception()
+    claims = principal_cache.get_claims(token)
+    if claims is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            user_id: str = payload.get("sub")
+            if user_id is None:
+                raise credentials_exception()
+            claims = TokenClaims(user_id=UUID(user_id), role=payload.get("role"), expires_at=payload.get("exp"))
+        except (JWTError, ValueError):
+            raise credentials_exception()
+        principal_cache.remember_claims(token, claims)
+    return claims
+
+async def resolve_principal(claims: TokenClaims, db: AsyncSession) -> Principal:
+    """
+    Resolve verified token claims to the principal of an existing user.
+    
+    Args:
+        claims: Verified token claims.
+        db: Async database session, only used on a principal cache miss.
+    
+    Returns:
+        Principal for the user.
+    
+    Raises:
+        HTTPException: If the user no longer exists.
+    """
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and claims.role is not None:
+        return Principal(id=claims.user_id, role=claims.role)
+
+    principal = principal_cache.get_user(claims.user_id)
+    if principal is not None:
+        return principal
+    result = await db.execute(select(User).filter(User.id == claims.user_id))
+    user = result.scalars().first()
+    if user is None:
+        raise credentials_exception()
+    return principal_cache.remember_user(user)
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     """
     Dependency to authenticate and retrieve the current user from a JWT token.
     
+    Decoded tokens and user lookups are served from the principal cache; with
+    AUTH_TRUST_TOKEN_CLAIMS enabled the signed sub/role claims are trusted and
+    the database is never queried.
+    
     Args:
         token: JWT token from Authorization header.
         db: Async database session.
     
     Returns:
-        User object for the authenticated user.
+        Principal for the authenticated user.
     
     Raises:
         HTTPException: If token is invalid or user is not found.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    result = await db.execute(select(User).filter(User.id == user_id))
-    user = result.scalars().first()
-    if user is None:
-        raise credentials_exception
+    return await resolve_principal(decode_token(token), db)
+
+async def get_current_admin(user: Principal = Depends(get_current_user)):
+    """
+    Dependency to restrict an endpoint to users with the admin role.
+    
+    Args:
+        user: Authenticated user.
+    
+    Returns:
+        User object for the authenticated admin.
+    
+    Raises:
+        HTTPException: If the user is not an admin.
+    """
+    if user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return user
+
+async def get_current_agent(user: Principal = Depends(get_current_user)):
+    """
+    Dependency to restrict an endpoint to support agents and admins.
+    
+    Args:
+        user: Authenticated user.
+    
+    Returns:
+        User object for the authenticated agent.
+    
+    Raises:
+        HTTPException: If the user is neither an agent nor an admin.
+    """
+    if user.role not in ("agent", "admin"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Agent privileges required")
     return user
\ No newline at end of file
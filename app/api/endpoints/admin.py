@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User
+from app.api.dependencies.auth import get_current_admin
+from app.schemas.stats import TicketStats
+from app.services.stats import StatsService
+from app.services.export import ExportService
+from app.utils.database import get_db, pool_stats
+from datetime import datetime
+from typing import Literal, Optional
+
+# Initialize API router for operational endpoints restricted to admins
+router = APIRouter(prefix="/admin", tags=["admin"])
+stats_service = StatsService()
+export_service = ExportService()
+
+# Content types of the export formats
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@router.get("/db/pool")
+async def get_pool_stats(user: User = Depends(get_current_admin)):
+    """
+    Report live database connection pool statistics for this worker.
+    
+    Args:
+        user: Authenticated admin (injected via dependency).
+    
+    Returns:
+        Pool size, checked-out and overflow connections, and checkout wait times.
+    """
+    return pool_stats()
+
+@router.get("/stats", response_model=TicketStats)
+async def get_global_stats(
+    user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Report dashboard statistics across all users' tickets.
+    
+    Args:
+        user: Authenticated admin (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        Ticket counts by status, open ticket age and AI versus human message counts.
+    """
+    return await stats_service.get_stats(db)
+
+@router.get("/export/{kind}")
+async def export(
+    kind: Literal["tickets", "messages"],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: Optional[datetime] = Query(None, description="Only export rows created (or messages rewritten) after this time"),
+    gzip: bool = Query(False, description="Gzip the export on the fly"),
+    user: User = Depends(get_current_admin)
+):
+    """
+    Stream a dump of all live and archived tickets or messages.
+    
+    Rows are read in chunks through a server-side cursor and encoded as they
+    are sent, so memory use does not depend on the size of the export. The
+    X-Export-Watermark header holds the ``since`` value for the next
+    incremental export; rows near the watermark may be exported twice, so
+    deduplicate on id.
+    
+    Args:
+        kind: "tickets" or "messages".
+        format: "ndjson" or "csv".
+        since: Only export rows created after this time, and messages rewritten after it.
+        gzip: Whether to compress the export.
+        user: Authenticated admin (injected via dependency).
+    
+    Returns:
+        StreamingResponse with the export as an attachment.
+    """
+    watermark = export_service.watermark()
+    filename = f"{kind}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_service.export(kind, format, since, gzip),
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-Watermark": watermark.isoformat(),
+        },
+    )
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.ticket import TicketClaim
+from app.services.agent import AgentQueueService
+from app.utils.database import get_db
+from app.models.user import User
+from app.api.dependencies.auth import get_current_agent
+from uuid import UUID
+
+# Initialize API router for the support agent work queue
+router = APIRouter(prefix="/agent", tags=["agent"])
+agent_queue = AgentQueueService()
+
+@router.post("/claim", response_model=TicketClaim, responses={204: {"description": "No ticket is waiting"}})
+async def claim_ticket(
+    user: User = Depends(get_current_agent),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Claim the next open ticket waiting for an agent.
+    
+    The claim is a lease: renew it with heartbeats before it expires or the
+    ticket goes back to the queue.
+    
+    Args:
+        user: Authenticated agent (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        The claimed ticket with its lease, or 204 if the queue is empty.
+    """
+    ticket = await agent_queue.claim(user, db)
+    if ticket is None:
+        return Response(status_code=204)
+    return ticket
+
+@router.post("/tickets/{ticket_id}/heartbeat", response_model=TicketClaim)
+async def heartbeat(
+    ticket_id: UUID,
+    user: User = Depends(get_current_agent),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Renew the lease on a claimed ticket.
+    
+    Args:
+        ticket_id: UUID of the claimed ticket.
+        user: Authenticated agent (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        The ticket with its new lease expiry; 409 if the claim was lost.
+    """
+    return await agent_queue.heartbeat(ticket_id, user, db)
+
+@router.post("/tickets/{ticket_id}/release", response_model=TicketClaim)
+async def release(
+    ticket_id: UUID,
+    user: User = Depends(get_current_agent),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Return a claimed ticket to the queue.
+    
+    Args:
+        ticket_id: UUID of the claimed ticket.
+        user: Authenticated agent (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        The released ticket; 409 if the claim was already lost.
+    """
+    return await agent_queue.release(ticket_id, user, db)
@@ -3,6 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.user import UserCreate, Token
 from app.services.auth import AuthService
 from app.utils.database import get_db
+from app.utils.security import password_hasher
+from app.models.user import User
+from app.api.dependencies.auth import get_current_admin
 
 # Initialize API router for authentication endpoints
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -21,8 +24,8 @@ async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
         Token response with JWT and token type.
     """
     user = await auth_service.register(user_data, db)
-    token = await auth_service.login(user_data.email, user_data.password, db)
-    return token
+    # The password was just hashed for this user, so skip a second bcrypt round-trip
+    return auth_service.issue_token(user)
 
 @router.post("/login", response_model=Token)
 async def login(email: str, password: str, db: AsyncSession = Depends(get_db)):
@@ -37,4 +40,17 @@ async def login(email: str, password: str, db: AsyncSession = Depends(get_db)):
     Returns:
         Token response with JWT and token type.
     """
-    return await auth_service.login(email, password, db)
\ No newline at end of file
+    return await auth_service.login(email, password, db)
+
+@router.get("/hashing/stats")
+async def get_hashing_stats(user: User = Depends(get_current_admin)):
+    """
+    Report password hashing pool queue depth and timing metrics.
+    
+    Args:
+        user: Authenticated admin (injected via dependency).
+    
+    Returns:
+        Worker count, pending/rejected jobs and average/max wait and run times.
+    """
+    return password_hasher.stats()
\ No newline at end of file
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException, Response
+from app.core.config import settings
+from app.utils.metrics import registry
+
+# Initialize API router for the Prometheus scrape endpoint
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Expose request, database, pool and LLM metrics of this worker for Prometheus.
+    
+    Returns:
+        Metrics in the Prometheus text exposition format.
+    
+    Raises:
+        HTTPException: If metrics are disabled.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,20 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, status as http_status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.schemas.ticket import TicketCreate, TicketOut
-from app.schemas.message import MessageCreate, MessageOut
+from app.schemas.ticket import TicketCreate, TicketOut, TicketPage, TicketStatusUpdate
+from app.schemas.message import MessageCreate, MessageOut, MessagePage
+from app.schemas.bulk import BulkTicketCreate, BulkMessageCreate, BulkResult
+from app.schemas.job import GenerationJobOut
+from app.schemas.search import TicketSearchPage
+from app.schemas.stats import TicketStats
 from app.services.ticket import TicketService
 from app.services.ai import AIService
-from app.utils.database import get_db
+from app.services.search import SearchService
+from app.services.live import LiveChatService
+from app.utils.database import async_session, get_db
 from app.models.user import User
-from app.api.dependencies.auth import get_current_user
+from app.api.dependencies.auth import decode_token, get_current_user, get_current_admin, resolve_principal
+from app.core.config import settings
+from app.utils.serialization import serialize
+from app.utils.sse import SSE_HEADERS, parse_last_event_id
+from pydantic import TypeAdapter
+from datetime import datetime
 from uuid import UUID
-from typing import List
+from typing import Optional
 
 # Initialize API router for ticket-related endpoints
 router = APIRouter(prefix="/tickets", tags=["tickets"])
 ticket_service = TicketService()
 ai_service = AIService()
+search_service = SearchService()
+live_chat = LiveChatService(ticket_service, ai_service)
+
+# Response schemas of the list endpoints, validated once per response and encoded with orjson
+ticket_page_adapter = TypeAdapter(TicketPage)
+message_page_adapter = TypeAdapter(MessagePage)
+search_page_adapter = TypeAdapter(TicketSearchPage)
+bulk_result_adapter = TypeAdapter(BulkResult)
 
 @router.post("/", response_model=TicketOut)
 async def create_ticket(
@@ -35,22 +54,148 @@ async def create_ticket(
     """
     return await ticket_service.create_ticket(ticket_data, user, db)
 
-@router.get("/", response_model=List[TicketOut])
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_tickets(
+    payload: BulkTicketCreate,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create many tickets for the authenticated user in one request and transaction.
+    
+    Args:
+        payload: List of ticket creation payloads.
+        user: Authenticated user (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        Created/failed counts and a per-item status for every submitted ticket.
+    """
+    return serialize(bulk_result_adapter, await ticket_service.bulk_create_tickets(payload.tickets, user, db))
+
+@router.post("/messages/bulk", response_model=BulkResult)
+async def bulk_add_messages(
+    payload: BulkMessageCreate,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Add many messages, across one or more of the user's tickets, in one request and transaction.
+    
+    Once the batch is committed, each created message is pushed to its ticket's open WebSockets.
+    
+    Args:
+        payload: List of message payloads, each with its ticket_id.
+        user: Authenticated user (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        Created/failed counts and a per-item status for every submitted message.
+    """
+    result = await ticket_service.bulk_add_messages(payload.messages, user, db)
+    for message in result["messages"]:
+        await live_chat.announce(message)
+    return serialize(bulk_result_adapter, result)
+
+@router.get("/", response_model=TicketPage, response_model_exclude_unset=True)
 async def get_tickets(
+    limit: int = Query(settings.TICKETS_PAGE_SIZE, ge=1, le=settings.TICKETS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated ticket fields to return"),
+    archived: bool = Query(False, description="List archived tickets instead of live ones"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve a page of tickets for the authenticated user, newest first.
+    
+    Args:
+        limit: Maximum number of tickets on the page.
+        cursor: Opaque next/prev cursor from a previous page.
+        status: Optional status filter.
+        created_after: Optional lower bound on creation time (inclusive).
+        created_before: Optional upper bound on creation time (exclusive).
+        fields: Optional comma-separated projection (e.g. "id,title,status").
+        archived: Whether to list archived tickets, read from the archive tables.
+        user: Authenticated user (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        Page of ticket details with next/prev cursors.
+    """
+    projection = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+    page = await ticket_service.get_tickets(
+        user, db,
+        limit=limit,
+        cursor=cursor,
+        status=status,
+        created_after=created_after,
+        created_before=created_before,
+        fields=projection,
+        archived=archived,
+    )
+    return serialize(ticket_page_adapter, page, exclude_unset=True)
+
+@router.get("/search", response_model=TicketSearchPage)
+async def search_tickets(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for"),
+    limit: int = Query(settings.SEARCH_PAGE_SIZE, ge=1, le=settings.SEARCH_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Retrieve all tickets for the authenticated user.
+    Search ticket titles, descriptions and messages, most relevant tickets first.
+    
+    Users search their own tickets; admins search every ticket. Archived tickets are not searched.
     
     Args:
+        q: Search text.
+        limit: Maximum number of results on the page.
+        cursor: Opaque cursor from a previous page.
         user: Authenticated user (injected via dependency).
         db: Async database session.
     
     Returns:
-        List of ticket details.
+        Page of matching tickets with their relevance and the next cursor.
     """
-    return await ticket_service.get_tickets(user, db)
+    return serialize(search_page_adapter, await search_service.search_tickets(user, db, q, limit=limit, cursor=cursor))
+
+@router.get("/stats", response_model=TicketStats)
+async def get_ticket_stats(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Report dashboard statistics for the user's tickets.
+    
+    Read from incrementally maintained counters, so the cost does not grow with the number of tickets.
+    
+    Args:
+        user: Authenticated user (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        Ticket counts by status, open ticket age and AI versus human message counts.
+    """
+    return await ticket_service.stats.get_stats(db, user.id)
+
+@router.get("/ai-response/stats")
+async def get_ai_response_stats(user: User = Depends(get_current_admin)):
+    """
+    Report AI response cache and request coalescing counters.
+    
+    Args:
+        user: Authenticated admin (injected via dependency).
+    
+    Returns:
+        Cache hit/miss/eviction counts, coalesced/in-flight generation counts, LLM routing
+        statistics and open ticket WebSockets.
+    """
+    return {**ai_service.cache_stats(), "live": live_chat.stats()}
 
 @router.get("/{ticket_id}", response_model=TicketOut)
 async def get_ticket(
@@ -61,6 +206,8 @@ async def get_ticket(
     """
     Retrieve details of a specific ticket.
     
+    Falls back to the archive for tickets moved there by the retention job.
+    
     Args:
         ticket_id: UUID of the ticket.
         user: Authenticated user (injected via dependency).
@@ -69,7 +216,84 @@ async def get_ticket(
     Returns:
         Ticket details.
     """
-    return await ticket_service.get_ticket(ticket_id, user, db)
+    return await ticket_service.get_ticket(ticket_id, user, db, include_archived=True)
+
+@router.patch("/{ticket_id}", response_model=TicketOut)
+async def update_ticket_status(
+    ticket_id: UUID,
+    status_update: TicketStatusUpdate,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Close or reopen a ticket.
+    
+    Closed tickets with an AI answer join the similar-ticket index used to
+    ground and short-circuit future AI responses. Reopening an archived
+    ticket moves it back to the live tables.
+    
+    Args:
+        ticket_id: UUID of the ticket.
+        status_update: New status.
+        user: Authenticated user (injected via dependency); admins may update any ticket.
+        db: Async database session.
+    
+    Returns:
+        Updated ticket.
+    """
+    ticket = await ticket_service.update_status(ticket_id, status_update, user, db)
+    await ai_service.similar.ticket_changed(ticket, db)
+    return ticket
+
+@router.get("/{ticket_id}/messages", response_model=MessagePage)
+async def get_messages(
+    ticket_id: UUID,
+    limit: int = Query(settings.MESSAGES_PAGE_SIZE, ge=1, le=settings.MESSAGES_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    after: Optional[UUID] = Query(None, description="Only return messages newer than this message ID"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve a page of a ticket's conversation, oldest message first.
+    
+    Poll for new messages by passing the ID of the newest message already held as ``after``.
+    AI messages returned with status "streaming" are re-read by id until they settle.
+    
+    Args:
+        ticket_id: UUID of the ticket.
+        limit: Maximum number of messages on the page.
+        cursor: Opaque next/prev cursor from a previous page; takes precedence over ``after``.
+        after: ID of the last message the client has seen.
+        user: Authenticated user (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        Page of messages with next/prev cursors.
+    """
+    page = await ticket_service.get_messages(ticket_id, user, db, limit=limit, cursor=cursor, after=after)
+    return serialize(message_page_adapter, page)
+
+@router.get("/{ticket_id}/messages/{message_id}", response_model=MessageOut)
+async def get_message(
+    ticket_id: UUID,
+    message_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve one message of a ticket, e.g. to refresh an AI message that was still streaming.
+    
+    Args:
+        ticket_id: UUID of the ticket.
+        message_id: UUID of the message.
+        user: Authenticated user (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        The message.
+    """
+    return await ticket_service.get_message(ticket_id, message_id, user, db)
 
 @router.post("/{ticket_id}/messages", response_model=MessageOut)
 async def add_message(
@@ -81,6 +305,8 @@ async def add_message(
     """
     Add a message to a specific ticket.
     
+    The message is also pushed to the ticket's open WebSockets.
+    
     Args:
         ticket_id: UUID of the ticket.
         message_data: Message creation data (content).
@@ -90,27 +316,171 @@ async def add_message(
     Returns:
         Created message details.
     """
-    return await ticket_service.add_message(ticket_id, message_data, user, db)
+    message = await ticket_service.add_message(ticket_id, message_data, user, db)
+    await live_chat.announce(message)
+    return message
 
 @router.get("/{ticket_id}/ai-response")
 async def stream_ai_response(
     ticket_id: UUID,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Stream an AI-generated response for a ticket using Server-Sent Events (SSE).
     
+    Reconnecting with the Last-Event-ID header resumes the same generation,
+    replaying only the events the client missed.
+    
+    Args:
+        ticket_id: UUID of the ticket.
+        last_event_id: ID of the last event received before a reconnect.
+        user: Authenticated user (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        StreamingResponse with SSE-framed AI response events.
+    """
+    await ticket_service.get_ticket(ticket_id, user, db)  # Verify ticket exists
+    return StreamingResponse(
+        ai_service.generate_response(ticket_id, db, parse_last_event_id(last_event_id)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.get("/{ticket_id}/events")
+async def watch_ticket(
+    ticket_id: UUID,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Watch a ticket's live AI generations over SSE without starting one.
+    
+    Lets an agent and the customer follow the same generation from a single
+    upstream call. Messages posted meanwhile arrive as ``message_posted``
+    events. Admins may watch any ticket.
+    
+    Args:
+        ticket_id: UUID of the ticket.
+        last_event_id: ID of the last event received before a reconnect.
+        user: Authenticated user (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        StreamingResponse with the ticket's SSE events.
+    """
+    await ticket_service.get_visible_ticket(ticket_id, user, db)
+    return StreamingResponse(
+        ai_service.watch(ticket_id, parse_last_event_id(last_event_id)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.websocket("/{ticket_id}/ws")
+async def ticket_socket(websocket: WebSocket, ticket_id: UUID, token: Optional[str] = Query(None)):
+    """
+    Hold a live conversation on a ticket over a WebSocket.
+    
+    The token (Authorization header, or ``token`` query parameter for
+    browsers) and the ticket are checked once, at the handshake. The owner
+    sends ``{"type": "message", "content": ...}`` frames, each posted and
+    answered by the AI unless ``"ai": false``, or ``{"type": "generate"}`` to
+    regenerate; agents and admins watching the ticket only receive. Every
+    generation's events and every posted message arrive as
+    ``{"event": ..., "id": ..., "data": ...}`` frames, the event names being
+    those of the SSE streams plus ``message_posted``; rejected client frames
+    are answered with a ``rejected`` event.
+    
+    Args:
+        websocket: Socket being opened.
+        ticket_id: UUID of the ticket.
+        token: JWT, when it cannot be sent in the Authorization header.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    try:
+        claims = decode_token(token)
+        async with async_session() as db:
+            user = await resolve_principal(claims, db)
+            ticket = await ticket_service.get_visible_ticket(ticket_id, user, db)
+            owner = ticket.user_id == user.id
+    except HTTPException as exc:
+        await websocket.close(code=http_status.WS_1008_POLICY_VIOLATION, reason=str(exc.detail))
+        return
+    await live_chat.serve(websocket, ticket_id, user, owner, claims.expires_at)
+
+@router.post("/{ticket_id}/ai-jobs", response_model=GenerationJobOut, status_code=202)
+async def create_ai_job(
+    ticket_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Queue a background AI response generation for a ticket.
+    
+    Args:
+        ticket_id: UUID of the ticket.
+        user: Authenticated user (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        The queued (or already active) generation job.
+    """
+    await ticket_service.get_ticket(ticket_id, user, db)  # Verify ticket exists
+    job_id = await ai_service.submit_job(ticket_id, db)
+    return await ai_service.get_job(job_id, ticket_id, db)
+
+@router.get("/{ticket_id}/ai-jobs/{job_id}", response_model=GenerationJobOut)
+async def get_ai_job(
+    ticket_id: UUID,
+    job_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Retrieve the state of a background AI generation job.
+    
+    Args:
+        ticket_id: UUID of the ticket.
+        job_id: UUID of the job.
+        user: Authenticated user (injected via dependency).
+        db: Async database session.
+    
+    Returns:
+        Generation job details.
+    """
+    await ticket_service.get_ticket(ticket_id, user, db)  # Verify ticket exists
+    return await ai_service.get_job(job_id, ticket_id, db)
+
+@router.get("/{ticket_id}/ai-jobs/{job_id}/stream")
+async def stream_ai_job(
+    ticket_id: UUID,
+    job_id: UUID,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Attach (or reattach) to a generation job's output stream from its first event.
+    
     Args:
         ticket_id: UUID of the ticket.
+        job_id: UUID of the job.
+        last_event_id: ID of the last event received before a reconnect.
         user: Authenticated user (injected via dependency).
         db: Async database session.
     
     Returns:
-        StreamingResponse with AI response chunks.
+        StreamingResponse with SSE-framed AI response events.
     """
     await ticket_service.get_ticket(ticket_id, user, db)  # Verify ticket exists
+    await ai_service.get_job(job_id, ticket_id, db)
     return StreamingResponse(
-        ai_service.generate_response(str(ticket_id), db),
-        media_type="text/event-stream"
+        ai_service.stream_job(job_id, db, parse_last_event_id(last_event_id)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
     )
\ No newline at end of file
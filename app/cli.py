@@ -0,0 +1,73 @@
+from app.services.export import EXPORT_FORMATS, EXPORT_KINDS, ExportService
+from app.services.retention import RetentionService
+from app.services.stats import StatsService
+from app.utils.database import async_session, engine
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import json
+import sys
+
+async def rebuild_stats(args: argparse.Namespace):
+    """
+    Recompute the dashboard counters from the tickets and messages tables.
+    """
+    async with async_session() as db:
+        report = await StatsService().rebuild(db)
+    print(json.dumps(report, indent=2))
+
+async def archive(args: argparse.Namespace):
+    """
+    Archive tickets closed for longer than the given number of days and maintain message partitions.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=args.days) if args.days is not None else None
+    report = await RetentionService().run_once(cutoff)
+    print(json.dumps(report, indent=2))
+
+async def export(args: argparse.Namespace):
+    """
+    Stream tickets or messages to a file or stdout, printing the next watermark to stderr.
+    """
+    service = ExportService()
+    watermark = service.watermark()
+    output = open(args.output, "wb") if args.output != "-" else sys.stdout.buffer
+    try:
+        async for chunk in service.export(args.kind, args.format, args.since, args.gzip):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+    print(f"Next incremental export: --since {watermark.isoformat()}", file=sys.stderr)
+
+async def run(args: argparse.Namespace):
+    try:
+        await args.handler(args)
+    finally:
+        await engine.dispose()
+
+def main():
+    """
+    Run an operational command, e.g. `poetry run manage rebuild-stats`.
+    """
+    parser = argparse.ArgumentParser(prog="manage", description="Operational commands for the support backend")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-stats", help="Recompute dashboard counters to repair drift")
+    rebuild.set_defaults(handler=rebuild_stats)
+
+    archiver = commands.add_parser("archive", help="Move long-closed tickets to the archive tables now")
+    archiver.add_argument("--days", type=int, help="Archive tickets closed this many days ago (default: RETENTION_ARCHIVE_AFTER_DAYS)")
+    archiver.set_defaults(handler=archive)
+
+    exporter = commands.add_parser("export", help="Dump tickets or messages as NDJSON or CSV")
+    exporter.add_argument("kind", choices=EXPORT_KINDS)
+    exporter.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    exporter.add_argument("--since", type=datetime.fromisoformat, help="Only export rows created after this ISO timestamp")
+    exporter.add_argument("--gzip", action="store_true", help="Gzip the output")
+    exporter.add_argument("--output", default="-", help="File to write (default: stdout)")
+    exporter.set_defaults(handler=export)
+
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
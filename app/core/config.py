@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
+import os
 
 # Load environment variables from .env file
 load_dotenv()
@@ -8,11 +9,117 @@ class Settings(BaseSettings):
     """
     Application configuration using Pydantic for type-safe environment variable management.
     """
-    DATABASE_URL: str  # PostgreSQL connection URL
+    DATABASE_URL: str  # PostgreSQL connection URL (sync driver names are mapped to asyncpg)
     SECRET_KEY: str  # Secret key for JWT signing
     GROQ_API_KEY: str  # API key for Groq AI service
     ALGORITHM: str = "HS256"  # JWT signing algorithm
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30  # JWT token expiration time
+    DB_ECHO: bool = False  # Log every SQL statement (development only)
+    DB_POOL_SIZE: int = 10  # Persistent connections kept per worker process
+    DB_MAX_OVERFLOW: int = 20  # Extra connections allowed beyond the pool size under load
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection before failing
+    DB_POOL_RECYCLE: int = 1800  # Seconds after which connections are replaced
+    DB_POOL_PRE_PING: bool = True  # Check connections for liveness on checkout
+    DB_STATEMENT_CACHE_SIZE: int = 256  # asyncpg prepared statements cached per connection
+    DB_SCHEMA_CHECK: str = "verify"  # Startup schema handling: "verify" the Alembic revision, "create" tables (dev/tests) or "off"
+    DB_POOL_WARMUP: int = 2  # Connections opened per worker at startup so first requests don't pay for connecting
+    SERVER_HOST: str = "0.0.0.0"  # Interface the production server binds to
+    SERVER_PORT: int = 8000  # Port the production server listens on
+    SERVER_WORKERS: int = 1  # Worker processes (0 = one per CPU); several listen on SERVER_PORT + 1 onwards for the sticky proxy
+    SERVER_LIMIT_CONCURRENCY: int = 0  # Connections per worker before new requests get 503 (0 = unlimited)
+    SERVER_BACKLOG: int = 2048  # Pending connections queued by the listening socket
+    SERVER_KEEPALIVE_SECONDS: int = 5  # Idle keep-alive connection timeout
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30  # Time in-flight requests get to finish on shutdown
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"  # Proxies trusted for X-Forwarded-* headers
+    PRINCIPAL_CACHE_SIZE: int = 10000  # Cached decoded tokens and authenticated users
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60  # Lifetime of a cached token or user lookup
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False  # Build the user from signed sub/role claims without a DB lookup
+    BCRYPT_ROUNDS: int = 12  # bcrypt work factor (log2 of iterations)
+    PASSWORD_HASH_WORKERS: int = 4  # Threads dedicated to bcrypt hashing/verification
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Hash jobs queued or running before requests are rejected
+    TICKETS_PAGE_SIZE: int = 50  # Default number of tickets per listing page
+    TICKETS_MAX_PAGE_SIZE: int = 200  # Upper bound on tickets per listing page
+    MESSAGES_PAGE_SIZE: int = 50  # Default number of messages per history page
+    MESSAGES_MAX_PAGE_SIZE: int = 200  # Upper bound on messages per history page
+    SEARCH_PAGE_SIZE: int = 20  # Default number of search results per page
+    SEARCH_MAX_PAGE_SIZE: int = 100  # Upper bound on search results per page
+    SEARCH_MAX_RESULTS: int = 1000  # Deepest ranked result reachable by paging
+    BULK_MAX_ITEMS: int = 500  # Maximum tickets or messages accepted by a bulk request
+    STATS_GLOBAL_SHARDS: int = 8  # Rows each global dashboard counter is spread over to avoid lock contention
+    METRICS_ENABLED: bool = True  # Record request metrics and serve them on /metrics
+    SLOW_REQUEST_SECONDS: float = 0.0  # Log requests slower than this with a SQL breakdown (0 disables)
+    SLOW_REQUEST_TOP_QUERIES: int = 5  # SQL statements listed per slow request
+    SIMILAR_ENABLED: bool = True  # Ground AI prompts in answers from similar resolved tickets
+    SIMILAR_EMBEDDER: str = "app.services.similarity:HashingEmbedder"  # "module:Class" of the local text embedder
+    SIMILAR_EMBEDDING_DIM: int = 512  # Dimension of the default hashing embedder
+    SIMILAR_TOP_K: int = 3  # Similar resolved tickets added to the prompt
+    SIMILAR_MIN_SCORE: float = 0.35  # Minimum cosine similarity for a ticket to be added to the prompt
+    SIMILAR_ANSWER_THRESHOLD: float = 0.9  # Similarity at which a first response reuses the stored answer without the LLM
+    SIMILAR_CROSS_TENANT: bool = False  # Also ground prompts in other customers' resolved tickets (answers are never reused verbatim across customers)
+    SIMILAR_CONTEXT_CHARS: int = 600  # Characters of each similar answer added to the prompt
+    SIMILAR_REFRESH_SECONDS: float = 30.0  # Interval between polls for tickets closed or reopened by other workers
+    SIMILAR_LOAD_BATCH: int = 1000  # Tickets read and embedded per batch when loading the index
+    RETENTION_ENABLED: bool = True  # Periodically move long-closed tickets and their messages to the archive tables
+    RETENTION_ARCHIVE_AFTER_DAYS: int = 90  # Days a ticket stays closed before it is archived
+    RETENTION_BATCH_SIZE: int = 500  # Tickets archived per transaction
+    RETENTION_BATCH_PAUSE_SECONDS: float = 0.1  # Pause between archival batches
+    RETENTION_INTERVAL_SECONDS: float = 3600.0  # Interval between archival runs
+    RETENTION_PARTITIONS_AHEAD: int = 3  # Monthly messages partitions created in advance (PostgreSQL)
+    AGENT_LEASE_SECONDS: int = 300  # How long an agent's ticket claim lasts without a heartbeat
+    EXPORT_BATCH_SIZE: int = 5000  # Rows fetched from the server-side cursor and encoded per export chunk
+    AI_PROVIDER: str = "groq"  # LLM backends in order of preference, comma-separated: "groq", or "fake" for offline load tests
+    AI_MODEL: str = "llama3-8b-8192"  # Model used for ticket responses
+    AI_LARGE_MODEL: str = "llama3-70b-8192"  # Model used for long conversations ("" to always use AI_MODEL)
+    AI_LARGE_MODEL_MIN_PROMPT_TOKENS: int = 1500  # Prompt size from which AI_LARGE_MODEL is used (0 = never)
+    AI_HEDGE_ENABLED: bool = True  # Send a second request when the first token is late
+    AI_HEDGE_MIN_DELAY_SECONDS: float = 0.25  # Lower bound of the p95-based wait before hedging
+    AI_HEDGE_MAX_DELAY_SECONDS: float = 3.0  # Upper bound of that wait, also used until latency samples exist
+    AI_HEDGE_MAX_RATIO: float = 0.1  # Share of calls that may send a hedged request
+    AI_LATENCY_WINDOW: int = 200  # Recent time-to-first-token samples kept per provider
+    AI_LATENCY_MIN_SAMPLES: int = 20  # Samples needed before a provider's p95 drives routing
+    AI_FAKE_TOKENS_PER_SECOND: float = 50.0  # Streaming rate of the fake provider (0 = unthrottled)
+    AI_FAKE_RESPONSE_TOKENS: int = 60  # Tokens per fake provider reply
+    AI_FAKE_FIRST_TOKEN_DELAY: float = 0.2  # Seconds before the fake provider's first token
+    AI_JOB_WORKERS: int = 8  # Concurrent AI generation jobs per worker process
+    AI_JOB_MAX_QUEUED: int = 1000  # Jobs waiting for a worker before submissions are rejected
+    AI_JOB_RETAIN: int = 1000  # Finished job streams kept in memory for reattachment
+    AI_JOB_RETAIN_SECONDS: int = 300  # How long a finished job stream stays in memory
+    AI_JOB_STALE_SECONDS: float = 900.0  # Age at which a queued or running job of another worker is presumed orphaned and failed
+    AI_JOB_SWEEP_SECONDS: float = 60.0  # Interval between sweeps for jobs orphaned by a worker restart
+    AI_RATE_REQUESTS_PER_MINUTE: int = 30  # Groq requests/min budget of the deployment, split evenly across workers
+    AI_RATE_TOKENS_PER_MINUTE: int = 30000  # Groq tokens/min budget (prompt plus completion), split evenly across workers
+    AI_EXPECTED_COMPLETION_TOKENS: int = 300  # Completion tokens reserved per call before actual usage is known
+    AI_CONCURRENCY_INITIAL: int = 8  # Starting limit on concurrent Groq streams
+    AI_CONCURRENCY_MIN: int = 1  # Floor the adaptive concurrency limit backs off to
+    AI_CONCURRENCY_MAX: int = 32  # Ceiling the adaptive concurrency limit grows to
+    AI_LATENCY_TARGET_SECONDS: float = 2.0  # Time to first token above which concurrency backs off
+    AI_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures that open the admission and per-provider breakers
+    AI_BREAKER_COOLDOWN_SECONDS: float = 30.0  # Seconds the breaker fails fast before probing again
+    AI_ADMISSION_MAX_WAIT_SECONDS: float = 30.0  # Longest a call waits for Groq capacity before a 429
+    AI_ADMISSION_MAX_QUEUED_PER_USER: int = 20  # Calls one user may have waiting for Groq capacity
+    AI_JOB_ABANDON_SECONDS: float = 10.0  # Grace after the last stream client detaches before a running job is cancelled
+    AI_CHECKPOINT_CHARS: int = 1024  # Characters streamed between checkpoints of a partial AI response
+    AI_CHECKPOINT_SECONDS: float = 2.0  # Seconds between checkpoints of a partial AI response
+    AI_STREAM_BUFFER_EVENTS: int = 2048  # Recent events per ticket kept for Last-Event-ID replay
+    AI_STREAM_MAX_CHANNELS: int = 10000  # Idle ticket streams kept before eviction
+    AI_STREAM_HEARTBEAT_SECONDS: float = 15.0  # Idle time before an SSE heartbeat is sent
+    WS_MAX_CONNECTIONS: int = 10000  # Open ticket WebSockets per worker before new ones are refused
+    WS_IDLE_TIMEOUT_SECONDS: float = 300.0  # Close ticket WebSockets without frames in either direction for this long
+    WS_SEND_TIMEOUT_SECONDS: float = 10.0  # Close ticket WebSockets whose client stops reading for this long
+    WS_MAX_MESSAGE_CHARS: int = 16384  # Largest frame accepted from a ticket WebSocket client
+    AI_CONTEXT_TOKEN_BUDGET: int = 3000  # Token budget for the prompt sent to the LLM
+    AI_CONTEXT_RECENT_TURNS: int = 8  # Messages kept verbatim before folding into the summary
+    AI_SUMMARY_TOKEN_BUDGET: int = 500  # Token budget for the rolling conversation summary
+    AI_SUMMARY_LINE_CHARS: int = 200  # Characters kept per message in the rolling summary
+    AI_RESPONSE_CACHE_SIZE: int = 1024  # Maximum number of cached AI responses
+    AI_RESPONSE_CACHE_TTL_SECONDS: int = 600  # Lifetime of a cached AI response
+
+    @property
+    def worker_processes(self) -> int:
+        """
+        Number of server worker processes, each holding its own share of per-deployment limits.
+        """
+        return self.SERVER_WORKERS or os.cpu_count() or 1
 
     class Config:
         env_file = ".env"  # Specify .env file for environment variables
@@ -1,7 +1,29 @@
+import time
+
+# Taken before the imports below so the reported cold start includes importing the app
+IMPORT_STARTED = time.perf_counter()
+
 from fastapi import FastAPI
-from app.api.endpoints import auth, tickets
-from app.utils.database import engine
+from app.api.endpoints import admin, agent, auth, metrics, tickets
+from app.core.config import settings
+from app.utils.database import engine, verify_schema, warm_pool
+from app.utils.instrumentation import MetricsMiddleware
+from app.utils.metrics import registry
 from app.models.user import Base
+from app.utils.security import password_hasher
+from typing import Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent in each cold start phase of this worker, filled in on startup
+startup_timings: Dict[str, float] = {"import": time.perf_counter() - IMPORT_STARTED}
+
+registry.gauge(
+    "app_cold_start_seconds",
+    "Time from importing the app until this worker was ready to serve",
+    lambda: startup_timings.get("total"),
+)
 
 # Initialize FastAPI application with project metadata
 app = FastAPI(
@@ -10,16 +32,59 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Event handler to create database tables on application startup
+# Record per-route latency, SQL, pool and streaming metrics
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 @app.on_event("startup")
 async def startup_event():
     """
-    Creates all database tables defined in SQLAlchemy models when the application starts.
-    Uses async connection to ensure compatibility with async SQLAlchemy.
+    Prepares the worker to serve: checks the database schema (or creates it when
+    DB_SCHEMA_CHECK is "create"), opens pooled connections and starts the
+    background AI generation workers, the similar-ticket index refresh and
+    the ticket archival job.
+    Heavy clients such as the LLM client are created lazily on first use. The
+    cold start breakdown is logged.
+    
+    Raises:
+        RuntimeError: If the database is not migrated to the expected revision.
+    """
+    started = time.perf_counter()
+    if settings.DB_SCHEMA_CHECK == "create":
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    elif settings.DB_SCHEMA_CHECK == "verify":
+        await verify_schema()
+    startup_timings["schema"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await warm_pool(settings.DB_POOL_WARMUP)
+    startup_timings["pool_warmup"] = time.perf_counter() - started
+
+    tickets.ai_service.jobs.start()
+    tickets.ai_service.similar.start()
+    tickets.ticket_service.retention.start()
+    startup_timings["total"] = time.perf_counter() - IMPORT_STARTED
+    logger.info(
+        "Worker ready in %.0f ms (import %.0f ms, schema %.0f ms, pool warm-up %.0f ms)",
+        *(startup_timings[phase] * 1000 for phase in ("total", "import", "schema", "pool_warmup")),
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Stops the AI generation workers, the archival job and the password hashing thread pool and
+    closes pooled database connections when the application shuts down.
     """
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await tickets.ticket_service.retention.stop()
+    await tickets.ai_service.similar.stop()
+    await tickets.ai_service.jobs.stop()
+    password_hasher.shutdown()
+    await engine.dispose()
 
 # Include API routers for authentication and ticket management
 app.include_router(auth.router)
-app.include_router(tickets.router)
\ No newline at end of file
+app.include_router(tickets.router)
+app.include_router(admin.router)
+app.include_router(agent.router)
+app.include_router(metrics.router)
@@ -1,8 +1,16 @@
-from sqlalchemy.ext.asyncio import AsyncEngine
+import asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
 from app.models.user import Base
-from app.core.config import settings
+import app.models.ticket  # noqa: F401 - register tables on Base.metadata
+import app.models.message  # noqa: F401
+import app.models.conversation  # noqa: F401
+import app.models.job  # noqa: F401
+import app.models.stats  # noqa: F401
+import app.models.archive  # noqa: F401
+from app.utils.database import DATABASE_URL, SCHEMA_REVISION
 from alembic import context
 from logging.config import fileConfig
+import warnings
 
 # Load Alembic configuration
 config = context.config
@@ -11,24 +19,49 @@ config = context.config
 fileConfig(config.config_file_name)
 
 # Set database URL from settings
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+config.set_main_option("sqlalchemy.url", DATABASE_URL)
 
-# Create async engine for migrations
-connectable = AsyncEngine(create_async_engine(settings.DATABASE_URL))
+# The app refuses to start unless the database is at SCHEMA_REVISION, so it must track the head
+if context.script.get_heads() != [SCHEMA_REVISION]:
+    warnings.warn(
+        f"SCHEMA_REVISION in app/utils/database.py is {SCHEMA_REVISION} but the migration head is "
+        f"{', '.join(context.script.get_heads())}; update it together with the new migration"
+    )
 
-def run_migrations_online():
+def run_migrations_offline():
+    """
+    Run migrations in offline mode, emitting SQL without a database connection.
+    """
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=Base.metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def do_run_migrations(connection):
+    """
+    Run migrations on a synchronous connection proxied from the async engine.
+    """
+    context.configure(
+        connection=connection,
+        target_metadata=Base.metadata
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+async def run_migrations_online():
     """
     Run migrations in online mode using an async connection.
     """
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=Base.metadata
-        )
-        with context.begin_transaction():
-            context.run_migrations()
+    connectable = create_async_engine(DATABASE_URL)
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await connectable.dispose()
 
 if context.is_offline_mode():
     run_migrations_offline()
 else:
-    run_migrations_online()
\ No newline at end of file
+    asyncio.run(run_migrations_online())
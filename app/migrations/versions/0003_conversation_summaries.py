@@ -0,0 +1,36 @@
+"""rolling conversation summaries for AI context
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'conversation_summaries',
+        sa.Column('ticket_id', sa.UUID(as_uuid=True), sa.ForeignKey('tickets.id'), primary_key=True),
+        sa.Column('summary', sa.String(), nullable=False),
+        sa.Column('summarized_count', sa.Integer(), nullable=False),
+        sa.Column('last_message_created_at', sa.DateTime(), nullable=True),
+        sa.Column('last_message_id', sa.UUID(as_uuid=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('conversation_summaries')
@@ -0,0 +1,40 @@
+"""background AI generation jobs
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'generation_jobs',
+        sa.Column('id', sa.UUID(as_uuid=True), primary_key=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('ticket_id', sa.UUID(as_uuid=True), sa.ForeignKey('tickets.id'), nullable=True),
+        sa.Column('message_id', sa.UUID(as_uuid=True), sa.ForeignKey('messages.id'), nullable=True),
+    )
+    op.create_index('ix_generation_jobs_ticket_id', 'generation_jobs', ['ticket_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_generation_jobs_ticket_id', table_name='generation_jobs')
+    op.drop_table('generation_jobs')
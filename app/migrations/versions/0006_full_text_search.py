@@ -0,0 +1,140 @@
+"""full-text search indexes for tickets and messages
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows whose search vector is filled in per backfill transaction
+BACKFILL_BATCH = 5000
+
+# tsvector expression of each searchable table, over the columns it is computed from
+SEARCH_VECTORS = {
+    'tickets': (
+        ('title', 'description'),
+        "setweight(to_tsvector('english', coalesce({row}title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce({row}description, '')), 'B')",
+    ),
+    'messages': (('content',), "to_tsvector('english', coalesce({row}content, ''))"),
+}
+
+
+def create_search_trigger(table: str) -> None:
+    """Keep a table's search_vector up to date on insert and on updates of its source columns."""
+    columns, expression = SEARCH_VECTORS[table]
+    op.execute(
+        f"CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$ "
+        f"BEGIN NEW.search_vector := {expression.format(row='NEW.')}; RETURN NEW; END "
+        "$$ LANGUAGE plpgsql"
+    )
+    op.execute(
+        f"CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {', '.join(columns)} ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()"
+    )
+
+
+def backfill_search_vector(table: str) -> None:
+    """Fill in search_vector for existing rows in short transactions, walking the primary key."""
+    _, expression = SEARCH_VECTORS[table]
+    bind = op.get_bind()
+    last_id = None
+    while True:
+        after = "" if last_id is None else "WHERE id > :last_id "
+        ids = bind.execute(
+            sa.text(
+                f"WITH batch AS (SELECT id FROM {table} {after}ORDER BY id LIMIT {BACKFILL_BATCH}) "
+                f"UPDATE {table} SET search_vector = {expression.format(row='')} "
+                f"FROM batch WHERE {table}.id = batch.id RETURNING {table}.id"
+            ),
+            {} if last_id is None else {'last_id': last_id},
+        ).scalars().all()
+        if not ids:
+            break
+        last_id = max(ids)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # A nullable column without a default is added without rewriting the table; the
+        # trigger fills it for new writes while existing rows are backfilled in batches
+        for table in SEARCH_VECTORS:
+            op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector")
+            create_search_trigger(table)
+        with op.get_context().autocommit_block():
+            for table in SEARCH_VECTORS:
+                backfill_search_vector(table)
+            # Build the GIN indexes without blocking writes
+            op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tickets_search_vector ON tickets USING GIN (search_vector)")
+            op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_search_vector ON messages USING GIN (search_vector)")
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5("
+            "title, description, content='tickets', content_rowid='rowid', tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS tickets_fts_insert AFTER INSERT ON tickets BEGIN "
+            "INSERT INTO tickets_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS tickets_fts_delete AFTER DELETE ON tickets BEGIN "
+            "INSERT INTO tickets_fts(tickets_fts, rowid, title, description) "
+            "VALUES ('delete', old.rowid, old.title, old.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS tickets_fts_update AFTER UPDATE OF title, description ON tickets BEGIN "
+            "INSERT INTO tickets_fts(tickets_fts, rowid, title, description) "
+            "VALUES ('delete', old.rowid, old.title, old.description); "
+            "INSERT INTO tickets_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END"
+        )
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+            "content, content='messages', content_rowid='rowid', tokenize='porter unicode61')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN "
+            "INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN "
+            "INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN "
+            "INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content); "
+            "INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content); END"
+        )
+        # Index rows that existed before the triggers
+        op.execute("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')")
+        op.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('ix_messages_search_vector', table_name='messages')
+        op.drop_index('ix_tickets_search_vector', table_name='tickets')
+        for table in SEARCH_VECTORS:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector ON {table}")
+            op.execute(f"DROP FUNCTION IF EXISTS {table}_search_vector_update()")
+            op.drop_column(table, 'search_vector')
+    elif dialect == 'sqlite':
+        for name in ('tickets_fts_insert', 'tickets_fts_delete', 'tickets_fts_update',
+                     'messages_fts_insert', 'messages_fts_delete', 'messages_fts_update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS messages_fts")
+        op.execute("DROP TABLE IF EXISTS tickets_fts")
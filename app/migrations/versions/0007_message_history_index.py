@@ -0,0 +1,36 @@
+"""composite index for ordered message history reads
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build without blocking writes to the messages table on PostgreSQL
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_messages_ticket_id_created_at_id',
+            'messages',
+            ['ticket_id', 'created_at', 'id'],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_ticket_id_created_at_id', table_name='messages')
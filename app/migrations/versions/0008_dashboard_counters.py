@@ -0,0 +1,81 @@
+"""incrementally maintained dashboard counters
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Scope of the counters covering all users
+GLOBAL_SCOPE = uuid.UUID(int=0)
+
+# Backfill per-user counters, then global ones, from the existing rows
+TICKET_COUNTS_SQL = """
+INSERT INTO ticket_status_counts (scope_id, status, shard, tickets, created_epoch_sum)
+SELECT {scope}, COALESCE(status, 'open'), 0, COUNT(*), COALESCE(SUM({epoch}), 0)
+FROM tickets {where}
+GROUP BY {group}COALESCE(status, 'open')
+"""
+MESSAGE_COUNTS_SQL = """
+INSERT INTO message_counts (scope_id, shard, ai_messages, human_messages)
+SELECT {scope}, 0,
+       COALESCE(SUM(CASE WHEN messages.is_ai THEN 1 ELSE 0 END), 0),
+       COALESCE(SUM(CASE WHEN messages.is_ai THEN 0 ELSE 1 END), 0)
+FROM messages JOIN tickets ON tickets.id = messages.ticket_id {where}
+{group_by}
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'ticket_status_counts',
+        sa.Column('scope_id', sa.UUID(as_uuid=True), primary_key=True),
+        sa.Column('status', sa.String(), primary_key=True),
+        sa.Column('shard', sa.Integer(), primary_key=True),
+        sa.Column('tickets', sa.BigInteger(), nullable=False),
+        sa.Column('created_epoch_sum', sa.Float(), nullable=False),
+    )
+    op.create_table(
+        'message_counts',
+        sa.Column('scope_id', sa.UUID(as_uuid=True), primary_key=True),
+        sa.Column('shard', sa.Integer(), primary_key=True),
+        sa.Column('ai_messages', sa.BigInteger(), nullable=False),
+        sa.Column('human_messages', sa.BigInteger(), nullable=False),
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        epoch = "EXTRACT(EPOCH FROM created_at)"
+    else:
+        epoch = "(julianday(created_at) - 2440587.5) * 86400.0"
+    global_scope = sa.bindparam('global_scope', GLOBAL_SCOPE, type_=sa.UUID(as_uuid=True))
+    op.execute(TICKET_COUNTS_SQL.format(
+        scope='user_id', epoch=epoch, where='WHERE user_id IS NOT NULL', group='user_id, ',
+    ))
+    op.execute(sa.text(TICKET_COUNTS_SQL.format(
+        scope=':global_scope', epoch=epoch, where='', group='',
+    )).bindparams(global_scope))
+    op.execute(MESSAGE_COUNTS_SQL.format(
+        scope='tickets.user_id', where='WHERE tickets.user_id IS NOT NULL', group_by='GROUP BY tickets.user_id',
+    ))
+    op.execute(sa.text(MESSAGE_COUNTS_SQL.format(
+        scope=':global_scope', where='', group_by='',
+    )).bindparams(global_scope))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('message_counts')
+    op.drop_table('ticket_status_counts')
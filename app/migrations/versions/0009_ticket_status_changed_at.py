@@ -0,0 +1,38 @@
+"""ticket status change timestamps for the similar-ticket index
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tickets', sa.Column('status_changed_at', sa.DateTime(), nullable=True))
+    # Build without blocking writes to the tickets table on PostgreSQL
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tickets_status_changed_at',
+            'tickets',
+            ['status_changed_at'],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tickets_status_changed_at', table_name='tickets')
+    op.drop_column('tickets', 'status_changed_at')
@@ -0,0 +1,166 @@
+"""ticket archive tables and monthly partitioning of messages
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Monthly partitions created ahead of the retention job's first run
+PARTITIONS_AHEAD = 3
+# Keeps messages.search_vector current (function created in 0006)
+SEARCH_TRIGGER = (
+    "CREATE TRIGGER messages_search_vector BEFORE INSERT OR UPDATE OF content ON messages "
+    "FOR EACH ROW EXECUTE FUNCTION messages_search_vector_update()"
+)
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    """First day of the month a number of months after the month of a timestamp."""
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'archived_tickets',
+        sa.Column('id', sa.UUID(as_uuid=True), primary_key=True),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('status_changed_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.Column('user_id', sa.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=True),
+    )
+    op.create_index(
+        'ix_archived_tickets_user_id_created_at_id', 'archived_tickets', ['user_id', 'created_at', 'id']
+    )
+    op.create_table(
+        'archived_messages',
+        sa.Column('id', sa.UUID(as_uuid=True), primary_key=True),
+        sa.Column('content', sa.String(), nullable=False),
+        sa.Column('is_ai', sa.Boolean(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('ticket_id', sa.UUID(as_uuid=True), sa.ForeignKey('archived_tickets.id'), nullable=True),
+    )
+    op.create_index(
+        'ix_archived_messages_ticket_id_created_at_id', 'archived_messages', ['ticket_id', 'created_at', 'id']
+    )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        partition_messages()
+
+
+def partition_messages() -> None:
+    """
+    Turn messages into a table partitioned by month of created_at.
+    
+    The existing table becomes the partition holding everything before next
+    month. Its scans (NOT NULL and range checks, the unique index the new
+    primary key needs) run without blocking writes; the swap itself only
+    renames and attaches, under a short exclusive lock.
+    """
+    boundary = add_months(datetime.utcnow(), 1)
+    op.execute(
+        "UPDATE messages SET created_at = COALESCE("
+        "(SELECT created_at FROM tickets WHERE tickets.id = messages.ticket_id), now() AT TIME ZONE 'utc') "
+        "WHERE created_at IS NULL"
+    )
+    with op.get_context().autocommit_block():
+        op.execute("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS messages_id_created_at_key ON messages (id, created_at)")
+        op.execute(
+            "ALTER TABLE messages ADD CONSTRAINT messages_created_at_not_null CHECK (created_at IS NOT NULL) NOT VALID"
+        )
+        op.execute("ALTER TABLE messages VALIDATE CONSTRAINT messages_created_at_not_null")
+        op.execute(
+            f"ALTER TABLE messages ADD CONSTRAINT messages_legacy_range CHECK (created_at < '{boundary:%Y-%m-%d}') NOT VALID"
+        )
+        op.execute("ALTER TABLE messages VALIDATE CONSTRAINT messages_legacy_range")
+
+    # The validated checks let SET NOT NULL and ATTACH PARTITION skip their table scans
+    op.execute("ALTER TABLE messages ALTER COLUMN created_at SET NOT NULL")
+    op.execute("ALTER TABLE messages DROP CONSTRAINT messages_created_at_not_null")
+    # Foreign keys cannot reference a partitioned table's id alone
+    op.execute("ALTER TABLE generation_jobs DROP CONSTRAINT IF EXISTS generation_jobs_message_id_fkey")
+    op.execute("ALTER TABLE messages RENAME TO messages_legacy")
+    op.execute("ALTER TABLE messages_legacy RENAME CONSTRAINT messages_pkey TO messages_legacy_pkey")
+    op.execute("ALTER INDEX messages_id_created_at_key RENAME TO messages_legacy_id_created_at_key")
+    op.execute("ALTER INDEX ix_messages_ticket_id_created_at_id RENAME TO ix_messages_legacy_ticket_id_created_at_id")
+    op.execute("ALTER INDEX IF EXISTS ix_messages_search_vector RENAME TO ix_messages_legacy_search_vector")
+    # The search trigger moves to the partitioned table, which clones it onto every partition
+    op.execute("DROP TRIGGER IF EXISTS messages_search_vector ON messages_legacy")
+
+    op.execute(
+        "CREATE TABLE messages (LIKE messages_legacy INCLUDING DEFAULTS INCLUDING GENERATED) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute("ALTER TABLE messages ADD CONSTRAINT messages_pkey PRIMARY KEY (id, created_at)")
+    op.execute("ALTER TABLE messages ADD CONSTRAINT messages_ticket_id_fkey FOREIGN KEY (ticket_id) REFERENCES tickets (id)")
+    op.execute(SEARCH_TRIGGER)
+    op.execute(f"ALTER TABLE messages ATTACH PARTITION messages_legacy FOR VALUES FROM (MINVALUE) TO ('{boundary:%Y-%m-%d}')")
+    op.execute("ALTER TABLE messages_legacy DROP CONSTRAINT messages_legacy_range")
+    # Existing partition indexes with the same definition are attached rather than rebuilt
+    op.execute("CREATE INDEX ix_messages_ticket_id_created_at_id ON messages (ticket_id, created_at, id)")
+    op.execute("CREATE INDEX ix_messages_search_vector ON messages USING GIN (search_vector)")
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+    for offset in range(PARTITIONS_AHEAD):
+        lower, upper = add_months(boundary, offset), add_months(boundary, offset + 1)
+        op.execute(
+            f"CREATE TABLE messages_p{lower:%Y%m} PARTITION OF messages "
+            f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        )
+
+
+def unpartition_messages() -> None:
+    """Copy the partitioned messages back into a plain table."""
+    op.execute("CREATE TABLE messages_flat (LIKE messages INCLUDING DEFAULTS INCLUDING GENERATED)")
+    op.execute(
+        "INSERT INTO messages_flat (id, content, is_ai, status, created_at, ticket_id, search_vector) "
+        "SELECT id, content, is_ai, status, created_at, ticket_id, search_vector FROM messages"
+    )
+    op.execute("DROP TABLE messages")
+    op.execute("ALTER TABLE messages_flat RENAME TO messages")
+    op.execute(SEARCH_TRIGGER)
+    op.execute("ALTER TABLE messages ALTER COLUMN created_at DROP NOT NULL")
+    op.execute("ALTER TABLE messages ADD CONSTRAINT messages_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE messages ADD CONSTRAINT messages_ticket_id_fkey FOREIGN KEY (ticket_id) REFERENCES tickets (id)")
+    op.execute("CREATE INDEX ix_messages_ticket_id_created_at_id ON messages (ticket_id, created_at, id)")
+    op.execute("CREATE INDEX ix_messages_search_vector ON messages USING GIN (search_vector)")
+    op.execute(
+        "ALTER TABLE generation_jobs ADD CONSTRAINT generation_jobs_message_id_fkey "
+        "FOREIGN KEY (message_id) REFERENCES messages (id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        unpartition_messages()
+    # Move archived tickets back so no data is lost with the archive tables
+    op.execute(
+        "INSERT INTO tickets (id, title, description, status, created_at, status_changed_at, user_id) "
+        "SELECT id, title, description, status, created_at, status_changed_at, user_id FROM archived_tickets"
+    )
+    op.execute(
+        "INSERT INTO messages (id, content, is_ai, status, created_at, ticket_id) "
+        "SELECT id, content, is_ai, status, created_at, ticket_id FROM archived_messages"
+    )
+    op.drop_index('ix_archived_messages_ticket_id_created_at_id', table_name='archived_messages')
+    op.drop_table('archived_messages')
+    op.drop_index('ix_archived_tickets_user_id_created_at_id', table_name='archived_tickets')
+    op.drop_table('archived_tickets')
@@ -0,0 +1,57 @@
+"""agent ticket claims with expiring leases
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tickets', sa.Column('assigned_to', sa.UUID(as_uuid=True), nullable=True))
+    op.add_column('tickets', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+    # SQLite cannot add constraints to existing tables (nor drop constrained columns later)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_foreign_key('tickets_assigned_to_fkey', 'tickets', 'users', ['assigned_to'], ['id'])
+    # Build the agent queue indexes without blocking writes to the tickets table on PostgreSQL
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tickets_open_unassigned',
+            'tickets',
+            ['created_at', 'id'],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+            postgresql_where=sa.text("status = 'open' AND assigned_to IS NULL"),
+            sqlite_where=sa.text("status = 'open' AND assigned_to IS NULL"),
+        )
+        op.create_index(
+            'ix_tickets_lease_expires_at',
+            'tickets',
+            ['lease_expires_at'],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+            postgresql_where=sa.text("assigned_to IS NOT NULL"),
+            sqlite_where=sa.text("assigned_to IS NOT NULL"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tickets_lease_expires_at', table_name='tickets')
+    op.drop_index('ix_tickets_open_unassigned', table_name='tickets')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('tickets_assigned_to_fkey', 'tickets', type_='foreignkey')
+    op.drop_column('tickets', 'lease_expires_at')
+    op.drop_column('tickets', 'assigned_to')
@@ -0,0 +1,51 @@
+"""message rewrite timestamps for incremental exports
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable without a default, so adding it does not rewrite the table
+    op.add_column('messages', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    if op.get_bind().dialect.name != 'postgresql':
+        op.create_index(
+            'ix_messages_updated_at', 'messages', ['updated_at'], sqlite_where=sa.text("updated_at IS NOT NULL")
+        )
+        return
+    # messages is partitioned, and partitioned indexes cannot be built concurrently: create the
+    # parent index empty, build each partition's index without blocking writes, then attach them
+    op.execute("CREATE INDEX IF NOT EXISTS ix_messages_updated_at ON ONLY messages (updated_at) WHERE updated_at IS NOT NULL")
+    partitions = op.get_bind().execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'messages'::regclass"
+        )
+    ).scalars().all()
+    with op.get_context().autocommit_block():
+        for partition in partitions:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition}_updated_at_idx "
+                f"ON {partition} (updated_at) WHERE updated_at IS NOT NULL"
+            )
+            op.execute(f"ALTER INDEX ix_messages_updated_at ATTACH PARTITION {partition}_updated_at_idx")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_updated_at', table_name='messages')
+    op.drop_column('messages', 'updated_at')
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Boolean, Index
+from datetime import datetime
+from .user import Base
+
+class ArchivedTicket(Base):
+    """
+    SQLAlchemy model for the archived_tickets table.
+    Closed tickets moved out of the live tickets table by the retention job,
+    keeping the hot table small. Rows are moved back when a ticket is reopened.
+    """
+    __tablename__ = "archived_tickets"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)  # ID the ticket had while live
+    title = Column(String, nullable=False)  # Ticket title
+    description = Column(String, nullable=False)  # Ticket description
+    status = Column(String, nullable=False, default="closed")  # Ticket status when archived
+    created_at = Column(DateTime, nullable=False)  # Creation timestamp
+    status_changed_at = Column(DateTime, nullable=True)  # When the ticket was closed
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # When the ticket was archived
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))  # Foreign key to user
+
+    __table_args__ = (
+        # Backs keyset pagination of a user's archived tickets ordered by (created_at, id)
+        Index("ix_archived_tickets_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
+class ArchivedMessage(Base):
+    """
+    SQLAlchemy model for the archived_messages table.
+    Messages of archived tickets, moved together with their ticket.
+    """
+    __tablename__ = "archived_messages"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)  # ID the message had while live
+    content = Column(String, nullable=False)  # Message content
+    is_ai = Column(Boolean, default=False)  # Flag to indicate if message is AI-generated
+    status = Column(String, nullable=False, default="complete")  # Completion state when archived
+    created_at = Column(DateTime, nullable=False)  # Creation timestamp
+
+    ticket_id = Column(UUID(as_uuid=True), ForeignKey("archived_tickets.id"))  # Foreign key to archived ticket
+
+    __table_args__ = (
+        # Backs ordered, keyset-paginated reads of an archived conversation
+        Index("ix_archived_messages_ticket_id_created_at_id", "ticket_id", "created_at", "id"),
+    )
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Integer
+from datetime import datetime
+from .user import Base
+
+class ConversationSummary(Base):
+    """
+    SQLAlchemy model for the conversation_summaries table.
+    Holds the rolling summary of a ticket's older messages, and the watermark of
+    the last message folded into it, so the AI context can be extended
+    incrementally instead of being rebuilt from the full history.
+    """
+    __tablename__ = "conversation_summaries"
+
+    ticket_id = Column(UUID(as_uuid=True), ForeignKey("tickets.id"), primary_key=True)  # One summary per ticket
+    summary = Column(String, nullable=False, default="")  # Condensed older turns
+    summarized_count = Column(Integer, nullable=False, default=0)  # Number of messages folded in
+    last_message_created_at = Column(DateTime, nullable=True)  # Watermark: created_at of last folded message
+    last_message_id = Column(UUID(as_uuid=True), nullable=True)  # Watermark tie-breaker: id of last folded message
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Last update timestamp
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime
+from datetime import datetime
+import uuid
+from .user import Base
+
+class GenerationJob(Base):
+    """
+    SQLAlchemy model for the generation_jobs table.
+    Tracks a background AI response generation for a ticket through its lifecycle.
+    """
+    __tablename__ = "generation_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    status = Column(String, nullable=False, default="queued")  # Job status (queued, running, done, failed, cancelled)
+    error = Column(String, nullable=True)  # Failure reason for failed jobs
+    created_at = Column(DateTime, default=datetime.utcnow)  # Submission timestamp
+    started_at = Column(DateTime, nullable=True)  # When a worker picked the job up
+    finished_at = Column(DateTime, nullable=True)  # When the job completed or failed
+
+    ticket_id = Column(UUID(as_uuid=True), ForeignKey("tickets.id"), index=True)  # Foreign key to ticket
+    message_id = Column(UUID(as_uuid=True), ForeignKey("messages.id"), nullable=True)  # Resulting AI message (not enforced once messages is partitioned)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -14,7 +14,21 @@ class Message(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     content = Column(String, nullable=False)  # Message content
     is_ai = Column(Boolean, default=False)  # Flag to indicate if message is AI-generated
+    status = Column(String, nullable=False, default="complete", server_default="complete")  # Completion state (streaming, complete, aborted)
     created_at = Column(DateTime, default=datetime.utcnow)  # Creation timestamp
+    updated_at = Column(DateTime, nullable=True)  # Last rewrite of a streaming AI message, read by incremental exports
 
     ticket_id = Column(UUID(as_uuid=True), ForeignKey("tickets.id"))  # Foreign key to ticket
-    ticket = relationship("Ticket", back_populates="messages")  # Relationship to ticket
\ No newline at end of file
+    ticket = relationship("Ticket", back_populates="messages")  # Relationship to ticket
+
+    __table_args__ = (
+        # Backs ordered, keyset-paginated reads of a ticket's conversation
+        Index("ix_messages_ticket_id_created_at_id", "ticket_id", "created_at", "id"),
+        # Incremental exports: messages rewritten after the watermark
+        Index(
+            "ix_messages_updated_at",
+            "updated_at",
+            postgresql_where=text("updated_at IS NOT NULL"),
+            sqlite_where=text("updated_at IS NOT NULL"),
+        ),
+    )
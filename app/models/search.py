@@ -0,0 +1,65 @@
+from sqlalchemy import DDL, event
+from .ticket import Ticket
+from .message import Message
+
+# Full-text search structures, created alongside the tables by create_all.
+# PostgreSQL keeps a tsvector column per table, maintained by a trigger, behind
+# a GIN index; SQLite keeps external-content FTS5 tables in sync through triggers.
+POSTGRES_SEARCH_DDL = {
+    Ticket.__table__: [
+        "ALTER TABLE tickets ADD COLUMN IF NOT EXISTS search_vector tsvector",
+        "CREATE OR REPLACE FUNCTION tickets_search_vector_update() RETURNS trigger AS $$ "
+        "BEGIN NEW.search_vector := "
+        "setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B'); RETURN NEW; END "
+        "$$ LANGUAGE plpgsql",
+        "CREATE TRIGGER tickets_search_vector BEFORE INSERT OR UPDATE OF title, description ON tickets "
+        "FOR EACH ROW EXECUTE FUNCTION tickets_search_vector_update()",
+        "CREATE INDEX IF NOT EXISTS ix_tickets_search_vector ON tickets USING GIN (search_vector)",
+    ],
+    Message.__table__: [
+        "ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector",
+        "CREATE OR REPLACE FUNCTION messages_search_vector_update() RETURNS trigger AS $$ "
+        "BEGIN NEW.search_vector := to_tsvector('english', coalesce(NEW.content, '')); RETURN NEW; END "
+        "$$ LANGUAGE plpgsql",
+        "CREATE TRIGGER messages_search_vector BEFORE INSERT OR UPDATE OF content ON messages "
+        "FOR EACH ROW EXECUTE FUNCTION messages_search_vector_update()",
+        "CREATE INDEX IF NOT EXISTS ix_messages_search_vector ON messages USING GIN (search_vector)",
+    ],
+}
+
+SQLITE_SEARCH_DDL = {
+    Ticket.__table__: [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5("
+        "title, description, content='tickets', content_rowid='rowid', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS tickets_fts_insert AFTER INSERT ON tickets BEGIN "
+        "INSERT INTO tickets_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tickets_fts_delete AFTER DELETE ON tickets BEGIN "
+        "INSERT INTO tickets_fts(tickets_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); END",
+        "CREATE TRIGGER IF NOT EXISTS tickets_fts_update AFTER UPDATE OF title, description ON tickets BEGIN "
+        "INSERT INTO tickets_fts(tickets_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); "
+        "INSERT INTO tickets_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END",
+    ],
+    Message.__table__: [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5("
+        "content, content='messages', content_rowid='rowid', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN "
+        "INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content); END",
+        "CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN "
+        "INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content); END",
+        "CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages BEGIN "
+        "INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.rowid, old.content); "
+        "INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content); END",
+    ],
+}
+
+for table, statements in POSTGRES_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+for table, statements in SQLITE_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(table, "after_drop", DDL(f"DROP TABLE IF EXISTS {table.name}_fts").execute_if(dialect="sqlite"))
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, String, UUID, Integer, BigInteger, Float
+import uuid
+from .user import Base
+
+# Scope of the counters covering all users
+GLOBAL_SCOPE = uuid.UUID(int=0)
+
+class TicketStatusCount(Base):
+    """
+    SQLAlchemy model for the ticket_status_counts table.
+    Number of tickets per status for one user or for all users, maintained in
+    the same transaction as the writes it counts so dashboards never scan tickets.
+    Global counters are spread over several shard rows to avoid one hot row.
+    """
+    __tablename__ = "ticket_status_counts"
+
+    scope_id = Column(UUID(as_uuid=True), primary_key=True)  # Owning user, or GLOBAL_SCOPE for all users
+    status = Column(String, primary_key=True)  # Ticket status counted
+    shard = Column(Integer, primary_key=True, default=0)  # Counter shard; per-user counters use shard 0
+    tickets = Column(BigInteger, nullable=False, default=0)  # Tickets with this status
+    created_epoch_sum = Column(Float, nullable=False, default=0.0)  # Sum of their created_at in Unix seconds, for average age
+
+class MessageCount(Base):
+    """
+    SQLAlchemy model for the message_counts table.
+    Number of AI and human messages on one user's tickets or on all tickets.
+    """
+    __tablename__ = "message_counts"
+
+    scope_id = Column(UUID(as_uuid=True), primary_key=True)  # Ticket owner, or GLOBAL_SCOPE for all users
+    shard = Column(Integer, primary_key=True, default=0)  # Counter shard; per-user counters use shard 0
+    ai_messages = Column(BigInteger, nullable=False, default=0)  # AI-generated messages
+    human_messages = Column(BigInteger, nullable=False, default=0)  # Customer messages
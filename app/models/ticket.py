@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, UUID, ForeignKey, DateTime
+from sqlalchemy import Column, String, UUID, ForeignKey, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -16,7 +16,32 @@ class Ticket(Base):
     description = Column(String, nullable=False)  # Ticket description
     status = Column(String, default="open")  # Ticket status (e.g., open, closed)
     created_at = Column(DateTime, default=datetime.utcnow)  # Creation timestamp
+    status_changed_at = Column(DateTime, nullable=True)  # Last status change, polled to sync the similar-ticket index
+    lease_expires_at = Column(DateTime, nullable=True)  # When the agent's claim lapses unless renewed
 
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))  # Foreign key to user
-    user = relationship("User", back_populates="tickets")  # Relationship to user
-    messages = relationship("Message", back_populates="ticket")  # One-to-many with messages
\ No newline at end of file
+    user = relationship("User", back_populates="tickets", foreign_keys=[user_id])  # Relationship to user
+    assigned_to = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)  # Agent holding the claim
+    messages = relationship("Message", back_populates="ticket")  # One-to-many with messages
+
+    __table_args__ = (
+        # Backs keyset pagination of a user's tickets ordered by (created_at, id)
+        Index("ix_tickets_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Backs incremental refreshes of the similar-ticket index
+        Index("ix_tickets_status_changed_at", "status_changed_at"),
+        # Agent queue: open tickets nobody has claimed, oldest first
+        Index(
+            "ix_tickets_open_unassigned",
+            "created_at",
+            "id",
+            postgresql_where=text("status = 'open' AND assigned_to IS NULL"),
+            sqlite_where=text("status = 'open' AND assigned_to IS NULL"),
+        ),
+        # Agent queue: claims whose lease may have expired
+        Index(
+            "ix_tickets_lease_expires_at",
+            "lease_expires_at",
+            postgresql_where=text("assigned_to IS NOT NULL"),
+            sqlite_where=text("assigned_to IS NOT NULL"),
+        ),
+    )
\ No newline at end of file
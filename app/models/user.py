@@ -19,4 +19,4 @@ class User(Base):
     role = Column(String, default="user")  # User role (e.g., user, admin)
 
     # One-to-many relationship with tickets
-    tickets = relationship("Ticket", back_populates="user")
\ No newline at end of file
+    tickets = relationship("Ticket", back_populates="user", foreign_keys="Ticket.user_id")
\ No newline at end of file
@@ -0,0 +1,41 @@
+from pydantic import BaseModel, Field
+from uuid import UUID
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+class BulkTicketCreate(BaseModel):
+    """
+    Schema for creating many tickets in one request.
+    Items are validated individually so one bad item does not reject the batch.
+    """
+    tickets: List[Dict[str, Any]] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)  # TicketCreate payloads
+
+class BulkMessageItem(BaseModel):
+    """
+    Schema for one message in a bulk request; messages may target different tickets.
+    """
+    ticket_id: UUID  # ID of the ticket the message belongs to
+    content: str  # Message content
+
+class BulkMessageCreate(BaseModel):
+    """
+    Schema for adding many messages, across one or more tickets, in one request.
+    """
+    messages: List[Dict[str, Any]] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)  # BulkMessageItem payloads
+
+class BulkItemResult(BaseModel):
+    """
+    Schema for the outcome of a single item in a bulk request.
+    """
+    index: int  # Position of the item in the request
+    status: str  # "created" or "error"
+    id: Optional[UUID] = None  # ID of the created row, if any
+    error: Optional[str] = None  # Reason the item was rejected, if any
+
+class BulkResult(BaseModel):
+    """
+    Schema for the outcome of a bulk request.
+    """
+    created: int  # Number of items created
+    failed: int  # Number of items rejected
+    results: List[BulkItemResult]  # Per-item outcomes, in request order
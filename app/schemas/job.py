@@ -0,0 +1,19 @@
+from pydantic import BaseModel, ConfigDict
+from uuid import UUID
+from datetime import datetime
+from typing import Optional
+
+class GenerationJobOut(BaseModel):
+    """
+    Schema for background AI generation job output.
+    """
+    id: UUID  # Unique job identifier
+    ticket_id: UUID  # ID of the ticket the response is generated for
+    status: str  # Job status (queued, running, done, failed, cancelled)
+    error: Optional[str] = None  # Failure reason, if the job failed
+    message_id: Optional[UUID] = None  # ID of the persisted AI message, once done
+    created_at: datetime  # Submission timestamp
+    started_at: Optional[datetime] = None  # When a worker picked the job up
+    finished_at: Optional[datetime] = None  # When the job completed or failed
+
+    model_config = ConfigDict(from_attributes=True)  # Allow validation from ORM objects and result rows
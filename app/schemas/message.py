@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from uuid import UUID
 from datetime import datetime
+from typing import List, Optional
 
 class MessageBase(BaseModel):
     """
@@ -20,8 +21,16 @@ class MessageOut(MessageBase):
     """
     id: UUID  # Unique message identifier
     is_ai: bool  # Indicates if message is AI-generated
+    status: str = "complete"  # Completion state (streaming, complete, aborted)
     created_at: datetime  # Creation timestamp
     ticket_id: UUID  # ID of the associated ticket
 
-    class Config:
-        orm_mode = True  # Enable ORM mode for SQLAlchemy compatibility
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)  # Allow validation from ORM objects and result rows
+
+class MessagePage(BaseModel):
+    """
+    Schema for a keyset-paginated page of a ticket's messages, oldest first.
+    """
+    items: List[MessageOut]  # Messages on this page
+    next_cursor: Optional[str] = None  # Cursor for the following (newer) page, if any
+    prev_cursor: Optional[str] = None  # Cursor for the preceding (older) page, if any
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from typing import List, Optional
+
+class TicketSearchHit(BaseModel):
+    """
+    Schema for a ticket matching a full-text search.
+    """
+    id: UUID  # Unique ticket identifier
+    title: str  # Ticket title
+    status: str  # Ticket status
+    created_at: datetime  # Creation timestamp
+    user_id: UUID  # ID of the user who created the ticket
+    rank: float  # Relevance of the ticket and its messages to the query; higher is better
+
+class TicketSearchPage(BaseModel):
+    """
+    Schema for a page of search results, most relevant first.
+    """
+    items: List[TicketSearchHit]  # Matching tickets on this page
+    next_cursor: Optional[str] = None  # Cursor for the following page, if any
@@ -0,0 +1,33 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+
+class TicketCounts(BaseModel):
+    """
+    Schema for ticket counts by status.
+    """
+    total: int  # Tickets in any status
+    by_status: Dict[str, int]  # Tickets per status
+
+class OpenTicketAge(BaseModel):
+    """
+    Schema for the age of open tickets.
+    """
+    count: int  # Open tickets
+    average_age_seconds: Optional[float] = None  # Mean time since creation; None without open tickets
+
+class MessageCounts(BaseModel):
+    """
+    Schema for AI versus human message counts.
+    """
+    total: int  # All messages
+    ai: int  # AI-generated messages
+    human: int  # Customer messages
+    ai_ratio: Optional[float] = None  # Share of messages written by AI; None without messages
+
+class TicketStats(BaseModel):
+    """
+    Schema for the support dashboard statistics of one user or of all users.
+    """
+    tickets: TicketCounts  # Ticket counts by status
+    open_tickets: OpenTicketAge  # Open ticket age
+    messages: MessageCounts  # AI versus human messages
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from uuid import UUID
 from datetime import datetime
+from typing import List, Literal, Optional
 
 class TicketBase(BaseModel):
     """
@@ -15,6 +16,12 @@ class TicketCreate(TicketBase):
     """
     pass
 
+class TicketStatusUpdate(BaseModel):
+    """
+    Schema for changing a ticket's status.
+    """
+    status: Literal["open", "closed"]  # New ticket status
+
 class TicketOut(TicketBase):
     """
     Schema for ticket output, including additional fields.
@@ -23,6 +30,32 @@ class TicketOut(TicketBase):
     status: str  # Ticket status
     created_at: datetime  # Creation timestamp
     user_id: UUID  # ID of the user who created the ticket
+    archived_at: Optional[datetime] = None  # When the ticket was archived; None for live tickets
+
+    model_config = ConfigDict(from_attributes=True)  # Allow validation from ORM objects and result rows
+
+class TicketClaim(TicketOut):
+    """
+    Schema for a ticket claimed by a support agent.
+    """
+    assigned_to: Optional[UUID] = None  # Agent holding the claim, None once released
+    lease_expires_at: Optional[datetime] = None  # When the claim lapses unless renewed
+
+class TicketSummary(BaseModel):
+    """
+    Schema for a ticket in a list view; only the projected fields are set.
+    """
+    id: Optional[UUID] = None  # Unique ticket identifier
+    title: Optional[str] = None  # Ticket title
+    description: Optional[str] = None  # Ticket description
+    status: Optional[str] = None  # Ticket status
+    created_at: Optional[datetime] = None  # Creation timestamp
+    user_id: Optional[UUID] = None  # ID of the user who created the ticket
 
-    class Config:
-        orm_mode = True  # Enable ORM mode for SQLAlchemy compatibility
\ No newline at end of file
+class TicketPage(BaseModel):
+    """
+    Schema for a keyset-paginated page of tickets.
+    """
+    items: List[TicketSummary]  # Tickets on this page
+    next_cursor: Optional[str] = None  # Cursor for the following page, if any
+    prev_cursor: Optional[str] = None  # Cursor for the preceding page, if any
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from uuid import UUID
 
 class UserBase(BaseModel):
@@ -20,8 +20,7 @@ class UserOut(UserBase):
     id: UUID  # Unique user identifier
     role: str  # User role (e.g., user, admin)
 
-    class Config:
-        orm_mode = True  # Enable ORM mode for SQLAlchemy compatibility
+    model_config = ConfigDict(from_attributes=True)  # Allow validation from ORM objects and result rows
 
 class Token(BaseModel):
     """
@@ -0,0 +1,123 @@
+from uvicorn.config import LOGGING_CONFIG
+from app.core.config import settings
+from multiprocessing.connection import wait
+from typing import Dict, List
+import copy
+import logging
+import logging.config
+import multiprocessing
+import signal
+import uvicorn
+
+# uvicorn's logging setup plus the application loggers, applied in every worker
+LOG_CONFIG = copy.deepcopy(LOGGING_CONFIG)
+LOG_CONFIG["loggers"]["app"] = {"handlers": ["default"], "level": "INFO", "propagate": False}
+
+logger = logging.getLogger("app.server")
+
+def worker_count() -> int:
+    """
+    Resolve the number of worker processes from SERVER_WORKERS.
+    
+    Returns:
+        Configured worker count, or one per CPU when it is 0.
+    """
+    return settings.worker_processes
+
+def worker_ports() -> List[int]:
+    """
+    Resolve the port each worker process listens on.
+    
+    A single worker serves SERVER_PORT. Several workers each listen on their
+    own port, SERVER_PORT + 1 onwards, so that the proxy in deploy/nginx.conf
+    can route every request of a ticket to the same worker; a port shared
+    between workers would hand each connection to whichever accepts it first.
+    
+    Returns:
+        One port per worker.
+    """
+    workers = worker_count()
+    if workers == 1:
+        return [settings.SERVER_PORT]
+    return [settings.SERVER_PORT + index for index in range(1, workers + 1)]
+
+def serve(port: int):
+    """
+    Run one worker process of the API under uvicorn with production settings.
+    
+    Args:
+        port: Port the worker listens on.
+    """
+    uvicorn.run(
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=port,
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY or None,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.SERVER_FORWARDED_ALLOW_IPS,
+        log_config=LOG_CONFIG,
+    )
+
+def supervise(ports: List[int]):
+    """
+    Run one worker process per port, replacing workers that exit, until SIGTERM or SIGINT.
+    
+    On shutdown every worker is sent SIGTERM and given
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS to finish its in-flight requests.
+    
+    Args:
+        ports: Port of each worker.
+    """
+    logging.config.dictConfig(LOG_CONFIG)
+    context = multiprocessing.get_context("spawn")
+    processes: Dict[int, multiprocessing.Process] = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while not stopping:
+        for port in ports:
+            process = processes.get(port)
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                logger.warning("Worker on port %d exited with code %s, restarting it", port, process.exitcode)
+            processes[port] = context.Process(target=serve, args=(port,), name=f"worker-{port}")
+            processes[port].start()
+        wait([process.sentinel for process in processes.values()], timeout=1.0)
+
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        process.join(settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS + 5)
+        if process.is_alive():
+            process.kill()
+
+def main():
+    """
+    Run the API under uvicorn with production settings.
+    
+    Workers are separate processes; with several, this process supervises
+    them and replaces a crashed one. Each worker checks the schema and warms
+    its pool on startup. Generation jobs, stream channels and WebSockets live
+    in the worker that serves them, so several workers each get their own
+    port for the sticky proxy; the LLM rate limits are split evenly between
+    workers. On SIGTERM the server stops accepting connections and gives
+    in-flight requests SERVER_GRACEFUL_SHUTDOWN_SECONDS to finish before
+    shutting down.
+    """
+    ports = worker_ports()
+    if len(ports) == 1:
+        serve(ports[0])
+    else:
+        supervise(ports)
+
+if __name__ == "__main__":
+    main()
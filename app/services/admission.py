@@ -0,0 +1,339 @@
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from app.core.config import settings
+from app.utils.fairqueue import FairQueue
+from typing import Any, AsyncIterator, Dict, Hashable, Optional
+import asyncio
+import time
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+    The level may go negative when actual usage exceeds what was reserved.
+    """
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Return seconds until the bucket holds an amount (capped at capacity), or 0 if it does now.
+        """
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, amount: float):
+        """
+        Remove an amount from the bucket; negative amounts return tokens.
+        """
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: grows by about one per window of healthy calls and
+    halves on upstream rate limiting or latency above target.
+    """
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_target: float):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+
+    def on_success(self, latency: float):
+        if latency > self.latency_target:
+            self.on_overload()
+        else:
+            self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+
+    def on_overload(self):
+        self.limit = max(float(self.minimum), self.limit / 2)
+
+    @property
+    def current(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+class CircuitBreaker:
+    """
+    Opens after consecutive upstream failures and fails fast until a cooldown
+    passes, then lets a single probe call through (half-open).
+    """
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    def on_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def on_failure(self):
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+class Permit:
+    """
+    Admission granted to one upstream call; records its outcome on release.
+    """
+    def __init__(self, reserved_tokens: int):
+        self.reserved_tokens = reserved_tokens
+        self.tokens_used: Optional[int] = None
+        self.started = time.monotonic()
+        self.first_token_latency: Optional[float] = None
+        self.probe = False
+
+    def first_token(self):
+        """
+        Mark the arrival of the first streamed token.
+        """
+        if self.first_token_latency is None:
+            self.first_token_latency = time.monotonic() - self.started
+
+class AdmissionController:
+    """
+    Client-side admission layer in front of the LLM provider.
+    
+    Calls wait in a per-user fair queue and are released round-robin while the
+    adaptive concurrency limit, the requests/min and tokens/min buckets and the
+    circuit breaker allow. Upstream 429s and slow first tokens shrink the
+    concurrency limit; repeated failures open the breaker so callers fail fast.
+    """
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        concurrency: AdaptiveConcurrency,
+        breaker: CircuitBreaker,
+        max_wait: float,
+        max_queued_per_user: int,
+    ):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = concurrency
+        self.breaker = breaker
+        self.max_wait = max_wait
+        self.max_queued_per_user = max_queued_per_user
+        self.in_flight = 0
+        self._waiters = FairQueue()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.admitted = 0
+        self.upstream_rate_limited = 0
+        self.upstream_errors = 0
+        self.hedges_skipped = 0
+        self.rejected: Dict[str, int] = {"circuit_open": 0, "queue_full": 0, "timeout": 0}
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def admit(self, user_id: Hashable, estimated_tokens: int) -> AsyncIterator[Permit]:
+        """
+        Wait for admission of one upstream call and record its outcome.
+        
+        Args:
+            user_id: Tenant the call is made for; tenants are served round-robin.
+            estimated_tokens: Prompt plus expected completion tokens to reserve.
+        
+        Yields:
+            Permit; set tokens_used and call first_token() to refine accounting.
+        
+        Raises:
+            HTTPException: If the breaker is open, the user's queue is full or the wait times out.
+        """
+        if self.breaker.state == "open":
+            self._reject("circuit_open", "AI provider is unavailable, please retry later")
+        if self._waiters.tenant_size(user_id) >= self.max_queued_per_user:
+            self._reject("queue_full", "Too many pending AI requests")
+
+        permit = Permit(estimated_tokens)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.put_nowait(user_id, (waiter, permit))
+        queued_at = time.monotonic()
+        self._dispatch()
+        try:
+            done, _ = await asyncio.wait({waiter}, timeout=self.max_wait)
+        except BaseException:
+            # Cancelled while queued, e.g. an abandoned generation job
+            self._withdraw(user_id, waiter, permit)
+            raise
+        if not done:
+            self._waiters.remove(user_id, (waiter, permit))
+            waiter.cancel()
+            self._reject("timeout", "Timed out waiting for AI capacity")
+        if waiter.exception() is not None:
+            raise waiter.exception()
+
+        wait = time.monotonic() - queued_at
+        self.total_wait_seconds += wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        permit.started = time.monotonic()
+        try:
+            yield permit
+        except Exception as exc:
+            if getattr(exc, "status_code", None) == 429:
+                self.upstream_rate_limited += 1
+                self.concurrency.on_overload()
+            else:
+                self.upstream_errors += 1
+                self.breaker.on_failure()
+            raise
+        else:
+            self.breaker.on_success()
+            latency = permit.first_token_latency
+            self.concurrency.on_success(latency if latency is not None else time.monotonic() - permit.started)
+            if permit.tokens_used is not None:
+                # True up the tokens/min bucket with actual usage
+                self.tokens.take(permit.tokens_used - permit.reserved_tokens)
+        finally:
+            if permit.probe:
+                # A probe that neither succeeded nor failed, e.g. cancelled, must not block later probes
+                self.breaker.probing = False
+            self.in_flight -= 1
+            self._dispatch()
+
+    def reserve_attempt(self, tokens: int, optional: bool = True) -> bool:
+        """
+        Charge one more upstream request made under a granted permit, e.g. a hedge or a failover.
+        
+        The tokens are kept rather than trued up, since an attempt that loses
+        is cancelled after the provider has already read the prompt.
+        
+        Args:
+            tokens: Tokens the extra request is expected to use.
+            optional: Only charge the request if the request and token buckets cover it now;
+                required requests are charged even if that drives the buckets negative.
+        
+        Returns:
+            Whether the request may be sent.
+        """
+        if optional and max(self.requests.wait_time(1), self.tokens.wait_time(tokens)) > 0:
+            self.hedges_skipped += 1
+            return False
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return admission queue, limit and rejection metrics.
+        """
+        admitted = self.admitted or 1
+        return {
+            "in_flight": self.in_flight,
+            "queued": self._waiters.qsize(),
+            "concurrency_limit": self.concurrency.current,
+            "admitted": self.admitted,
+            "avg_queue_wait_ms": round(self.total_wait_seconds / admitted * 1000, 3),
+            "max_queue_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            "rejected": dict(self.rejected),
+            "upstream_rate_limited": self.upstream_rate_limited,
+            "upstream_errors": self.upstream_errors,
+            "hedges_skipped": self.hedges_skipped,
+            "circuit_state": self.breaker.state,
+            "requests_available": round(self.requests.level, 2),
+            "tokens_available": round(self.tokens.level, 2),
+        }
+
+    def _withdraw(self, user_id: Hashable, waiter: asyncio.Future, permit: Permit):
+        """
+        Take a cancelled call out of line, handing back its slot if it was already granted.
+        """
+        if not waiter.done():
+            self._waiters.remove(user_id, (waiter, permit))
+            waiter.cancel()
+            return
+        if waiter.cancelled() or waiter.exception() is not None:
+            return
+        self.in_flight -= 1
+        self.requests.take(-1)
+        self.tokens.take(-permit.reserved_tokens)
+        if permit.probe:
+            self.breaker.probing = False
+        self._dispatch()
+
+    def _reject(self, reason: str, detail: str):
+        self.rejected[reason] += 1
+        status_code = 503 if reason == "circuit_open" else 429
+        raise HTTPException(status_code=status_code, detail=detail, headers={"Retry-After": "1"})
+
+    def _dispatch(self):
+        """
+        Release queued calls round-robin while concurrency, rate and breaker limits allow.
+        """
+        while self._waiters and self.in_flight < self.concurrency.current:
+            state = self.breaker.state
+            if state == "open":
+                # Fail everything queued while the breaker is open
+                while self._waiters:
+                    _, (waiter, _) = self._waiters.get_nowait()
+                    if not waiter.done():
+                        self.rejected["circuit_open"] += 1
+                        waiter.set_exception(HTTPException(status_code=503, detail="AI provider is unavailable, please retry later"))
+                return
+            if state == "half_open" and self.breaker.probing:
+                # Wait for the probe call to close or reopen the breaker
+                return
+            user_id, (waiter, permit) = self._waiters.get_nowait()
+            if waiter.done():
+                continue
+            delay = max(self.requests.wait_time(1), self.tokens.wait_time(permit.reserved_tokens))
+            if delay > 0:
+                # Keep the call first in line and retry once the buckets refill
+                self._waiters.put_front(user_id, (waiter, permit))
+                self._schedule(delay)
+                return
+            if state == "half_open":
+                self.breaker.probing = True
+                permit.probe = True
+            self.requests.take(1)
+            self.tokens.take(permit.reserved_tokens)
+            self.in_flight += 1
+            self.admitted += 1
+            waiter.set_result(None)
+
+    def _schedule(self, delay: float):
+        if self._timer is not None and not self._timer.cancelled():
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+def create_admission_controller() -> AdmissionController:
+    """
+    Build the admission controller from the application settings.
+    
+    The rate limits are budgets of the whole deployment, so each worker
+    process admits its even share of them.
+    """
+    workers = settings.worker_processes
+    return AdmissionController(
+        requests_per_minute=max(1, settings.AI_RATE_REQUESTS_PER_MINUTE // workers),
+        tokens_per_minute=max(1, settings.AI_RATE_TOKENS_PER_MINUTE // workers),
+        concurrency=AdaptiveConcurrency(
+            settings.AI_CONCURRENCY_INITIAL,
+            settings.AI_CONCURRENCY_MIN,
+            settings.AI_CONCURRENCY_MAX,
+            settings.AI_LATENCY_TARGET_SECONDS,
+        ),
+        breaker=CircuitBreaker(settings.AI_BREAKER_FAILURE_THRESHOLD, settings.AI_BREAKER_COOLDOWN_SECONDS),
+        max_wait=settings.AI_ADMISSION_MAX_WAIT_SECONDS,
+        max_queued_per_user=settings.AI_ADMISSION_MAX_QUEUED_PER_USER,
+    )
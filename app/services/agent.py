@@ -0,0 +1,139 @@
+from sqlalchemy import literal, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.core.config import settings
+from app.utils.metrics import registry
+from fastapi import HTTPException
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+# Rendered inline so generic plans of prepared statements can still use the partial queue index
+OPEN = literal("open", literal_execute=True)
+
+CLAIMS = registry.counter(
+    "agent_queue_claims_total", "Agent claim attempts by outcome (claimed, reclaimed, empty)", ("outcome",)
+)
+
+class AgentQueueService:
+    """
+    Service class handing open tickets to support agents under expiring leases.
+    
+    A claim is one UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED)
+    RETURNING statement: concurrent agents skip rows another claim has locked
+    instead of waiting on them, so each claim costs one short index probe no
+    matter how many agents are pulling work. Claims lapse after
+    AGENT_LEASE_SECONDS unless renewed by a heartbeat, and lapsed claims are
+    handed out again before unclaimed tickets. The UPDATE also re-checks that
+    the ticket is still claimable, which alone prevents double assignment on
+    databases without row locks such as SQLite, where writes are serialized.
+    """
+    def __init__(self, lease_seconds: Optional[int] = None):
+        """
+        Initialize the service with the lease length from settings.
+        """
+        self.lease = timedelta(seconds=lease_seconds or settings.AGENT_LEASE_SECONDS)
+
+    async def claim(self, agent: User, db: AsyncSession) -> Optional[Ticket]:
+        """
+        Claim the open ticket waiting longest, preferring tickets whose previous claim lapsed.
+        
+        Args:
+            agent: Authenticated agent.
+            db: Async database session.
+        
+        Returns:
+            The claimed ticket, or None if no ticket is waiting.
+        """
+        now = datetime.utcnow()
+        lapsed = (
+            select(Ticket.id)
+            .filter(Ticket.status == OPEN, Ticket.assigned_to.is_not(None), Ticket.lease_expires_at < now)
+            .order_by(Ticket.lease_expires_at)
+        )
+        unassigned = (
+            select(Ticket.id)
+            .filter(Ticket.status == OPEN, Ticket.assigned_to.is_(None))
+            .order_by(Ticket.created_at, Ticket.id)
+        )
+        for candidates, outcome in ((lapsed, "reclaimed"), (unassigned, "claimed")):
+            ticket = await self._take(db, candidates, agent.id, now)
+            if ticket is not None:
+                CLAIMS.inc(outcome=outcome)
+                return ticket
+        CLAIMS.inc(outcome="empty")
+        return None
+
+    async def heartbeat(self, ticket_id: UUID, agent: User, db: AsyncSession) -> Ticket:
+        """
+        Extend the agent's lease on a claimed ticket.
+        
+        Args:
+            ticket_id: UUID of the claimed ticket.
+            agent: Authenticated agent.
+            db: Async database session.
+        
+        Returns:
+            The ticket with its renewed lease.
+        
+        Raises:
+            HTTPException: 409 if the agent no longer holds the claim.
+        """
+        return await self._update_claim(ticket_id, agent, db, lease_expires_at=datetime.utcnow() + self.lease)
+
+    async def release(self, ticket_id: UUID, agent: User, db: AsyncSession) -> Ticket:
+        """
+        Give a claimed ticket back to the queue.
+        
+        Args:
+            ticket_id: UUID of the claimed ticket.
+            agent: Authenticated agent.
+            db: Async database session.
+        
+        Returns:
+            The released ticket.
+        
+        Raises:
+            HTTPException: 409 if the agent no longer holds the claim.
+        """
+        return await self._update_claim(ticket_id, agent, db, assigned_to=None, lease_expires_at=None)
+
+    async def _take(self, db: AsyncSession, candidates: Select, agent_id: UUID, now: datetime) -> Optional[Ticket]:
+        """
+        Assign the first unlocked candidate ticket to an agent and commit.
+        """
+        candidate = candidates.limit(1).with_for_update(skip_locked=True).scalar_subquery()
+        result = await db.scalars(
+            update(Ticket)
+            .where(
+                Ticket.id == candidate,
+                Ticket.status == "open",
+                or_(Ticket.assigned_to.is_(None), Ticket.lease_expires_at < now),
+            )
+            .values(assigned_to=agent_id, lease_expires_at=now + self.lease)
+            .returning(Ticket)
+            .execution_options(populate_existing=True)
+        )
+        ticket = result.first()
+        await db.commit()
+        return ticket
+
+    async def _update_claim(self, ticket_id: UUID, agent: User, db: AsyncSession, **values) -> Ticket:
+        """
+        Update a ticket's claim if the agent still holds it, and commit.
+        """
+        result = await db.scalars(
+            update(Ticket)
+            .where(Ticket.id == ticket_id, Ticket.assigned_to == agent.id, Ticket.status == "open")
+            .values(**values)
+            .returning(Ticket)
+            .execution_options(populate_existing=True)
+        )
+        ticket = result.first()
+        await db.commit()
+        if ticket is None:
+            raise HTTPException(status_code=409, detail="Ticket is not claimed by you")
+        return ticket
@@ -1,75 +1,487 @@
-from groq import AsyncGroq
 from fastapi import HTTPException
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.ticket import Ticket
 from app.models.message import Message
+from app.models.job import GenerationJob
 from app.core.config import settings
+from app.services.admission import create_admission_controller
+from app.services.broker import TERMINAL_EVENTS, StreamBroker, StreamEvent
+from app.services.context import ContextBuilder, estimate_tokens
+from app.services.jobs import JobQueue
+from app.services.llm import LLMRouter, create_llm_router
+from app.services.similarity import SimilarTicketService
+from app.services.stats import StatsService
+from app.utils.cache import LRUCache
+from app.utils.database import async_session
+from app.utils.instrumentation import record_llm_stream
+from app.utils.singleflight import Flight
+from app.utils.sse import HEARTBEAT, format_sse, with_heartbeats
+from contextlib import aclosing
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+import asyncio
+import hashlib
 import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def prompt_hash(messages: List[Dict[str, str]], model: str) -> str:
+    """
+    Compute a stable hash of a chat prompt, used as the response cache key.
+    
+    Args:
+        messages: Chat messages sent to the LLM.
+        model: Model name the prompt is sent to.
+    
+    Returns:
+        Hex digest identifying the prompt.
+    """
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
 
 class AIService:
     """
-    Service class for generating AI responses using the Groq API.
+    Service class for generating AI responses using the configured LLM providers.
+    
+    Generations run as background jobs on a worker pool, so they are not tied
+    to the HTTP request that asked for them. Concurrent requests for the same
+    ticket state share one job, and finished responses are cached by prompt
+    hash so repeats replay without calling the LLM. Calls that do reach it go
+    through an admission controller that rate limits, schedules users fairly
+    and fails fast while the providers are unhealthy, then through a router
+    that hedges slow requests and fails over between providers.
     """
     def __init__(self):
         """
-        Initialize the Groq client with the API key from settings.
+        Initialize the admission controller and the generation job queue. The
+        LLM router over the providers selected in settings is created on first use.
+        """
+        self._router: Optional[LLMRouter] = None
+        self.admission = create_admission_controller()
+        self.context_builder = ContextBuilder()
+        self.stats = StatsService()
+        self.similar = SimilarTicketService()
+        self.response_cache = LRUCache(settings.AI_RESPONSE_CACHE_SIZE, settings.AI_RESPONSE_CACHE_TTL_SECONDS)
+        self.jobs = JobQueue(
+            self._produce,
+            workers=settings.AI_JOB_WORKERS,
+            max_queued=settings.AI_JOB_MAX_QUEUED,
+            retain=settings.AI_JOB_RETAIN,
+            retain_seconds=settings.AI_JOB_RETAIN_SECONDS,
+            abandon_seconds=settings.AI_JOB_ABANDON_SECONDS,
+            stale_seconds=settings.AI_JOB_STALE_SECONDS,
+            sweep_seconds=settings.AI_JOB_SWEEP_SECONDS,
+        )
+        self.broker = StreamBroker(settings.AI_STREAM_BUFFER_EVENTS, settings.AI_STREAM_MAX_CHANNELS)
+
+    @property
+    def router(self) -> LLMRouter:
+        """
+        LLM router, created on first access so importing the service stays cheap.
+        """
+        if self._router is None:
+            self._router = create_llm_router()
+        return self._router
+
+    @router.setter
+    def router(self, router: LLMRouter):
+        self._router = router
+
+    async def submit_job(self, ticket_id: UUID, db: AsyncSession) -> UUID:
+        """
+        Queue a background generation for a ticket's current state.
+        
+        Submissions for the same (ticket, latest customer message) share the job
+        already queued or running instead of starting another one.
+        
+        Args:
+            ticket_id: UUID of the ticket.
+            db: Async database session.
+        
+        Returns:
+            UUID of the generation job.
+        
+        Raises:
+            HTTPException: If the ticket is not found or the queue is full.
+        """
+        result = await db.execute(select(Ticket.user_id).filter(Ticket.id == ticket_id))
+        owner = result.first()
+        if owner is None:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+
+        version = await self._history_version(ticket_id, db)
+        return await self.jobs.submit(ticket_id, (ticket_id, version), db, tenant=owner.user_id)
+
+    async def get_job(self, job_id: UUID, ticket_id: UUID, db: AsyncSession) -> GenerationJob:
+        """
+        Retrieve a generation job of a ticket.
+        
+        Args:
+            job_id: UUID of the job.
+            ticket_id: UUID of the ticket the job must belong to.
+            db: Async database session.
+        
+        Returns:
+            GenerationJob object.
+        
+        Raises:
+            HTTPException: If the job is not found for the ticket.
+        """
+        result = await db.execute(
+            select(GenerationJob).filter(GenerationJob.id == job_id, GenerationJob.ticket_id == ticket_id)
+        )
+        job = result.scalars().first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    async def stream_job(self, job_id: UUID, db: AsyncSession, last_event_id: Optional[int] = None):
         """
-        self.client = AsyncGroq(api_key=settings.GROQ_API_KEY)
+        Stream a job's response as SSE frames from its first event, following it live while it runs.
+        
+        Args:
+            job_id: UUID of the job.
+            db: Async database session.
+            last_event_id: Last event ID the client received; earlier events are skipped.
+        
+        Yields:
+            SSE frames of the AI response, with heartbeats while idle.
+        """
+        async for item in with_heartbeats(self.jobs.attach(job_id, db), settings.AI_STREAM_HEARTBEAT_SECONDS):
+            if item is None:
+                yield HEARTBEAT
+            elif isinstance(item, StreamEvent):
+                if last_event_id is None or item.id > last_event_id:
+                    yield format_sse(item.data, item.event, item.id)
+            else:
+                # Stream no longer in memory: replay the persisted response in one event
+                yield format_sse({"content": item})
+                yield format_sse({"job_id": str(job_id)}, "done")
 
-    async def generate_response(self, ticket_id: str, db: AsyncSession):
+    async def generate_response(self, ticket_id: UUID, db: AsyncSession, last_event_id: Optional[int] = None):
         """
-        Generate a streaming AI response for a ticket based on its description and message history.
+        Generate a streaming AI response for a ticket based on its description and a
+        token-budgeted view of its message history.
+        
+        A reconnect carrying a Last-Event-ID still held in the ticket's replay
+        buffer resumes that generation with only the missed events, without
+        submitting a new job.
         
         Args:
             ticket_id: UUID of the ticket.
             db: Async database session.
+            last_event_id: Last event ID the client received, from the Last-Event-ID header.
         
         Yields:
-            JSON-encoded chunks of the AI response.
+            SSE frames of the AI response.
         
         Raises:
             HTTPException: If the ticket is not found.
         """
-        # Retrieve ticket
-        result = await db.execute(select(Ticket).filter(Ticket.id == ticket_id))
-        ticket = result.scalars().first()
-        if not ticket:
-            raise HTTPException(status_code=404, detail="Ticket not found")
+        channel = self.broker.channel(ticket_id)
+        resumed = channel.get(last_event_id) if last_event_id is not None else None
+        if resumed is not None and resumed.job_id is not None:
+            if resumed.event in TERMINAL_EVENTS:
+                return
+            if self.jobs.has_output(resumed.job_id):
+                # Reattach to the job itself so it knows a client is still listening
+                events = self.stream_job(resumed.job_id, db, last_event_id)
+            else:
+                events = self._frames(channel.subscribe(last_event_id, job_id=resumed.job_id))
+            async for frame in events:
+                yield frame
+            return
+
+        job_id = await self.submit_job(ticket_id, db)
+        async for frame in self.stream_job(job_id, db):
+            yield frame
 
-        # Retrieve message history
-        result = await db.execute(select(Message).filter(Message.ticket_id == ticket_id))
-        messages = result.scalars().all()
-        message_history = "\n".join([f"{'AI' if msg.is_ai else 'User'}: {msg.content}" for msg in messages])
-        latest_message = messages[-1].content if messages else ""
-
-        # Construct prompt for AI
-        prompt = f"""
-        You are a helpful customer support assistant.
-        The customer has the following issue: {ticket.description}
-
-        Previous messages:
-        {message_history}
-
-        Customer's latest message: {latest_message}
-
-        Provide a helpful response that addresses their concern:
-        """
-
-        # Accumulate response content for persistence
-        full_content = ""
-        async for chunk in self.client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama3-8b-8192",
-            stream=True
-        ):
-            content = chunk.choices[0].delta.content or ""
-            if content:
-                full_content += content
-                yield json.dumps({"content": content})
-
-        # Save AI response to database
-        if full_content:
-            ai_message = Message(content=full_content, is_ai=True, ticket_id=ticket.id)
-            db.add(ai_message)
-            await db.commit()
\ No newline at end of file
+    async def watch(self, ticket_id: UUID, last_event_id: Optional[int] = None):
+        """
+        Follow every generation on a ticket live, e.g. for an agent watching a customer's chat.
+        
+        Never starts a generation itself; events are fanned out from the ones in flight.
+        
+        Args:
+            ticket_id: UUID of the ticket.
+            last_event_id: Last event ID the client received; buffered later events are replayed.
+        
+        Yields:
+            SSE frames of the ticket's stream, with heartbeats while idle.
+        """
+        channel = self.broker.channel(ticket_id)
+        after_id = channel.last_id
+        if last_event_id is not None and channel.get(last_event_id) is not None:
+            after_id = last_event_id
+        async for frame in self._frames(channel.subscribe(after_id)):
+            yield frame
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Return response cache, generation job, admission and LLM routing counters.
+        
+        Returns:
+            Dictionary of cache hit/miss/eviction counters, job queue counters, admission and routing metrics.
+        """
+        stats = self.response_cache.stats()
+        stats.update(
+            jobs=self.jobs.stats(),
+            streams=self.broker.stats(),
+            admission=self.admission.stats(),
+            similar=self.similar.stats(),
+            routing=self._router.stats() if self._router is not None else None,
+        )
+        return stats
+
+    async def _frames(self, events):
+        """
+        Format stream events as SSE frames, adding heartbeats while idle.
+        """
+        async for item in with_heartbeats(events, settings.AI_STREAM_HEARTBEAT_SECONDS):
+            yield HEARTBEAT if item is None else format_sse(item.data, item.event, item.id)
+
+    async def _emit(self, ticket_id: UUID, job_id: UUID, flight: Flight, event: str, data: Dict[str, Any]):
+        """
+        Publish a job event to the ticket's live channel and to the job's own stream.
+        """
+        item = await self.broker.publish(ticket_id, event, data, job_id)
+        await flight.publish(item)
+
+    async def _history_version(self, ticket_id: UUID, db: AsyncSession) -> Optional[UUID]:
+        """
+        Identify the ticket state a response is generated for: its latest customer message.
+        
+        Args:
+            ticket_id: UUID of the ticket.
+            db: Async database session.
+        
+        Returns:
+            UUID of the latest non-AI message, or None if there is none.
+        """
+        result = await db.execute(
+            select(Message.id)
+            .filter(Message.ticket_id == ticket_id, Message.is_ai.is_not(True))
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(1)
+        )
+        return result.scalar()
+
+    async def _produce(self, job_id: UUID, ticket_id: UUID, flight: Flight) -> Optional[UUID]:
+        """
+        Produce the response for a job, from cache or from the LLM, and persist it.
+        
+        Runs on a job worker with its own database session so it is not tied to
+        the lifetime of the request that started it.
+        
+        Args:
+            job_id: UUID of the job.
+            ticket_id: UUID of the ticket.
+            flight: Flight to publish response events to.
+        
+        Returns:
+            UUID of the persisted AI message, or None if nothing was persisted.
+        """
+        await self._emit(ticket_id, job_id, flight, "start", {"job_id": str(job_id)})
+        try:
+            message_id = await self._generate(job_id, ticket_id, flight)
+        except asyncio.CancelledError:
+            await self._emit(ticket_id, job_id, flight, "aborted", {"job_id": str(job_id)})
+            raise
+        except Exception as exc:
+            await self._emit(ticket_id, job_id, flight, "error", {"job_id": str(job_id), "detail": str(exc)[:200]})
+            raise
+        await self._emit(
+            ticket_id, job_id, flight, "done",
+            {"job_id": str(job_id), "message_id": str(message_id) if message_id else None},
+        )
+        return message_id
+
+    async def _generate(self, job_id: UUID, ticket_id: UUID, flight: Flight) -> Optional[UUID]:
+        """
+        Generate the response text, from cache or from the LLM, publishing each chunk, and persist it.
+        
+        The partial response is checkpointed while it streams, so it survives a
+        cancelled job or an upstream failure as an aborted message that the next
+        generation for the same turn overwrites.
+        """
+        async with async_session() as db:
+            ticket = await db.get(Ticket, ticket_id)
+            messages = await self.context_builder.build_messages(ticket, db)
+            target = await self._unfinished_response(ticket_id, db)
+
+            # Answers to the latest customer message are what is being (re)generated
+            answered = False
+            while len(messages) > 1 and messages[-1]["role"] == "assistant":
+                messages.pop()
+                answered = True
+            # A partial answer is regenerated in place; a complete one is not saved again
+            persist = target is not None or not answered
+            reused = self._ground_in_similar(ticket, messages)
+            # Persist any rolling-summary update now, so no transaction or pooled
+            # connection is held open while the response streams
+            await db.commit()
+
+            prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+            model = self.router.choose_model(prompt_tokens)
+            key = prompt_hash(messages, model)
+            # A near-identical resolved ticket's answer replays like a cached response
+            cached = (reused,) if reused is not None else self.response_cache.get(key)
+            if cached is not None:
+                for content in cached:
+                    await self._emit(ticket_id, job_id, flight, "message", {"content": content})
+                chunks = list(cached)
+            else:
+                # Chunks are joined only at checkpoints, never concatenated one by one
+                chunks = []
+                streamed_chars = checkpointed_chars = 0
+                checkpointed_at = time.monotonic()
+                estimate = prompt_tokens + settings.AI_EXPECTED_COMPLETION_TOKENS
+                try:
+                    async with self.admission.admit(ticket.user_id, estimate) as permit:
+                        completion_tokens = 0
+                        try:
+                            # Closing the stream on exit stops the upstream calls when the job is cancelled
+                            # Hedges and failovers are charged to the same rate limits as the call
+                            reserve = partial(self.admission.reserve_attempt, prompt_tokens)
+                            async with aclosing(self.router.stream(messages, model, reserve)) as stream:
+                                async for content in stream:
+                                    permit.first_token()
+                                    chunks.append(content)
+                                    streamed_chars += len(content)
+                                    await self._emit(ticket_id, job_id, flight, "message", {"content": content})
+                                    if persist and (
+                                        streamed_chars - checkpointed_chars >= settings.AI_CHECKPOINT_CHARS
+                                        or time.monotonic() - checkpointed_at >= settings.AI_CHECKPOINT_SECONDS
+                                    ):
+                                        target = await self._checkpoint(db, ticket, target, chunks, "streaming")
+                                        checkpointed_chars = streamed_chars
+                                        checkpointed_at = time.monotonic()
+                        finally:
+                            # Providers do not report usage per chunk, so tokens are estimated from the text
+                            completion_tokens = estimate_tokens("".join(chunks)) if chunks else 0
+                            record_llm_stream(
+                                model,
+                                permit.first_token_latency,
+                                time.monotonic() - permit.started,
+                                completion_tokens,
+                                len(chunks),
+                            )
+                        permit.tokens_used = prompt_tokens + completion_tokens
+                except BaseException:
+                    if persist and chunks:
+                        await self._abort(db, ticket, target, chunks)
+                    raise
+                if chunks:
+                    self.response_cache.set(key, tuple(chunks))
+
+            # Save AI response to database unless this turn was already answered
+            if chunks and persist:
+                target = await self._checkpoint(db, ticket, target, chunks, "complete")
+            return target.id if chunks and persist else None
+
+    async def _unfinished_response(self, ticket_id: UUID, db: AsyncSession) -> Optional[Message]:
+        """
+        Return the ticket's latest message if it is a streaming or aborted AI response.
+        """
+        result = await db.execute(
+            select(Message)
+            .filter(Message.ticket_id == ticket_id)
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(1)
+        )
+        latest = result.scalars().first()
+        if latest is not None and latest.is_ai and latest.status != "complete":
+            return latest
+        return None
+
+    def _ground_in_similar(self, ticket: Ticket, messages: List[Dict[str, str]]) -> Optional[str]:
+        """
+        Add answers of similar resolved tickets to the system prompt.
+        
+        Only the customer's own resolved tickets are searched unless
+        SIMILAR_CROSS_TENANT is enabled, in which case other customers' answers
+        may be quoted into the prompt. A first response whose closest match
+        reaches SIMILAR_ANSWER_THRESHOLD and belongs to the same customer reuses
+        that ticket's answer instead of calling the LLM; follow-ups always go to
+        the LLM, since the stored answer did not settle them.
+        
+        Args:
+            ticket: Ticket being answered.
+            messages: Chat messages for the LLM; the system prompt is extended in place.
+        
+        Returns:
+            The answer to reuse verbatim, or None to generate one.
+        """
+        question = next((message["content"] for message in reversed(messages) if message["role"] == "user"), "")
+        matches = self.similar.search(
+            f"{ticket.title}\n{ticket.description}\n{question}",
+            exclude=ticket.id,
+            user_id=None if settings.SIMILAR_CROSS_TENANT else ticket.user_id,
+        )
+        if not matches:
+            return None
+        first_response = not any(message["role"] == "assistant" for message in messages)
+        best = matches[0]
+        if first_response and best.user_id == ticket.user_id and best.score >= settings.SIMILAR_ANSWER_THRESHOLD:
+            self.similar.reused += 1
+            return best.answer
+        self.similar.injected += 1
+        messages[0]["content"] += self.similar.format_context(matches)
+        return None
+
+    async def _checkpoint(
+        self, db: AsyncSession, ticket: Ticket, message: Optional[Message], chunks: List[str], status: str
+    ) -> Message:
+        """
+        Write the response streamed so far to its AI message, creating the message on first write.
+        
+        The message keeps its creation time, and so its place in the
+        conversation; each rewrite stamps updated_at instead, so incremental
+        exports pick up its final content.
+        
+        Args:
+            db: Async database session of the generation.
+            ticket: Ticket being answered.
+            message: AI message being written, or None before the first checkpoint.
+            chunks: Response chunks streamed so far; collapsed in place into one string.
+            status: Completion state to record (streaming, complete or aborted).
+        
+        Returns:
+            The AI message.
+        """
+        content = "".join(chunks)
+        chunks[:] = [content]
+        if message is None:
+            message = Message(content=content, is_ai=True, ticket_id=ticket.id, status=status)
+            db.add(message)
+            await self.stats.record_messages(db, ticket.user_id, ai=1)
+        else:
+            message.content = content
+            message.status = status
+            message.updated_at = datetime.utcnow()
+        await db.commit()
+        return message
+
+    async def _abort(self, db: AsyncSession, ticket: Ticket, message: Optional[Message], chunks: List[str]):
+        """
+        Keep the partial response of an interrupted generation as an aborted message.
+        
+        The interruption may have hit a checkpoint's commit, so the session is
+        rolled back first and the message looked up again in case its first
+        write never landed.
+        """
+        ticket_id = ticket.id
+        try:
+            await db.rollback()
+            await db.refresh(ticket)
+            if message is not None and not inspect(message).persistent:
+                message = await db.get(Message, message.id)
+            await self._checkpoint(db, ticket, message, chunks, "aborted")
+        except Exception:
+            logger.exception("Could not save partial AI response for ticket %s", ticket_id)
@@ -1,8 +1,10 @@
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.utils.security import hash_password, verify_password, create_access_token
+from app.utils.security import password_hasher, create_access_token
 from fastapi import HTTPException, status
 
 class AuthService:
@@ -13,6 +15,9 @@ class AuthService:
         """
         Register a new user with hashed password.
         
+        The email's uniqueness is enforced by the unique index on users.email
+        rather than a prior SELECT, so a registration is one INSERT ... RETURNING.
+        
         Args:
             user_data: User creation data (email, password).
             db: Async database session.
@@ -23,15 +28,18 @@ class AuthService:
         Raises:
             HTTPException: If email is already registered.
         """
-        result = await db.execute(select(User).filter(User.email == user_data.email))
-        if result.scalars().first():
+        hashed_password = await password_hasher.hash(user_data.password)
+        try:
+            result = await db.scalars(
+                insert(User)
+                .values(email=user_data.email, hashed_password=hashed_password, role="user")
+                .returning(User)
+            )
+            user = result.one()
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
             raise HTTPException(status_code=400, detail="Email already registered")
-        
-        hashed_password = hash_password(user_data.password)
-        user = User(email=user_data.email, hashed_password=hashed_password, role="user")
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
         return user
 
     async def login(self, email: str, password: str, db: AsyncSession):
@@ -51,8 +59,20 @@ class AuthService:
         """
         result = await db.execute(select(User).filter(User.email == email))
         user = result.scalars().first()
-        if not user or not verify_password(password, user.hashed_password):
+        if not user or not await password_hasher.verify(password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
+        return self.issue_token(user)
+
+    def issue_token(self, user: User):
+        """
+        Generate a JWT token for an already authenticated user.
+        
+        Args:
+            user: Authenticated user.
+        
+        Returns:
+            Dictionary containing JWT token and token type.
+        """
         access_token = create_access_token(data={"sub": str(user.id), "role": user.role})
         return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
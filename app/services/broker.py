@@ -0,0 +1,146 @@
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from uuid import UUID
+import asyncio
+import time
+
+# Events that end a generation on a ticket stream
+TERMINAL_EVENTS = ("done", "error", "aborted")
+
+@dataclass(frozen=True)
+class StreamEvent:
+    """
+    One event on a ticket's live stream.
+    """
+    id: int  # Monotonically increasing event ID, unique within the ticket stream
+    event: str  # Event type: start, message, done, error or aborted
+    data: Dict[str, Any] = field(default_factory=dict)  # JSON payload
+    job_id: Optional[UUID] = None  # Generation job the event belongs to
+
+class TicketChannel:
+    """
+    Live event stream of one ticket with a bounded replay buffer.
+    
+    Recent events stay in a ring buffer, so a subscriber reconnecting with
+    Last-Event-ID receives only the events it missed. IDs start from the
+    current time in microseconds, so they keep increasing across restarts.
+    """
+    def __init__(self, buffer_size: int):
+        self.events: Deque[StreamEvent] = deque(maxlen=buffer_size)
+        self.last_id = time.time_ns() // 1000
+        self.subscribers = 0
+        self._changed = asyncio.Condition()
+
+    async def publish(self, event: str, data: Dict[str, Any], job_id: Optional[UUID] = None) -> StreamEvent:
+        """
+        Append an event to the stream and wake every subscriber.
+        
+        Returns:
+            The published event with its assigned ID.
+        """
+        async with self._changed:
+            self.last_id += 1
+            item = StreamEvent(self.last_id, event, data, job_id)
+            self.events.append(item)
+            self._changed.notify_all()
+        return item
+
+    def get(self, event_id: int) -> Optional[StreamEvent]:
+        """
+        Return a buffered event by ID, or None if it is unknown or evicted.
+        """
+        if not self.events or event_id < self.events[0].id:
+            return None
+        for item in reversed(self.events):
+            if item.id == event_id:
+                return item
+            if item.id < event_id:
+                break
+        return None
+
+    async def subscribe(self, after_id: int, job_id: Optional[UUID] = None) -> AsyncIterator[StreamEvent]:
+        """
+        Yield buffered events after an ID, then live events as they are published.
+        
+        Args:
+            after_id: Last event ID the subscriber has already seen.
+            job_id: If given, only yield that job's events and stop at its terminal event.
+        
+        Yields:
+            Stream events in ID order.
+        """
+        position = after_id
+        self.subscribers += 1
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self.last_id > position)
+                    pending = [item for item in self.events if item.id > position]
+                    position = self.last_id
+                for item in pending:
+                    if job_id is not None and item.job_id != job_id:
+                        continue
+                    yield item
+                    if job_id is not None and item.event in TERMINAL_EVENTS:
+                        return
+        finally:
+            self.subscribers -= 1
+
+class StreamBroker:
+    """
+    In-process pub/sub broker holding one live channel per ticket.
+    
+    Any number of subscribers (e.g. the customer and an agent) can follow a
+    ticket's generation from a single upstream call. Idle channels beyond
+    max_channels are dropped, least recently used first.
+    """
+    def __init__(self, buffer_size: int, max_channels: int):
+        self.buffer_size = buffer_size
+        self.max_channels = max_channels
+        self._channels: "OrderedDict[UUID, TicketChannel]" = OrderedDict()
+
+    def channel(self, ticket_id: UUID) -> TicketChannel:
+        """
+        Return the channel of a ticket, creating it if needed.
+        """
+        channel = self._channels.get(ticket_id)
+        if channel is None:
+            channel = TicketChannel(self.buffer_size)
+            self._channels[ticket_id] = channel
+            self._evict()
+        self._channels.move_to_end(ticket_id)
+        return channel
+
+    def find(self, ticket_id: UUID) -> Optional[TicketChannel]:
+        """
+        Return the channel of a ticket if it exists, without creating it.
+        """
+        return self._channels.get(ticket_id)
+
+    async def publish(self, ticket_id: UUID, event: str, data: Dict[str, Any], job_id: Optional[UUID] = None) -> StreamEvent:
+        """
+        Publish an event on a ticket's channel.
+        """
+        return await self.channel(ticket_id).publish(event, data, job_id)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return channel and subscriber counts.
+        """
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(channel.subscribers for channel in self._channels.values()),
+        }
+
+    def _evict(self):
+        """
+        Drop least recently used channels without subscribers beyond max_channels.
+        """
+        excess = len(self._channels) - self.max_channels
+        for ticket_id in list(self._channels):
+            if excess <= 0:
+                break
+            if self._channels[ticket_id].subscribers == 0:
+                del self._channels[ticket_id]
+                excess -= 1
@@ -0,0 +1,147 @@
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.ticket import Ticket
+from app.models.message import Message
+from app.models.conversation import ConversationSummary
+from app.core.config import settings
+from typing import Dict, List, Optional
+
+SYSTEM_PROMPT = "You are a helpful customer support assistant."
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheaply estimate the number of LLM tokens in a piece of text.
+    
+    Uses the common ~4 characters per token heuristic plus a small per-message
+    overhead, which is accurate enough for budgeting without a tokenizer.
+    
+    Args:
+        text: Text to measure.
+    
+    Returns:
+        Estimated token count.
+    """
+    return len(text) // 4 + 4
+
+def summarize_turn(message: Message, max_chars: int) -> str:
+    """
+    Condense a single message into one summary line.
+    
+    Args:
+        message: Message being folded into the summary.
+        max_chars: Maximum characters of content to keep.
+    
+    Returns:
+        Single-line summary of the message.
+    """
+    content = " ".join(message.content.split())
+    if len(content) > max_chars:
+        content = content[:max_chars].rstrip() + "..."
+    return f"{'AI' if message.is_ai else 'User'}: {content}"
+
+class ContextBuilder:
+    """
+    Builds the chat context sent to the LLM for a ticket within a token budget.
+    
+    Recent turns are kept verbatim, always including the newest customer
+    message. Turns that fall out of the recent window are folded, once, into
+    a per-ticket rolling summary whose watermark records the last folded
+    message, so each call only reads messages newer than the watermark and
+    the prompt size stays roughly constant as a thread grows.
+    """
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        recent_turns: Optional[int] = None,
+        summary_token_budget: Optional[int] = None,
+        summary_line_chars: Optional[int] = None,
+    ):
+        """
+        Initialize the builder, defaulting limits to the application settings.
+        """
+        self.token_budget = settings.AI_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+        self.recent_turns = settings.AI_CONTEXT_RECENT_TURNS if recent_turns is None else recent_turns
+        self.summary_token_budget = (
+            settings.AI_SUMMARY_TOKEN_BUDGET if summary_token_budget is None else summary_token_budget
+        )
+        self.summary_line_chars = settings.AI_SUMMARY_LINE_CHARS if summary_line_chars is None else summary_line_chars
+
+    async def build_messages(self, ticket: Ticket, db: AsyncSession) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for a ticket, updating its rolling summary if needed.
+        
+        The summary row is added to the session but not committed; the caller
+        commits it before generating the response.
+        
+        Args:
+            ticket: Ticket the response is generated for.
+            db: Async database session.
+        
+        Returns:
+            List of chat messages (role/content dicts) for the completion API.
+        """
+        summary = await db.get(ConversationSummary, ticket.id)
+        if summary is None:
+            summary = ConversationSummary(ticket_id=ticket.id, summary="", summarized_count=0)
+            db.add(summary)
+
+        # Only messages newer than the summary watermark still need to be read
+        stmt = select(Message).filter(Message.ticket_id == ticket.id)
+        if summary.last_message_id is not None:
+            stmt = stmt.filter(
+                tuple_(Message.created_at, Message.id)
+                > tuple_(summary.last_message_created_at, summary.last_message_id)
+            )
+        result = await db.execute(stmt.order_by(Message.created_at, Message.id))
+        recent = list(result.scalars().all())
+
+        system_prompt = self._system_prompt(ticket, summary.summary)
+        verbatim = sum(estimate_tokens(msg.content) for msg in recent)
+
+        # Fold the oldest turns into the summary until the rest fits verbatim next to the summary
+        # they grow, but never the newest customer message: the LLM must see the question itself,
+        # even over budget
+        foldable = max((index for index, msg in enumerate(recent) if not msg.is_ai), default=len(recent))
+        while foldable and (
+            len(recent) > self.recent_turns
+            or estimate_tokens(system_prompt) + verbatim > self.token_budget
+        ):
+            msg = recent.pop(0)
+            verbatim -= estimate_tokens(msg.content)
+            self._fold(summary, [msg])
+            system_prompt = self._system_prompt(ticket, summary.summary)
+            foldable -= 1
+
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(
+            {"role": "assistant" if msg.is_ai else "user", "content": msg.content}
+            for msg in recent
+        )
+        return messages
+
+    def _fold(self, summary: ConversationSummary, folded: List[Message]):
+        """
+        Append folded messages to the summary, trimming its oldest lines to budget.
+        
+        Args:
+            summary: Summary row to update in place.
+            folded: Messages leaving the verbatim window, oldest first.
+        """
+        lines = summary.summary.splitlines() if summary.summary else []
+        lines.extend(summarize_turn(msg, self.summary_line_chars) for msg in folded)
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_token_budget:
+            lines.pop(0)
+        summary.summary = "\n".join(lines)
+        summary.summarized_count = (summary.summarized_count or 0) + len(folded)
+        summary.last_message_created_at = folded[-1].created_at
+        summary.last_message_id = folded[-1].id
+
+    def _system_prompt(self, ticket: Ticket, summary: str) -> str:
+        """
+        Compose the system prompt from the ticket and the rolling summary.
+        """
+        prompt = f"{SYSTEM_PROMPT}\nThe customer has the following issue: {ticket.description}"
+        if summary:
+            prompt += f"\n\nSummary of earlier conversation:\n{summary}"
+        return prompt + "\n\nProvide a helpful response that addresses their latest message."
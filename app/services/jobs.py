@@ -0,0 +1,349 @@
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.job import GenerationJob
+from app.models.message import Message
+from app.utils.cache import LRUCache
+from app.utils.database import async_session
+from app.utils.fairqueue import FairQueue
+from app.utils.singleflight import Flight
+from contextlib import aclosing
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+from uuid import UUID
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Coroutine that produces a job's output into its flight and returns the persisted message id
+JobRunner = Callable[[UUID, UUID, Flight], Awaitable[Optional[UUID]]]
+
+class JobQueue:
+    """
+    Background queue that runs AI generation jobs on a fixed pool of worker tasks.
+    Queued jobs are handed to workers round-robin per tenant, so one user with
+    a backlog of jobs cannot starve the others.
+    
+    Job state is persisted in generation_jobs; job output is published to an
+    in-memory flight that clients can attach to, detach from and reattach to
+    while the job runs and for a retention period after it finishes. Later
+    reattachments fall back to the persisted AI message. A running job whose
+    stream clients have all gone away is cancelled after a grace period, so the
+    upstream call stops instead of generating for nobody. Jobs left queued or
+    running by a worker that stopped are marked failed by a periodic sweep.
+    """
+    def __init__(
+        self,
+        runner: JobRunner,
+        workers: int,
+        max_queued: int,
+        retain: int,
+        retain_seconds: float,
+        abandon_seconds: float,
+        stale_seconds: float = 900.0,
+        sweep_seconds: float = 60.0,
+    ):
+        """
+        Initialize the queue; workers start on first submission or via start().
+        
+        Args:
+            runner: Coroutine function producing a job's output.
+            workers: Number of jobs run concurrently.
+            max_queued: Maximum jobs waiting for a worker before submissions are rejected.
+            retain: Number of finished job streams kept in memory for reattachment.
+            retain_seconds: Seconds a finished job stream is kept in memory.
+            abandon_seconds: Grace after the last client detaches before a running job is cancelled.
+            stale_seconds: Age after which a queued or running job not held by this worker is presumed orphaned.
+            sweep_seconds: Interval between sweeps for orphaned jobs.
+        """
+        self.runner = runner
+        self.workers = workers
+        self._queue: Optional[FairQueue] = None
+        self._max_queued = max_queued
+        self._tasks: List[asyncio.Task] = []
+        self._flights: Dict[UUID, Flight] = {}
+        self._active: Dict[Hashable, UUID] = {}
+        self._finished = LRUCache(retain, retain_seconds)
+        self._abandon_seconds = abandon_seconds
+        self._running: Dict[UUID, asyncio.Task] = {}
+        self._cancelled: Set[UUID] = set()
+        self._reserved = 0
+        self._stale_seconds = stale_seconds
+        self._sweep_seconds = sweep_seconds
+        self._sweeper: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.running = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.recovered = 0
+
+    def start(self):
+        """
+        Start the worker tasks if they are not already running.
+        """
+        if self._tasks:
+            return
+        self._queue = FairQueue(maxsize=self._max_queued)
+        self._tasks = [asyncio.create_task(self._work(), name=f"ai-job-worker-{i}") for i in range(self.workers)]
+        self._sweeper = asyncio.create_task(self._sweep_loop(), name="ai-job-sweeper")
+
+    async def stop(self):
+        """
+        Cancel the worker tasks, abandoning queued jobs.
+        """
+        tasks = [*self._tasks, *([self._sweeper] if self._sweeper else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._sweeper = None
+
+    async def submit(self, ticket_id: UUID, key: Hashable, db: AsyncSession, tenant: Hashable = None) -> UUID:
+        """
+        Queue a job for a ticket, or return the active job for the same key.
+        
+        Args:
+            ticket_id: UUID of the ticket the job generates a response for.
+            key: Identity of the work; submissions with the same key share one job.
+            db: Async database session used to persist the job.
+            tenant: Owner the job is scheduled fairly for, e.g. the ticket's user.
+        
+        Returns:
+            UUID of the job.
+        
+        Raises:
+            HTTPException: If the queue is full.
+        """
+        self.start()
+        job_id = self._active.get(key)
+        if job_id is not None:
+            self.coalesced += 1
+            return job_id
+        if self._queue.qsize() + self._reserved >= self._max_queued:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="AI generation queue is full", headers={"Retry-After": "1"})
+
+        # Register before awaiting so concurrent submissions for the key join this job, and
+        # reserve its queue slot so concurrent submissions cannot fill the queue meanwhile
+        job_id = uuid.uuid4()
+        flight = Flight()
+        self._active[key] = job_id
+        self._flights[job_id] = flight
+        self._reserved += 1
+        self.submitted += 1
+        try:
+            db.add(GenerationJob(id=job_id, ticket_id=ticket_id, status="queued"))
+            await db.commit()
+        except BaseException:
+            # Also on cancellation, which may strike after the row was committed
+            self._active.pop(key, None)
+            self._flights.pop(job_id, None)
+            self._finished.set(job_id, flight)
+            self._spawn(self._fail_submission(job_id, flight))
+            raise
+        finally:
+            self._reserved -= 1
+        self._queue.put_nowait(tenant, (job_id, ticket_id, key))
+        return job_id
+
+    async def recover(self) -> int:
+        """
+        Mark jobs left queued or running by a worker that stopped, e.g. on a restart, as failed.
+        
+        Jobs held by this worker are left alone; those of other workers are
+        presumed orphaned once older than stale_seconds.
+        
+        Returns:
+            Number of jobs marked failed.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self._stale_seconds)
+        stmt = (
+            update(GenerationJob)
+            .where(GenerationJob.status.in_(("queued", "running")), GenerationJob.created_at < cutoff)
+            .values(status="failed", error="Interrupted before completion", finished_at=datetime.utcnow())
+        )
+        if self._flights:
+            stmt = stmt.where(GenerationJob.id.not_in(list(self._flights)))
+        async with async_session() as db:
+            result = await db.execute(stmt)
+            await db.commit()
+        self.recovered += result.rowcount
+        return result.rowcount
+
+    async def attach(self, job_id: UUID, db: AsyncSession) -> AsyncIterator[str]:
+        """
+        Stream a job's output from the beginning, following it live if it is still running.
+        
+        Args:
+            job_id: UUID of the job.
+            db: Async database session, used when the stream is no longer in memory.
+        
+        Yields:
+            Items published by the job, or the persisted response content.
+        
+        Raises:
+            HTTPException: If the job's output is unavailable.
+        """
+        flight = self._flights.get(job_id) or self._finished.get(job_id)
+        if flight is not None:
+            try:
+                async with aclosing(flight.subscribe()) as items:
+                    async for item in items:
+                        yield item
+            finally:
+                if not flight.done and not flight.subscribers:
+                    asyncio.get_running_loop().call_later(self._abandon_seconds, self._cancel_if_abandoned, job_id)
+            return
+
+        job = await db.get(GenerationJob, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job.status == "failed":
+            raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+        if job.status != "done":
+            raise HTTPException(status_code=409, detail="Job output is not available on this worker")
+        if job.message_id is not None:
+            message = await db.get(Message, job.message_id)
+            if message is not None:
+                yield message.content
+
+    def has_output(self, job_id: UUID) -> bool:
+        """
+        Return True if a job's stream is still held in memory.
+        """
+        return job_id in self._flights or job_id in self._finished
+
+    def cancel(self, job_id: UUID) -> bool:
+        """
+        Cancel a running job, stopping its upstream call.
+        
+        Args:
+            job_id: UUID of the job.
+        
+        Returns:
+            True if the job was running and has been cancelled.
+        """
+        task = self._running.get(job_id)
+        if task is None or task.done():
+            return False
+        self._cancelled.add(job_id)
+        task.cancel()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return queue depth and job counters.
+        """
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self.running,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "recovered": self.recovered,
+        }
+
+    async def _work(self):
+        """
+        Worker loop: take jobs off the queue and run them one at a time.
+        """
+        while True:
+            _, (job_id, ticket_id, key) = await self._queue.get()
+            try:
+                await self._run(job_id, ticket_id)
+            except Exception:
+                logger.exception("Could not record state of AI generation job %s", job_id)
+            finally:
+                self._active.pop(key, None)
+
+    async def _run(self, job_id: UUID, ticket_id: UUID):
+        """
+        Run one job, recording its state transitions and finishing its flight.
+        """
+        flight = self._flights[job_id]
+        self.running += 1
+        error = None
+        try:
+            await self._set_state(job_id, status="running", started_at=datetime.utcnow())
+            # Run the job as its own task so it can be cancelled without stopping the worker
+            task = asyncio.create_task(self.runner(job_id, ticket_id, flight))
+            self._running[job_id] = task
+            try:
+                message_id = await task
+            except asyncio.CancelledError:
+                if job_id not in self._cancelled:
+                    raise
+                self.cancelled += 1
+                await self._set_state(job_id, status="cancelled", finished_at=datetime.utcnow())
+            else:
+                await self._set_state(job_id, status="done", message_id=message_id, finished_at=datetime.utcnow())
+        except Exception as exc:
+            error = exc
+            self.failed += 1
+            logger.exception("AI generation job %s failed", job_id)
+            await self._set_state(job_id, status="failed", error=str(exc)[:500], finished_at=datetime.utcnow())
+        finally:
+            self.running -= 1
+            self._running.pop(job_id, None)
+            self._cancelled.discard(job_id)
+            await flight.finish(error)
+            self._flights.pop(job_id, None)
+            self._finished.set(job_id, flight)
+
+    def _spawn(self, coro: Awaitable[Any]):
+        """
+        Run a coroutine in the background, keeping a reference until it finishes.
+        """
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _fail_submission(self, job_id: UUID, flight: Flight):
+        """
+        Fail a job whose submission did not complete, for the clients that coalesced onto it.
+        
+        The job row is updated in case it was committed before the submission failed.
+        """
+        error = RuntimeError("Job could not be queued")
+        await flight.finish(error)
+        try:
+            await self._set_state(job_id, status="failed", error=str(error), finished_at=datetime.utcnow())
+        except Exception:
+            logger.exception("Could not record state of AI generation job %s", job_id)
+
+    async def _sweep_loop(self):
+        """
+        Periodically fail jobs orphaned by workers that stopped.
+        """
+        while True:
+            try:
+                recovered = await self.recover()
+                if recovered:
+                    logger.warning("Marked %d orphaned AI generation jobs as failed", recovered)
+            except Exception:
+                logger.exception("Could not sweep orphaned AI generation jobs")
+            await asyncio.sleep(self._sweep_seconds)
+
+    def _cancel_if_abandoned(self, job_id: UUID):
+        """
+        Cancel a running job if no client has reattached to its stream.
+        """
+        flight = self._flights.get(job_id)
+        if flight is not None and not flight.done and not flight.subscribers and self.cancel(job_id):
+            logger.info("Cancelled AI generation job %s after its clients disconnected", job_id)
+
+    async def _set_state(self, job_id: UUID, **values):
+        """
+        Persist a job state transition in its own short transaction.
+        """
+        async with async_session() as db:
+            await db.execute(update(GenerationJob).where(GenerationJob.id == job_id).values(**values))
+            await db.commit()
@@ -0,0 +1,236 @@
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+from app.models.message import Message
+from app.schemas.message import MessageCreate, MessageOut
+from app.services.ai import AIService
+from app.services.principal import Principal
+from app.services.ticket import TicketService
+from app.core.config import settings
+from app.utils.database import async_session
+from app.utils.metrics import registry
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from uuid import UUID
+import asyncio
+import orjson
+import time
+
+# Broker event pushed to a ticket's subscribers when a customer message is posted
+MESSAGE_POSTED = "message_posted"
+
+CONNECTIONS = registry.counter("websocket_connections_total", "Ticket WebSockets accepted")
+DISCONNECTS = registry.counter(
+    "websocket_disconnects_total",
+    "Ticket WebSockets closed, by reason (client, idle, expired, slow, lagged, refused)",
+    ("reason",),
+)
+
+class LiveConnection:
+    """
+    One open ticket WebSocket: client frames in, ticket events out.
+    
+    Outgoing events are read from the ticket's shared broker channel only as
+    fast as the socket accepts them, so a slow client costs no memory beyond
+    the channel's replay buffer. A client falling behind that buffer, or not
+    reading for WS_SEND_TIMEOUT_SECONDS, is disconnected and should resync
+    over REST. Client frames are handled one at a time, so a flooding client
+    is slowed down by TCP rather than queued in memory.
+    """
+    def __init__(
+        self, service: "LiveChatService", websocket: WebSocket, ticket_id: UUID, user: Principal,
+        owner: bool, expires_at: Optional[float],
+    ):
+        self.service = service
+        self.websocket = websocket
+        self.ticket_id = ticket_id
+        self.user = user
+        self.owner = owner
+        self.expires_at = expires_at
+        self.last_activity = time.monotonic()
+        self._send_lock = asyncio.Lock()
+
+    async def run(self) -> Tuple[str, int, str]:
+        """
+        Serve the socket until either side ends it.
+        
+        Returns:
+            Disconnect reason, and the close code and message to send (code 0 if the client closed).
+        """
+        channel = self.service.ai.broker.channel(self.ticket_id)
+        events = channel.subscribe(channel.last_id)
+        forward = asyncio.create_task(self._forward(events, channel.last_id + 1))
+        receive = asyncio.create_task(self._receive())
+        try:
+            done, _ = await asyncio.wait({forward, receive}, return_when=asyncio.FIRST_COMPLETED)
+            return done.pop().result()
+        finally:
+            for task in (forward, receive):
+                task.cancel()
+            await asyncio.gather(forward, receive, return_exceptions=True)
+            await events.aclose()
+
+    async def send(self, event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> bool:
+        """
+        Send one JSON frame, giving up on a client that does not read it in time.
+        
+        Returns:
+            False if the send timed out.
+        """
+        frame = {"event": event, "data": data}
+        if event_id is not None:
+            frame["id"] = event_id
+        text = orjson.dumps(frame).decode()
+        try:
+            async with self._send_lock:
+                await asyncio.wait_for(self.websocket.send_text(text), settings.WS_SEND_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            return False
+        self.last_activity = time.monotonic()
+        return True
+
+    async def _forward(self, events: AsyncIterator, expected_id: int) -> Tuple[str, int, str]:
+        """
+        Push the ticket's events to the client, in ID order and without gaps.
+        """
+        async for item in events:
+            if item.id != expected_id:
+                # Events were evicted from the replay buffer before this client read them
+                return "lagged", status.WS_1013_TRY_AGAIN_LATER, "Client fell behind the ticket stream"
+            expected_id = item.id + 1
+            if not await self.send(item.event, item.data, item.id):
+                return "slow", status.WS_1013_TRY_AGAIN_LATER, "Client is not reading"
+        return "client", 0, ""
+
+    async def _receive(self) -> Tuple[str, int, str]:
+        """
+        Handle client frames until the client leaves, goes idle or its token expires.
+        """
+        while True:
+            if self.expires_at is not None and time.time() >= self.expires_at:
+                return "expired", status.WS_1008_POLICY_VIOLATION, "Token expired"
+            timeout = self.last_activity + settings.WS_IDLE_TIMEOUT_SECONDS - time.monotonic()
+            if timeout <= 0:
+                return "idle", status.WS_1000_NORMAL_CLOSURE, "Idle timeout"
+            if self.expires_at is not None:
+                timeout = min(timeout, self.expires_at - time.time())
+            try:
+                message = await asyncio.wait_for(self.websocket.receive(), timeout)
+            except asyncio.TimeoutError:
+                continue
+            if message["type"] == "websocket.disconnect":
+                return "client", 0, ""
+            self.last_activity = time.monotonic()
+            text = message.get("text")
+            if text is None and message.get("bytes") is not None:
+                text = message["bytes"].decode(errors="replace")
+            await self._handle(text or "")
+
+    async def _handle(self, text: str):
+        """
+        Act on one client frame, answering rejected frames with a ``rejected`` event.
+        
+        Frames are JSON objects: ``{"type": "message", "content": ..., "ai": true}``
+        posts a message and, unless ``ai`` is false, requests an AI response;
+        ``{"type": "generate"}`` requests an AI response for the current state;
+        ``{"type": "ping"}`` is answered with ``pong``.
+        """
+        try:
+            if len(text) > settings.WS_MAX_MESSAGE_CHARS:
+                raise HTTPException(status_code=413, detail="Frame too large")
+            try:
+                frame = orjson.loads(text)
+            except orjson.JSONDecodeError:
+                raise HTTPException(status_code=400, detail="Frames must be JSON objects")
+            kind = frame.get("type") if isinstance(frame, dict) else None
+            if kind == "ping":
+                await self.send("pong", {})
+            elif kind in ("message", "generate"):
+                if not self.owner:
+                    raise HTTPException(status_code=403, detail="Only the ticket owner can post")
+                await self._post(frame if kind == "message" else None, kind == "generate" or frame.get("ai", True))
+            else:
+                raise HTTPException(status_code=400, detail="Unknown frame type")
+        except HTTPException as exc:
+            await self.send("rejected", {"status": exc.status_code, "detail": exc.detail})
+
+    async def _post(self, frame: Optional[Dict[str, Any]], generate: bool):
+        """
+        Add the frame's message, if any, and queue an AI response, in one short database session.
+        """
+        async with async_session() as db:
+            if frame is not None:
+                try:
+                    message_data = MessageCreate.model_validate(frame)
+                except ValidationError:
+                    raise HTTPException(status_code=422, detail="Message frames need a string content")
+                message = await self.service.tickets.add_message(self.ticket_id, message_data, self.user, db)
+                await self.service.announce(message)
+            if generate:
+                await self.service.ai.submit_job(self.ticket_id, db)
+
+class LiveChatService:
+    """
+    Service class running live ticket conversations over WebSockets.
+    
+    A socket is authenticated and checked against the ticket once, when it
+    opens; afterwards it holds no database session or connection, and each
+    client action opens a short session of its own. The socket follows the
+    ticket's broker channel, so it receives the AI response chunks of every
+    generation on the ticket and the messages posted by other participants,
+    over REST or another socket. Channels are per worker process.
+    """
+    def __init__(self, tickets: TicketService, ai: AIService):
+        """
+        Initialize the service with the ticket and AI services it drives.
+        """
+        self.tickets = tickets
+        self.ai = ai
+        self.connections = 0
+
+    async def serve(
+        self, websocket: WebSocket, ticket_id: UUID, user: Principal, owner: bool, expires_at: Optional[float] = None
+    ):
+        """
+        Accept an authenticated ticket WebSocket and serve it until it closes.
+        
+        Args:
+            websocket: Socket whose handshake is pending.
+            ticket_id: UUID of the ticket, already checked to be visible to the user.
+            user: Authenticated user.
+            owner: Whether the user owns the ticket and may post to it.
+            expires_at: Expiry of the user's token as a UNIX timestamp; the socket closes then.
+        """
+        if self.connections >= settings.WS_MAX_CONNECTIONS:
+            DISCONNECTS.inc(reason="refused")
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Too many connections")
+            return
+        await websocket.accept()
+        self.connections += 1
+        CONNECTIONS.inc()
+        reason = "client"
+        try:
+            reason, code, detail = await LiveConnection(self, websocket, ticket_id, user, owner, expires_at).run()
+            if code:
+                await websocket.close(code=code, reason=detail)
+        except (WebSocketDisconnect, RuntimeError):
+            # The client went away while a frame was being sent, or closed the socket first
+            reason = "client"
+        finally:
+            self.connections -= 1
+            DISCONNECTS.inc(reason=reason)
+
+    async def announce(self, message: Message):
+        """
+        Push a posted message to the ticket's live subscribers, if it has any.
+        
+        Args:
+            message: Message just added to a ticket.
+        """
+        channel = self.ai.broker.find(message.ticket_id)
+        if channel is not None and channel.subscribers:
+            await channel.publish(MESSAGE_POSTED, MessageOut.model_validate(message).model_dump(mode="json"))
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the number of open ticket WebSockets of this worker.
+        """
+        return {"connections": self.connections}
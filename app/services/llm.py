@@ -0,0 +1,447 @@
+from app.core.config import settings
+from app.services.admission import CircuitBreaker
+from app.utils.metrics import registry
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import random
+import time
+
+ATTEMPTS = registry.counter(
+    "llm_provider_requests_total", "Upstream LLM requests by provider and outcome (won, lost, failed)",
+    ("provider", "outcome"),
+)
+HEDGES = registry.counter(
+    "llm_hedged_requests_total", "Second requests sent after a slow first token", ("provider",)
+)
+
+FAKE_VOCABULARY = (
+    "thanks for reaching out we are looking into your issue please try restarting "
+    "the device and clearing the cache if the problem persists reply with any error "
+    "message you see and we will escalate it to the support team"
+).split()
+
+class FakeProviderError(Exception):
+    """
+    Upstream failure injected by the fake provider.
+    """
+
+class FakeStream:
+    """
+    Async chunk stream shaped like Groq's AsyncStream, including close() and
+    async context manager support.
+    """
+    def __init__(self, chunks: AsyncIterator[Any]):
+        self._chunks = chunks
+        self.closed = False
+
+    def __aiter__(self):
+        return self._chunks
+
+    async def close(self):
+        """
+        Stop the stream, releasing the (emulated) upstream connection.
+        """
+        self.closed = True
+        await self._chunks.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+class FakeCompletions:
+    """
+    Stand-in for the Groq chat completions API that streams a deterministic reply.
+    """
+    def __init__(
+        self, tokens_per_second: float, response_tokens: int, first_token_delay: float, failure_rate: float = 0.0
+    ):
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.first_token_delay = first_token_delay
+        self.failure_rate = failure_rate
+        self.calls = 0
+
+    async def create(self, messages: List[Dict[str, str]], model: str, stream: bool = True, **kwargs):
+        """
+        Return an async stream of chunks shaped like Groq's streaming response.
+        
+        The reply is derived from a hash of the prompt, so the same prompt always
+        produces the same text, and tokens are paced at the configured rate.
+        
+        Args:
+            messages: Chat messages of the prompt.
+            model: Requested model name (ignored).
+            stream: Must be True; only streaming is emulated.
+        
+        Returns:
+            FakeStream of chunk objects.
+        
+        Raises:
+            FakeProviderError: For the configured share of calls.
+        """
+        self.calls += 1
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise FakeProviderError("Injected fake provider failure")
+        seed = hashlib.sha256(repr(messages).encode()).digest()
+        words = [FAKE_VOCABULARY[(seed[i % len(seed)] + i) % len(FAKE_VOCABULARY)] for i in range(self.response_tokens)]
+        return FakeStream(self._stream(words))
+
+    async def _stream(self, words: List[str]):
+        await asyncio.sleep(self.first_token_delay)
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for index, word in enumerate(words):
+            if index and interval:
+                await asyncio.sleep(interval)
+            content = word if index == 0 else " " + word
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+class FakeLLMClient:
+    """
+    Offline LLM client exposing the subset of the AsyncGroq interface the app uses.
+    Intended for load tests and local runs without a Groq API key.
+    """
+    def __init__(
+        self,
+        tokens_per_second: Optional[float] = None,
+        response_tokens: Optional[int] = None,
+        first_token_delay: Optional[float] = None,
+        failure_rate: float = 0.0,
+    ):
+        """
+        Initialize the fake client, defaulting its pacing to the application settings.
+        
+        Args:
+            tokens_per_second: Streaming rate; 0 streams as fast as possible.
+            response_tokens: Number of tokens in each reply.
+            first_token_delay: Seconds before the first token is emitted.
+            failure_rate: Share of calls failing with FakeProviderError, for failover tests.
+        """
+        completions = FakeCompletions(
+            settings.AI_FAKE_TOKENS_PER_SECOND if tokens_per_second is None else tokens_per_second,
+            settings.AI_FAKE_RESPONSE_TOKENS if response_tokens is None else response_tokens,
+            settings.AI_FAKE_FIRST_TOKEN_DELAY if first_token_delay is None else first_token_delay,
+            failure_rate,
+        )
+        self.chat = SimpleNamespace(completions=completions)
+
+class LatencyWindow:
+    """
+    Time-to-first-token samples of a provider's most recent requests.
+    """
+    def __init__(self, size: int):
+        self.samples = deque(maxlen=size)
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Return a percentile of the samples, or None if there are none.
+        """
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class LLMProvider:
+    """
+    One upstream LLM behind a chat completions client shaped like AsyncGroq,
+    with the latency and failure statistics routing decisions are based on.
+    """
+    def __init__(self, name: str, client: Any):
+        """
+        Initialize the provider with an empty latency window and a closed circuit breaker.
+        
+        Args:
+            name: Provider name used in metrics and stats.
+            client: AsyncGroq or FakeLLMClient instance.
+        """
+        self.name = name
+        self.client = client
+        self.latency = LatencyWindow(settings.AI_LATENCY_WINDOW)
+        self.breaker = CircuitBreaker(settings.AI_BREAKER_FAILURE_THRESHOLD, settings.AI_BREAKER_COOLDOWN_SECONDS)
+        self.requests = 0
+        self.won = 0
+        self.failed = 0
+
+    @property
+    def p95(self) -> Optional[float]:
+        """
+        p95 time to first token, or None until AI_LATENCY_MIN_SAMPLES requests were measured.
+        """
+        if len(self.latency.samples) < settings.AI_LATENCY_MIN_SAMPLES:
+            return None
+        return self.latency.percentile(0.95)
+
+    @property
+    def available(self) -> bool:
+        """
+        Whether the provider's breaker lets a request through.
+        """
+        state = self.breaker.state
+        return state == "closed" or (state == "half_open" and not self.breaker.probing)
+
+    async def stream(self, messages: List[Dict[str, str]], model: str) -> AsyncIterator[str]:
+        """
+        Stream a chat completion as its non-empty content deltas.
+        
+        Closing the generator closes the upstream stream.
+        
+        Args:
+            messages: Chat messages of the prompt.
+            model: Model to generate with.
+        
+        Yields:
+            Content of each streamed chunk.
+        """
+        if self.breaker.state == "half_open":
+            self.breaker.probing = True
+        self.requests += 1
+        stream = await self.client.chat.completions.create(messages=messages, model=model, stream=True)
+        async with stream:
+            async for chunk in stream:
+                content = chunk.choices[0].delta.content or ""
+                if content:
+                    yield content
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return request counters, latency percentiles and breaker state of the provider.
+        """
+        p50, p95 = self.latency.percentile(0.50), self.latency.percentile(0.95)
+        return {
+            "name": self.name,
+            "requests": self.requests,
+            "won": self.won,
+            "failed": self.failed,
+            "ttft_p50_ms": None if p50 is None else round(p50 * 1000, 3),
+            "ttft_p95_ms": None if p95 is None else round(p95 * 1000, 3),
+            "samples": len(self.latency.samples),
+            "circuit_state": self.breaker.state,
+        }
+
+class Attempt:
+    """
+    One upstream request made for a routed call, awaiting its first token.
+    """
+    def __init__(self, provider: LLMProvider, chunks: AsyncIterator[str]):
+        self.provider = provider
+        self.chunks = chunks
+        self.started = time.monotonic()
+        self.first: asyncio.Task = asyncio.ensure_future(chunks.__anext__())
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+class LLMRouter:
+    """
+    Routes each generation across the configured LLM providers.
+    
+    Providers are ranked by the p95 time to first token of their recent
+    requests, with providers lacking enough samples after measured ones in
+    configured order, and providers whose breaker is open last. When the
+    first token has not arrived within the serving provider's p95 (clamped to
+    the AI_HEDGE_*_DELAY_SECONDS bounds), a hedged request goes to the next
+    provider, or again to the only one, for at most AI_HEDGE_MAX_RATIO of
+    calls and only when the caller's budget allows it; the first request to
+    produce a token wins and the other is cancelled. A request failing
+    before its first token fails over to the next provider. Once tokens flow
+    the answer is committed to its provider, so failures mid-stream propagate. Long prompts go to AI_LARGE_MODEL.
+    """
+    def __init__(self, providers: List[LLMProvider]):
+        """
+        Initialize the router with providers in order of preference.
+        """
+        if not providers:
+            raise ValueError("At least one LLM provider is required")
+        self.providers = providers
+        self.calls = 0
+        self.hedges = 0
+        self.failovers = 0
+
+    def choose_model(self, prompt_tokens: int) -> str:
+        """
+        Pick the model for a prompt: AI_LARGE_MODEL from AI_LARGE_MODEL_MIN_PROMPT_TOKENS on, else AI_MODEL.
+        """
+        threshold = settings.AI_LARGE_MODEL_MIN_PROMPT_TOKENS
+        if settings.AI_LARGE_MODEL and threshold and prompt_tokens >= threshold:
+            return settings.AI_LARGE_MODEL
+        return settings.AI_MODEL
+
+    def rank(self) -> List[LLMProvider]:
+        """
+        Order the providers for the next call, best first.
+        """
+        order = sorted(
+            enumerate(self.providers),
+            key=lambda item: (
+                not item[1].available,
+                item[1].p95 if item[1].p95 is not None else float("inf"),
+                item[0],
+            ),
+        )
+        return [provider for _, provider in order]
+
+    def hedge_delay(self, provider: LLMProvider) -> float:
+        """
+        Seconds to wait for a provider's first token before sending a hedged request.
+        """
+        p95 = provider.p95
+        if p95 is None:
+            return settings.AI_HEDGE_MAX_DELAY_SECONDS
+        return min(settings.AI_HEDGE_MAX_DELAY_SECONDS, max(settings.AI_HEDGE_MIN_DELAY_SECONDS, p95))
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        reserve: Optional[Callable[[bool], bool]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion from the best provider, hedging and failing over until one produces a token.
+        
+        Args:
+            messages: Chat messages of the prompt.
+            model: Model to generate with, from choose_model().
+            reserve: Called before each request after the first with whether it is optional
+                (a hedge) to charge it to the caller's rate limits; a hedge is skipped when it
+                returns False. None sends extra requests unaccounted.
+        
+        Yields:
+            Content of each streamed chunk.
+        
+        Raises:
+            Exception: The last provider error if every attempt failed before its first token.
+        """
+        self.calls += 1
+        ranked = self.rank()
+        # A lone provider is hedged and failed over to itself
+        candidates = iter(ranked if len(ranked) > 1 else ranked * 2)
+        pending: Dict[asyncio.Task, Attempt] = {}
+        hedged = not settings.AI_HEDGE_ENABLED
+        winner: Optional[Attempt] = None
+        first: Optional[str] = None
+        error: Optional[BaseException] = None
+
+        def launch(provider: LLMProvider) -> float:
+            attempt = Attempt(provider, provider.stream(messages, model))
+            pending[attempt.first] = attempt
+            return attempt.started + self.hedge_delay(provider)
+
+        try:
+            hedge_at = launch(next(candidates))
+            while winner is None:
+                if not pending:
+                    provider = next(candidates, None)
+                    if provider is None:
+                        raise error
+                    self.failovers += 1
+                    if reserve is not None:
+                        reserve(False)
+                    hedge_at = launch(provider)
+                timeout = None
+                if not hedged and self.hedges < self.calls * settings.AI_HEDGE_MAX_RATIO:
+                    timeout = max(0.0, hedge_at - time.monotonic())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    provider = next(candidates, None)
+                    if provider is not None and (reserve is None or reserve(True)):
+                        self.hedges += 1
+                        HEDGES.inc(provider=provider.name)
+                        launch(provider)
+                    continue
+                for task in done:
+                    attempt = pending.pop(task)
+                    try:
+                        first = task.result()
+                    except StopAsyncIteration:
+                        # An empty reply still settles the call
+                        first = None
+                    except Exception as exc:
+                        error = exc
+                        attempt.provider.failed += 1
+                        attempt.provider.breaker.on_failure()
+                        ATTEMPTS.inc(provider=attempt.provider.name, outcome="failed")
+                        continue
+                    winner = attempt
+                    break
+        finally:
+            await self._cancel(pending)
+
+        provider = winner.provider
+        provider.latency.observe(winner.elapsed)
+        provider.breaker.on_success()
+        provider.won += 1
+        ATTEMPTS.inc(provider=provider.name, outcome="won")
+        try:
+            if first is not None:
+                yield first
+                async for content in winner.chunks:
+                    yield content
+        finally:
+            await winner.chunks.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return routing counters and per-provider statistics.
+        """
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+            "providers": [provider.stats() for provider in self.providers],
+        }
+
+    async def _cancel(self, pending: Dict[asyncio.Task, Attempt]):
+        """
+        Cancel the attempts that lost, closing their upstream streams.
+        """
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for attempt in pending.values():
+            # A cancelled half-open probe proved nothing; let the next request probe again
+            attempt.provider.breaker.probing = False
+            # Losing only shows the first token would have taken longer than this. A
+            # lower bound below the p95 would drag the percentile down, so it is kept
+            # only when it already exceeds the p95, e.g. for a provider that has slowed
+            p95 = attempt.provider.p95
+            if p95 is not None and attempt.elapsed > p95:
+                attempt.provider.latency.observe(attempt.elapsed)
+            ATTEMPTS.inc(provider=attempt.provider.name, outcome="lost")
+            await attempt.chunks.aclose()
+
+def create_llm_client(provider: str):
+    """
+    Create the chat completions client of a provider.
+    
+    Args:
+        provider: "groq", or "fake" for the offline stub.
+    
+    Returns:
+        An AsyncGroq client, or a FakeLLMClient for "fake".
+    
+    Raises:
+        ValueError: If the provider is unknown.
+    """
+    if provider == "fake":
+        return FakeLLMClient()
+    if provider == "groq":
+        # Imported here so workers that never call Groq don't pay for loading its SDK
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=settings.GROQ_API_KEY)
+    raise ValueError(f"Unknown AI provider: {provider}")
+
+def create_llm_router() -> LLMRouter:
+    """
+    Create the router over the providers listed in the AI_PROVIDER setting.
+    """
+    names = [name.strip() for name in settings.AI_PROVIDER.split(",") if name.strip()]
+    return LLMRouter([LLMProvider(name, create_llm_client(name)) for name in names])
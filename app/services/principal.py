@@ -0,0 +1,123 @@
+from dataclasses import dataclass
+from sqlalchemy import event, inspect
+from app.models.user import User
+from app.core.config import settings
+from app.utils.cache import LRUCache
+from typing import Optional
+from uuid import UUID
+import time
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Lightweight, immutable record of an authenticated user.
+    Carries the fields request handlers need without holding an ORM instance.
+    """
+    id: UUID  # Unique user identifier
+    role: str  # User role (e.g., user, admin)
+    email: Optional[str] = None  # User email; unknown when built from token claims only
+
+@dataclass(frozen=True)
+class TokenClaims:
+    """
+    Verified claims of a decoded JWT.
+    """
+    user_id: UUID  # Subject of the token
+    role: Optional[str]  # Role claim, if present
+    expires_at: Optional[float]  # Expiry as a UNIX timestamp, if present
+
+class PrincipalCache:
+    """
+    LRU+TTL caches for decoded tokens and the users they resolve to.
+    
+    Decoded tokens are keyed by the raw token and users by id, so a role change
+    or deletion only needs to drop the user entry. Caches are per process; the
+    TTL bounds how long another worker may serve a stale principal.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Initialize empty token and user caches.
+        
+        Args:
+            maxsize: Maximum entries in each cache.
+            ttl: Seconds an entry stays valid.
+        """
+        self.tokens = LRUCache(maxsize, ttl)
+        self.users = LRUCache(maxsize, ttl)
+
+    def get_claims(self, token: str) -> Optional[TokenClaims]:
+        """
+        Return cached claims for a token if it is still unexpired.
+        
+        Args:
+            token: Raw JWT.
+        
+        Returns:
+            Cached claims, or None if absent or expired.
+        """
+        claims = self.tokens.get(token)
+        if claims is not None and claims.expires_at is not None and claims.expires_at <= time.time():
+            self.tokens.pop(token)
+            return None
+        return claims
+
+    def remember_claims(self, token: str, claims: TokenClaims):
+        """
+        Cache the verified claims of a token.
+        """
+        self.tokens.set(token, claims)
+
+    def get_user(self, user_id: UUID) -> Optional[Principal]:
+        """
+        Return the cached principal for a user id.
+        """
+        return self.users.get(user_id)
+
+    def remember_user(self, user: User) -> Principal:
+        """
+        Cache a principal built from a user row.
+        
+        Args:
+            user: User loaded from the database.
+        
+        Returns:
+            The cached principal.
+        """
+        principal = Principal(id=user.id, role=user.role, email=user.email)
+        self.users.set(user.id, principal)
+        return principal
+
+    def invalidate_user(self, user_id: UUID):
+        """
+        Drop a user's cached principal, e.g. after a role change or deletion.
+        
+        Args:
+            user_id: UUID of the user.
+        """
+        self.users.pop(user_id)
+
+    def clear(self):
+        """
+        Drop every cached token and principal.
+        """
+        self.tokens.clear()
+        self.users.clear()
+
+# Shared principal cache for the application
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_update(mapper, connection, target: User):
+    """
+    Invalidate the cached principal when a user's role or email changes through the ORM.
+    """
+    state = inspect(target)
+    if state.attrs.role.history.has_changes() or state.attrs.email.history.has_changes():
+        principal_cache.invalidate_user(target.id)
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, target: User):
+    """
+    Invalidate the cached principal when a user is deleted through the ORM.
+    """
+    principal_cache.invalidate_user(target.id)
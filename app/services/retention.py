@@ -0,0 +1,316 @@
+from sqlalchemy import delete, func, insert, literal, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.future import select
+from app.models.archive import ArchivedMessage, ArchivedTicket
+from app.models.conversation import ConversationSummary
+from app.models.job import GenerationJob
+from app.models.message import Message
+from app.models.ticket import Ticket
+from app.core.config import settings
+from app.utils.database import async_session, engine
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+import asyncio
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Columns copied between the live and archive tables
+TICKET_COLUMNS = ("id", "title", "description", "status", "created_at", "status_changed_at", "user_id")
+MESSAGE_COLUMNS = ("id", "content", "is_ai", "status", "created_at", "ticket_id")
+# Monthly message partitions managed by the retention job, e.g. messages_p202611
+PARTITION_PATTERN = re.compile(r"^messages_p(\d{4})(\d{2})$")
+# PostgreSQL advisory lock held by the one worker running the retention job at a time
+RETENTION_LOCK_KEY = 7_265_746_101
+
+def add_months(moment: datetime, months: int) -> datetime:
+    """
+    Return the first day of the month a number of months after the month of a timestamp.
+    """
+    index = moment.year * 12 + moment.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+class RetentionService:
+    """
+    Service class moving long-closed tickets and their messages to archive tables.
+    
+    A background job archives tickets closed for more than
+    RETENTION_ARCHIVE_AFTER_DAYS in batches of RETENTION_BATCH_SIZE, each in
+    its own transaction, so it can stop at any point and resumes where it left
+    off. On PostgreSQL only one worker runs the job at a time, under an
+    advisory lock, and a manual run skips tickets the job has locked.
+    Archived tickets stay readable through the archive tables, though not
+    through full-text search, and move back when reopened. On PostgreSQL the job also creates upcoming monthly
+    partitions of the messages table and drops old ones left empty.
+    """
+    def __init__(self):
+        """
+        Initialize the service with the retention settings.
+        """
+        self.enabled = settings.RETENTION_ENABLED
+        self._task: Optional[asyncio.Task] = None
+        self.archived = 0
+        self.restored = 0
+        self.last_run: Optional[datetime] = None
+
+    def start(self):
+        """
+        Start the periodic archival job in the background.
+        """
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self):
+        """
+        Stop the periodic archival job; an interrupted batch is rolled back.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self, cutoff: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Maintain message partitions and archive every ticket closed before the cutoff.
+        
+        Args:
+            cutoff: Archive tickets closed before this time; defaults to RETENTION_ARCHIVE_AFTER_DAYS ago.
+        
+        Returns:
+            Created and dropped partitions and the number of archived tickets, or
+            ``skipped`` if another worker is running the job.
+        """
+        if cutoff is None:
+            cutoff = datetime.utcnow() - timedelta(days=settings.RETENTION_ARCHIVE_AFTER_DAYS)
+        archived = 0
+        # The advisory lock belongs to this dedicated connection, not to the pooled ones the batches commit on
+        async with engine.connect() as lock:
+            if not await self._try_lock(lock):
+                return {"archived_tickets": 0, "partitions_created": [], "partitions_dropped": [], "skipped": True}
+            try:
+                async with async_session() as db:
+                    created = await self.ensure_partitions(db)
+                    while True:
+                        moved = await self.archive_batch(db, cutoff, settings.RETENTION_BATCH_SIZE)
+                        archived += moved
+                        if moved < settings.RETENTION_BATCH_SIZE:
+                            break
+                        # Leave room for request traffic between batches
+                        await asyncio.sleep(settings.RETENTION_BATCH_PAUSE_SECONDS)
+                    dropped = await self.drop_empty_partitions(db, cutoff)
+            finally:
+                await self._unlock(lock)
+        self.last_run = datetime.utcnow()
+        return {"archived_tickets": archived, "partitions_created": created, "partitions_dropped": dropped}
+
+    async def archive_batch(self, db: AsyncSession, cutoff: datetime, limit: int) -> int:
+        """
+        Move up to ``limit`` tickets closed before the cutoff, with their messages, to the archive and commit.
+        
+        Generation jobs and conversation summaries of the tickets are deleted;
+        dashboard counters are left unchanged since archived tickets still count.
+        
+        Args:
+            db: Async database session.
+            cutoff: Archive tickets closed before this time.
+            limit: Maximum number of tickets to move.
+        
+        Returns:
+            Number of tickets archived.
+        """
+        closed_at = func.coalesce(Ticket.status_changed_at, Ticket.created_at)
+        result = await db.execute(
+            select(Ticket.id)
+            .filter(Ticket.status == "closed", closed_at < cutoff)
+            .order_by(closed_at, Ticket.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        ticket_ids = result.scalars().all()
+        if not ticket_ids:
+            await db.rollback()
+            return 0
+
+        await db.execute(
+            insert(ArchivedTicket).from_select(
+                (*TICKET_COLUMNS, "archived_at"),
+                select(
+                    Ticket.id, Ticket.title, Ticket.description, Ticket.status,
+                    func.coalesce(Ticket.created_at, closed_at), Ticket.status_changed_at, Ticket.user_id,
+                    literal(datetime.utcnow()),
+                ).filter(Ticket.id.in_(ticket_ids)),
+            )
+        )
+        await db.execute(
+            insert(ArchivedMessage).from_select(
+                MESSAGE_COLUMNS,
+                select(
+                    Message.id, Message.content, Message.is_ai, Message.status,
+                    func.coalesce(Message.created_at, Ticket.created_at), Message.ticket_id,
+                )
+                .join(Ticket, Ticket.id == Message.ticket_id)
+                .filter(Message.ticket_id.in_(ticket_ids)),
+            )
+        )
+        await db.execute(delete(GenerationJob).filter(GenerationJob.ticket_id.in_(ticket_ids)))
+        await db.execute(delete(ConversationSummary).filter(ConversationSummary.ticket_id.in_(ticket_ids)))
+        await db.execute(delete(Message).filter(Message.ticket_id.in_(ticket_ids)))
+        await db.execute(delete(Ticket).filter(Ticket.id.in_(ticket_ids)))
+        await db.commit()
+        self.archived += len(ticket_ids)
+        return len(ticket_ids)
+
+    async def restore(self, ticket_id: UUID, db: AsyncSession) -> Optional[Ticket]:
+        """
+        Move an archived ticket and its messages back to the live tables; the caller commits.
+        
+        Args:
+            ticket_id: UUID of the archived ticket.
+            db: Async database session.
+        
+        Returns:
+            The restored live ticket, or None if the ticket is not archived.
+        """
+        result = await db.execute(
+            insert(Ticket).from_select(
+                TICKET_COLUMNS,
+                select(*(getattr(ArchivedTicket, name) for name in TICKET_COLUMNS)).filter(ArchivedTicket.id == ticket_id),
+            )
+        )
+        if not result.rowcount:
+            return None
+        await db.execute(
+            insert(Message).from_select(
+                MESSAGE_COLUMNS,
+                select(*(getattr(ArchivedMessage, name) for name in MESSAGE_COLUMNS))
+                .filter(ArchivedMessage.ticket_id == ticket_id),
+            )
+        )
+        await db.execute(delete(ArchivedMessage).filter(ArchivedMessage.ticket_id == ticket_id))
+        await db.execute(delete(ArchivedTicket).filter(ArchivedTicket.id == ticket_id))
+        self.restored += 1
+        return await db.get(Ticket, ticket_id)
+
+    async def ensure_partitions(self, db: AsyncSession) -> List[str]:
+        """
+        Create the monthly messages partitions for the next RETENTION_PARTITIONS_AHEAD months and commit.
+        
+        Only applies on PostgreSQL once the messages table is partitioned. The
+        current month is never created here: it exists from an earlier run or
+        the migration, and rows of a missing month land in the default partition.
+        
+        Args:
+            db: Async database session.
+        
+        Returns:
+            Names of the partitions created.
+        """
+        existing = await self._partitions(db)
+        if existing is None:
+            return []
+        created = []
+        this_month = add_months(datetime.utcnow(), 0)
+        for offset in range(1, settings.RETENTION_PARTITIONS_AHEAD + 1):
+            lower, upper = add_months(this_month, offset), add_months(this_month, offset + 1)
+            name = f"messages_p{lower:%Y%m}"
+            if name in existing:
+                continue
+            # Creating a partition briefly locks the parent; give up rather than queue behind long transactions
+            await db.execute(text("SET LOCAL lock_timeout = '5s'"))
+            await db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF messages "
+                f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+            ))
+            await db.commit()
+            created.append(name)
+        return created
+
+    async def drop_empty_partitions(self, db: AsyncSession, cutoff: datetime) -> List[str]:
+        """
+        Drop monthly messages partitions that ended before the cutoff and no longer hold rows.
+        
+        Args:
+            db: Async database session.
+            cutoff: Only partitions whose range ends before this time are considered.
+        
+        Returns:
+            Names of the partitions dropped.
+        """
+        existing = await self._partitions(db)
+        if existing is None:
+            return []
+        dropped = []
+        for name in sorted(existing):
+            match = PARTITION_PATTERN.match(name)
+            if not match or add_months(datetime(int(match[1]), int(match[2]), 1), 1) > cutoff:
+                continue
+            result = await db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})"))
+            if result.scalar():
+                continue
+            await db.execute(text("SET LOCAL lock_timeout = '5s'"))
+            await db.execute(text(f"ALTER TABLE messages DETACH PARTITION {name}"))
+            await db.execute(text(f"DROP TABLE {name}"))
+            await db.commit()
+            dropped.append(name)
+        await db.rollback()
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return archival counters of this worker.
+        """
+        return {
+            "enabled": self.enabled,
+            "archived": self.archived,
+            "restored": self.restored,
+            "last_run": self.last_run,
+        }
+
+    async def _partitions(self, db: AsyncSession) -> Optional[set]:
+        """
+        Return the names of the messages partitions, or None if the table is not partitioned.
+        """
+        if db.bind.dialect.name != "postgresql":
+            return None
+        result = await db.execute(
+            text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('messages')")
+        )
+        if result.scalar() is None:
+            await db.rollback()
+            return None
+        result = await db.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass('messages')"
+        ))
+        return set(result.scalars().all())
+
+    async def _try_lock(self, conn: AsyncConnection) -> bool:
+        """
+        Take the retention advisory lock on PostgreSQL; other databases run the job unguarded.
+        """
+        if conn.dialect.name != "postgresql":
+            return True
+        locked = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": RETENTION_LOCK_KEY})
+        # Session-level locks outlive the transaction, which must not stay open for the whole run
+        await conn.commit()
+        return bool(locked)
+
+    async def _unlock(self, conn: AsyncConnection):
+        """
+        Release the retention advisory lock taken by _try_lock.
+        """
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RETENTION_LOCK_KEY})
+            await conn.commit()
+
+    async def _run_loop(self):
+        while True:
+            try:
+                report = await self.run_once()
+                if report["archived_tickets"] or report["partitions_created"] or report["partitions_dropped"]:
+                    logger.info("Retention run: %s", report)
+            except Exception:
+                logger.exception("Ticket archival failed")
+            await asyncio.sleep(settings.RETENTION_INTERVAL_SECONDS)
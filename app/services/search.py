@@ -0,0 +1,135 @@
+from fastapi import HTTPException
+from sqlalchemy import column, func, literal_column, table, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+from app.core.config import settings
+from app.models.ticket import Ticket
+from app.models.message import Message
+from app.models.user import User
+from app.models import search  # noqa: F401  (registers the full-text index DDL)
+from app.utils.pagination import decode_offset_cursor, encode_offset_cursor
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+import re
+
+# Words of a query; everything else (operators, quotes, punctuation) is ignored on SQLite
+SEARCH_TERM = re.compile(r"\w+")
+
+# Text search configuration used by the PostgreSQL tsvector columns
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+class SearchService:
+    """
+    Service class for ranked full-text search over tickets and their messages.
+    
+    Matches come from the full-text indexes only: GIN-indexed tsvector columns
+    on PostgreSQL and FTS5 tables on SQLite. A ticket's relevance is the sum of
+    the ranks of its own text and of its matching messages. Only live tickets
+    are indexed; archived tickets are left out of search so the archive adds
+    nothing to the full-text indexes.
+    """
+    async def search_tickets(
+        self,
+        user: User,
+        db: AsyncSession,
+        query: str,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Search the tickets visible to a user: their own, or every ticket for admins.
+        
+        Args:
+            user: Authenticated user.
+            db: Async database session.
+            query: Search text; on PostgreSQL web-search syntax (quotes, OR, -word) is supported.
+            limit: Maximum number of results on the page.
+            cursor: Opaque cursor from a previous page.
+        
+        Returns:
+            Dictionary with the page's results, most relevant first, and the next cursor.
+        
+        Raises:
+            HTTPException: If the cursor is malformed or the database has no full-text support.
+        """
+        offset = decode_offset_cursor(cursor) if cursor else 0
+        terms = SEARCH_TERM.findall(query)
+        if not terms or offset >= settings.SEARCH_MAX_RESULTS:
+            return {"items": [], "next_cursor": None}
+        limit = min(limit, settings.SEARCH_MAX_RESULTS - offset)
+
+        owner_id = None if user.role == "admin" else user.id
+        dialect = db.bind.dialect.name
+        if dialect == "postgresql":
+            hits = self._postgres_hits(query, owner_id)
+        elif dialect == "sqlite":
+            hits = self._sqlite_hits(terms, owner_id)
+        else:
+            raise HTTPException(status_code=501, detail="Full-text search is not supported on this database")
+
+        matches = union_all(*hits).subquery()
+        ranked = (
+            select(matches.c.ticket_id, func.sum(matches.c.rank).label("rank"))
+            .group_by(matches.c.ticket_id)
+            .subquery()
+        )
+        stmt = (
+            select(Ticket.id, Ticket.title, Ticket.status, Ticket.created_at, Ticket.user_id, ranked.c.rank)
+            .join(ranked, ranked.c.ticket_id == Ticket.id)
+            .order_by(ranked.c.rank.desc(), Ticket.id)
+            .offset(offset)
+            .limit(limit + 1)
+        )
+        rows = (await db.execute(stmt)).all()
+
+        items = rows[:limit]
+        more = len(rows) > limit and offset + limit < settings.SEARCH_MAX_RESULTS
+        return {"items": items, "next_cursor": encode_offset_cursor(offset + limit) if more else None}
+
+    def _postgres_hits(self, query: str, owner_id: Optional[UUID]) -> List[Select]:
+        """
+        Build the ticket and message match queries over the GIN-indexed tsvector columns.
+        """
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        ticket_vector = literal_column("tickets.search_vector")
+        message_vector = literal_column("messages.search_vector")
+        ticket_hits = select(
+            Ticket.id.label("ticket_id"), func.ts_rank(ticket_vector, ts_query).label("rank")
+        ).where(ticket_vector.op("@@")(ts_query))
+        message_hits = select(
+            Message.ticket_id.label("ticket_id"), func.ts_rank(message_vector, ts_query).label("rank")
+        ).where(message_vector.op("@@")(ts_query))
+        return self._scoped(ticket_hits, message_hits, owner_id)
+
+    def _sqlite_hits(self, terms: List[str], owner_id: Optional[UUID]) -> List[Select]:
+        """
+        Build the ticket and message match queries over the FTS5 tables.
+        """
+        # Quote every term so user input is never parsed as FTS5 query syntax
+        match = " ".join(f'"{term}"' for term in terms)
+        tickets_fts = table("tickets_fts", column("rowid"))
+        messages_fts = table("messages_fts", column("rowid"))
+        # bm25() is lower for better matches; title matches weigh twice description matches
+        ticket_hits = (
+            select(Ticket.id.label("ticket_id"), (-func.bm25(literal_column("tickets_fts"), 2.0, 1.0)).label("rank"))
+            .select_from(tickets_fts.join(Ticket, literal_column("tickets.rowid") == tickets_fts.c.rowid))
+            .where(literal_column("tickets_fts").op("MATCH")(match))
+        )
+        message_hits = (
+            select(Message.ticket_id.label("ticket_id"), (-func.bm25(literal_column("messages_fts"))).label("rank"))
+            .select_from(messages_fts.join(Message, literal_column("messages.rowid") == messages_fts.c.rowid))
+            .where(literal_column("messages_fts").op("MATCH")(match))
+        )
+        return self._scoped(ticket_hits, message_hits, owner_id)
+
+    def _scoped(self, ticket_hits: Select, message_hits: Select, owner_id: Optional[UUID]) -> List[Select]:
+        """
+        Restrict match queries to one user's tickets, unless owner_id is None.
+        """
+        if owner_id is None:
+            return [ticket_hits, message_hits]
+        return [
+            ticket_hits.where(Ticket.user_id == owner_id),
+            message_hits.join(Ticket, Ticket.id == Message.ticket_id).where(Ticket.user_id == owner_id),
+        ]
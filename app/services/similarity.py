@@ -0,0 +1,293 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.ticket import Ticket
+from app.models.message import Message
+from app.models.archive import ArchivedMessage, ArchivedTicket
+from app.core.config import settings
+from app.utils.database import async_session
+from app.utils.vectorindex import VectorIndex
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+import asyncio
+import importlib
+import logging
+import math
+import numpy as np
+import re
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Status of tickets whose answers are indexed for reuse
+RESOLVED_STATUS = "closed"
+# Re-read changes this far behind the watermark, covering clock skew and late commits
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by do for from has have i in is it its me my no not of on or so "
+    "that the this to was we what when with you your".split()
+)
+
+SUFFIXES = ("ing", "ed", "es", "s")
+
+def stem(word: str) -> str:
+    """
+    Strip a common English suffix so inflections of a word share a feature.
+    """
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+class HashingEmbedder:
+    """
+    Local text embedder hashing stemmed word unigrams and bigrams into a fixed-size vector.
+    
+    Signed feature hashing with sublinear term frequency needs no vocabulary,
+    model download or fitting, so vectors stay comparable as the index grows.
+    Any class with a ``dimension`` attribute and a compatible ``embed`` method
+    can replace it through the SIMILAR_EMBEDDER setting.
+    """
+    def __init__(self, dimension: Optional[int] = None):
+        """
+        Initialize the embedder, defaulting its dimension to the application settings.
+        """
+        self.dimension = dimension or settings.SIMILAR_EMBEDDING_DIM
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed texts as L2-normalized rows.
+        
+        Args:
+            texts: Texts to embed.
+        
+        Returns:
+            float32 matrix with one unit-length row per text (all zeros for texts without words).
+        """
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [stem(word) for word in TOKEN_PATTERN.findall(text.lower()) if word not in STOP_WORDS]
+            counts: Dict[int, int] = {}
+            for feature in words + [f"{first} {second}" for first, second in zip(words, words[1:])]:
+                digest = zlib.crc32(feature.encode())
+                counts[digest] = counts.get(digest, 0) + 1
+            for digest, count in counts.items():
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                matrix[row, digest % self.dimension] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+def load_embedder(path: str):
+    """
+    Instantiate the embedder class named by a "module:Class" path.
+    """
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)()
+
+@dataclass
+class SimilarMatch:
+    """
+    Resolved ticket similar to the one being answered.
+    """
+    ticket_id: UUID  # ID of the resolved ticket
+    score: float  # Cosine similarity to the query
+    title: str  # Title of the resolved ticket
+    answer: str  # Last complete AI answer on the resolved ticket
+    user_id: Optional[UUID]  # Customer who owns the resolved ticket
+
+def ticket_text(title: str, description: str) -> str:
+    return f"{title}\n{description}"
+
+def latest_answer(ticket_id, model=Message):
+    """
+    Select a ticket's last complete AI message.
+    
+    Args:
+        ticket_id: Ticket UUID, or a ticket id column for a correlated subquery.
+        model: Message model to read, Message or ArchivedMessage.
+    """
+    return (
+        select(model.content)
+        .filter(model.ticket_id == ticket_id, model.is_ai.is_(True), model.status == "complete")
+        .order_by(model.created_at.desc(), model.id.desc())
+        .limit(1)
+    )
+
+class SimilarTicketService:
+    """
+    Service class keeping a local vector index of resolved tickets and their answers.
+    
+    Each worker loads closed tickets, live and archived, with their last
+    complete AI answer on startup, then polls tickets whose status changed since its watermark to
+    add newly closed and drop reopened ones. Status changes made by this
+    worker are applied immediately. Searches embed the query and score it
+    against the indexed tickets with one matrix-vector product. Tickets are
+    grouped by the customer who owns them, so a search can be kept to one
+    customer's own history.
+    """
+    def __init__(self, embedder: Any = None):
+        """
+        Initialize the embedder named in settings and an empty index.
+        """
+        self.enabled = settings.SIMILAR_ENABLED
+        self.embedder = embedder or load_embedder(settings.SIMILAR_EMBEDDER)
+        self.index = VectorIndex(self.embedder.dimension)
+        self.watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self.searches = 0
+        self.injected = 0
+        self.reused = 0
+
+    def start(self):
+        """
+        Start loading the index and polling for status changes in the background.
+        """
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        """
+        Stop the background refresh.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def search(
+        self, text: str, exclude: Optional[UUID] = None, user_id: Optional[UUID] = None
+    ) -> List[SimilarMatch]:
+        """
+        Find resolved tickets similar to a text.
+        
+        Args:
+            text: Issue description to match.
+            exclude: Ticket never returned, usually the one being answered.
+            user_id: Only return tickets owned by this customer; None searches every customer's tickets.
+        
+        Returns:
+            Up to SIMILAR_TOP_K matches scoring at least SIMILAR_MIN_SCORE, most similar first.
+        """
+        if not self.enabled or not len(self.index):
+            return []
+        self.searches += 1
+        vector = self.embedder.embed([text])[0]
+        hits = self.index.search(vector, settings.SIMILAR_TOP_K, settings.SIMILAR_MIN_SCORE, exclude, user_id)
+        return [
+            SimilarMatch(ticket_id, score, title, answer, owner)
+            for ticket_id, score, (title, answer, owner) in hits
+        ]
+
+    def format_context(self, matches: List[SimilarMatch]) -> str:
+        """
+        Render matches as a section to append to the system prompt.
+        """
+        limit = settings.SIMILAR_CONTEXT_CHARS
+        lines = ["\n\nAnswers that resolved similar tickets (reuse them where they apply):"]
+        for number, match in enumerate(matches, 1):
+            answer = " ".join(match.answer.split())
+            if len(answer) > limit:
+                answer = answer[:limit].rstrip() + "..."
+            lines.append(f"{number}. Issue: {match.title}\n   Answer: {answer}")
+        return "\n".join(lines)
+
+    async def ticket_changed(self, ticket: Any, db: AsyncSession):
+        """
+        Index a ticket that was just closed, or drop one that was reopened.
+        
+        Args:
+            ticket: Ticket or ArchivedTicket whose status changed.
+            db: Async database session.
+        """
+        if not self.enabled:
+            return
+        answer = None
+        if ticket.status == RESOLVED_STATUS:
+            model = ArchivedMessage if isinstance(ticket, ArchivedTicket) else Message
+            result = await db.execute(latest_answer(ticket.id, model))
+            answer = result.scalar()
+        batch = [(ticket.id, ticket.title, ticket.description, answer, ticket.user_id)]
+        self._apply(batch, self.embedder.embed([ticket_text(ticket.title, ticket.description)]))
+
+    async def refresh(self):
+        """
+        Apply status changes since the watermark; the first call loads every resolved ticket.
+        
+        Archived tickets are closed by definition and only change by being
+        reopened, which goes through ticket_changed, so they are read on the
+        first load only.
+        """
+        started = datetime.utcnow()
+        stmt = select(
+            Ticket.id, Ticket.title, Ticket.description, Ticket.status,
+            latest_answer(Ticket.id).scalar_subquery(), Ticket.user_id,
+        )
+        if self.watermark is None:
+            statements = [
+                stmt.filter(Ticket.status == RESOLVED_STATUS),
+                select(
+                    ArchivedTicket.id, ArchivedTicket.title, ArchivedTicket.description, ArchivedTicket.status,
+                    latest_answer(ArchivedTicket.id, ArchivedMessage).scalar_subquery(), ArchivedTicket.user_id,
+                ).filter(ArchivedTicket.status == RESOLVED_STATUS),
+            ]
+        else:
+            statements = [stmt.filter(Ticket.status_changed_at > self.watermark - REFRESH_OVERLAP)]
+        async with async_session() as db:
+            for stmt in statements:
+                result = await db.stream(stmt.execution_options(yield_per=settings.SIMILAR_LOAD_BATCH))
+                async for rows in result.partitions():
+                    batch = [
+                        (ticket_id, title, description, answer if status == RESOLVED_STATUS else None, user_id)
+                        for ticket_id, title, description, status, answer, user_id in rows
+                    ]
+                    # Embedding is CPU-bound; keep it off the event loop
+                    vectors = await asyncio.to_thread(
+                        self.embedder.embed, [ticket_text(title, description) for _, title, description, _, _ in batch]
+                    )
+                    self._apply(batch, vectors)
+        self.watermark = started
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return index size and usage counters.
+        """
+        return {
+            "enabled": self.enabled,
+            "indexed": len(self.index),
+            "loaded": self.watermark is not None,
+            "searches": self.searches,
+            "injected": self.injected,
+            "reused": self.reused,
+        }
+
+    def _apply(self, batch: List[Tuple[UUID, str, str, Optional[str], Optional[UUID]]], vectors: np.ndarray):
+        """
+        Upsert tickets that have an answer and remove the others.
+        
+        Args:
+            batch: (ticket id, title, description, answer or None, owner id) tuples.
+            vectors: Embeddings of the tickets' text, one row per tuple.
+        """
+        keep = [index for index, (_, _, _, answer, _) in enumerate(batch) if answer]
+        for ticket_id, _, _, answer, _ in batch:
+            if not answer:
+                self.index.remove(ticket_id)
+        if keep:
+            self.index.upsert_many(
+                [batch[index][0] for index in keep],
+                vectors[keep],
+                [(batch[index][1], batch[index][3], batch[index][4]) for index in keep],
+                [batch[index][4] for index in keep],
+            )
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Could not refresh the similar-ticket index")
+            await asyncio.sleep(settings.SIMILAR_REFRESH_SECONDS)
@@ -0,0 +1,240 @@
+from sqlalchemy import case, delete, func, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models.ticket import Ticket
+from app.models.message import Message
+from app.models.archive import ArchivedMessage, ArchivedTicket
+from app.models.stats import GLOBAL_SCOPE, MessageCount, TicketStatusCount
+from app.core.config import settings
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+import random
+import time
+
+def epoch_seconds(moment: datetime) -> float:
+    """
+    Convert a naive UTC timestamp, as stored in created_at columns, to Unix seconds.
+    """
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+class StatsService:
+    """
+    Service class maintaining dashboard counters and reading statistics from them.
+    
+    Ticket and message writes increment per-user and global counter rows in
+    their own transaction, so statistics are read from a handful of rows no
+    matter how many tickets exist. Global counters are sharded over several
+    rows so concurrent writers don't queue on one row lock. rebuild()
+    recomputes every counter from the source tables to repair drift.
+    """
+    def __init__(self, global_shards: Optional[int] = None):
+        """
+        Initialize the service with the number of global counter shards from settings.
+        """
+        self.global_shards = max(1, global_shards or settings.STATS_GLOBAL_SHARDS)
+
+    async def record_tickets(self, db: AsyncSession, user_id: UUID, created: Iterable[datetime], status: str = "open"):
+        """
+        Count new tickets of a user; call before committing the transaction that creates them.
+        
+        Args:
+            db: Async database session of the write.
+            user_id: Owner of the tickets.
+            created: Creation timestamps of the tickets.
+            status: Status the tickets were created with.
+        """
+        created = list(created)
+        if not created:
+            return
+        increments = {"tickets": len(created), "created_epoch_sum": sum(epoch_seconds(moment) for moment in created)}
+        rows = [
+            {"scope_id": user_id, "status": status, "shard": 0, **increments},
+            {"scope_id": GLOBAL_SCOPE, "status": status, "shard": self._global_shard(), **increments},
+        ]
+        await self._increment(db, TicketStatusCount, ("scope_id", "status", "shard"), rows, tuple(increments))
+
+    async def record_status_change(
+        self, db: AsyncSession, user_id: UUID, created_at: datetime, old_status: str, new_status: str
+    ):
+        """
+        Move a ticket between status counters; call before committing the status change.
+        
+        Args:
+            db: Async database session of the write.
+            user_id: Owner of the ticket.
+            created_at: Creation timestamp of the ticket.
+            old_status: Status the ticket had.
+            new_status: Status the ticket has now.
+        """
+        epoch = epoch_seconds(created_at)
+        shard = self._global_shard()
+        rows = [
+            {"scope_id": scope, "status": status, "shard": scope_shard, "tickets": sign, "created_epoch_sum": sign * epoch}
+            for scope, scope_shard in ((user_id, 0), (GLOBAL_SCOPE, shard))
+            for status, sign in ((old_status, -1), (new_status, 1))
+        ]
+        await self._increment(db, TicketStatusCount, ("scope_id", "status", "shard"), rows, ("tickets", "created_epoch_sum"))
+
+    async def record_messages(self, db: AsyncSession, user_id: UUID, ai: int = 0, human: int = 0):
+        """
+        Count new messages on a user's tickets; call before committing the transaction that creates them.
+        
+        Args:
+            db: Async database session of the write.
+            user_id: Owner of the tickets the messages were added to.
+            ai: AI-generated messages added.
+            human: Customer messages added.
+        """
+        if not ai and not human:
+            return
+        increments = {"ai_messages": ai, "human_messages": human}
+        rows = [
+            {"scope_id": user_id, "shard": 0, **increments},
+            {"scope_id": GLOBAL_SCOPE, "shard": self._global_shard(), **increments},
+        ]
+        await self._increment(db, MessageCount, ("scope_id", "shard"), rows, tuple(increments))
+
+    async def get_stats(self, db: AsyncSession, user_id: UUID = GLOBAL_SCOPE) -> Dict[str, Any]:
+        """
+        Read dashboard statistics from the counter rows.
+        
+        Args:
+            db: Async database session.
+            user_id: User to report on; GLOBAL_SCOPE for all users.
+        
+        Returns:
+            Ticket counts by status, open ticket age and AI versus human message counts.
+        """
+        result = await db.execute(
+            select(
+                TicketStatusCount.status,
+                func.sum(TicketStatusCount.tickets),
+                func.sum(TicketStatusCount.created_epoch_sum),
+            )
+            .filter(TicketStatusCount.scope_id == user_id)
+            .group_by(TicketStatusCount.status)
+        )
+        by_status, open_count, open_epoch_sum = {}, 0, 0.0
+        for status, count, epoch_sum in result.all():
+            if count:
+                by_status[status] = int(count)
+            if status == "open":
+                open_count, open_epoch_sum = int(count or 0), float(epoch_sum or 0.0)
+
+        result = await db.execute(
+            select(func.sum(MessageCount.ai_messages), func.sum(MessageCount.human_messages))
+            .filter(MessageCount.scope_id == user_id)
+        )
+        ai, human = (int(value or 0) for value in result.one())
+
+        average_age = time.time() - open_epoch_sum / open_count if open_count else None
+        return {
+            "tickets": {"total": sum(by_status.values()), "by_status": by_status},
+            "open_tickets": {"count": open_count, "average_age_seconds": average_age},
+            "messages": {
+                "total": ai + human,
+                "ai": ai,
+                "human": human,
+                "ai_ratio": ai / (ai + human) if ai + human else None,
+            },
+        }
+
+    async def rebuild(self, db: AsyncSession) -> Dict[str, Any]:
+        """
+        Recompute every counter from the live and archived tickets and messages and commit.
+        
+        On PostgreSQL the counter tables are locked for the rebuild, so writes
+        committing meanwhile wait and are counted on top of the new values.
+        
+        Args:
+            db: Async database session.
+        
+        Returns:
+            Global ticket and message totals before and after the rebuild.
+        """
+        before = await self.get_stats(db)
+        if db.bind.dialect.name == "postgresql":
+            await db.execute(text("LOCK TABLE ticket_status_counts, message_counts IN EXCLUSIVE MODE"))
+        await db.execute(delete(TicketStatusCount))
+        await db.execute(delete(MessageCount))
+
+        # Per (scope, status): [tickets, created_epoch_sum]; per scope: [ai, human]
+        ticket_totals: Dict[Tuple[UUID, str], List[float]] = {}
+        message_totals: Dict[UUID, List[int]] = {GLOBAL_SCOPE: [0, 0]}
+        # Archived tickets still count, so both the live and the archive tables are read
+        for ticket_model, message_model in ((Ticket, Message), (ArchivedTicket, ArchivedMessage)):
+            status = func.coalesce(ticket_model.status, "open")
+            result = await db.execute(
+                select(ticket_model.user_id, status, func.count(), func.sum(self._epoch(db, ticket_model.created_at)))
+                .group_by(ticket_model.user_id, status)
+            )
+            for user_id, ticket_status, count, epoch_sum in result.all():
+                for scope in (user_id, GLOBAL_SCOPE) if user_id is not None else (GLOBAL_SCOPE,):
+                    totals = ticket_totals.setdefault((scope, ticket_status), [0, 0.0])
+                    totals[0] += count
+                    totals[1] += float(epoch_sum or 0.0)
+
+            is_ai = func.coalesce(message_model.is_ai, False)
+            result = await db.execute(
+                select(
+                    ticket_model.user_id,
+                    func.sum(case((is_ai, 1), else_=0)),
+                    func.sum(case((is_ai, 0), else_=1)),
+                )
+                .select_from(message_model)
+                .join(ticket_model, ticket_model.id == message_model.ticket_id)
+                .group_by(ticket_model.user_id)
+            )
+            for user_id, ai, human in result.all():
+                for scope in (user_id, GLOBAL_SCOPE) if user_id is not None else (GLOBAL_SCOPE,):
+                    totals = message_totals.setdefault(scope, [0, 0])
+                    totals[0] += ai
+                    totals[1] += human
+
+        ticket_rows: List[Dict[str, Any]] = [
+            {"scope_id": scope, "status": ticket_status, "shard": 0, "tickets": count, "created_epoch_sum": epoch_sum}
+            for (scope, ticket_status), (count, epoch_sum) in ticket_totals.items()
+        ]
+        message_rows: List[Dict[str, Any]] = [
+            {"scope_id": scope, "shard": 0, "ai_messages": ai, "human_messages": human}
+            for scope, (ai, human) in message_totals.items()
+        ]
+
+        if ticket_rows:
+            await db.execute(TicketStatusCount.__table__.insert(), ticket_rows)
+        await db.execute(MessageCount.__table__.insert(), message_rows)
+        await db.commit()
+
+        after = await self.get_stats(db)
+        return {
+            "before": {"tickets": before["tickets"]["by_status"], "messages": before["messages"]},
+            "after": {"tickets": after["tickets"]["by_status"], "messages": after["messages"]},
+        }
+
+    def _global_shard(self) -> int:
+        return random.randrange(self.global_shards)
+
+    async def _increment(
+        self, db: AsyncSession, model, keys: Tuple[str, ...], rows: List[Dict[str, Any]], columns: Tuple[str, ...]
+    ):
+        """
+        Add to counter rows with one INSERT ... ON CONFLICT DO UPDATE, creating missing rows.
+        """
+        insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+        stmt = insert(model).values(rows)
+        table = model.__table__
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + stmt.excluded[name] for name in columns},
+        )
+        await db.execute(stmt)
+
+    def _epoch(self, db: AsyncSession, column):
+        """
+        SQL expression converting a naive UTC timestamp column to Unix seconds.
+        """
+        if db.bind.dialect.name == "postgresql":
+            return func.extract("epoch", column)
+        return (func.julianday(column) - 2440587.5) * 86400.0
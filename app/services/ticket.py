@@ -1,16 +1,49 @@
+from sqlalchemy import func, insert, literal, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from pydantic import ValidationError
 from app.models.ticket import Ticket
 from app.models.message import Message
-from app.schemas.ticket import TicketCreate
+from app.models.archive import ArchivedMessage, ArchivedTicket
+from app.schemas.ticket import TicketCreate, TicketStatusUpdate, TicketSummary
 from app.schemas.message import MessageCreate
+from app.schemas.bulk import BulkMessageItem
 from app.models.user import User
+from app.services.stats import StatsService
+from app.services.retention import RetentionService
+from app.utils.pagination import encode_cursor, fetch_keyset_page
 from fastapi import HTTPException, status
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID, uuid4
+
+# Columns a ticket listing may project; id and created_at are always read for cursors
+TICKET_LIST_FIELDS = tuple(TicketSummary.model_fields)
+# Columns of a message inserted by add_message; ticket_id comes from the ownership check
+MESSAGE_INSERT_COLUMNS = ("id", "content", "is_ai", "status", "created_at", "ticket_id")
+
+def _describe_validation_error(exc: ValidationError) -> str:
+    """
+    Flatten a pydantic validation error into a short per-item message.
+    """
+    return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in exc.errors())
 
 class TicketService:
     """
     Service class for managing ticket and message operations.
+    Writes update the dashboard counters in the same transaction. Archived
+    tickets are read from the archive tables when asked for explicitly and
+    move back to the live tables when reopened.
     """
+    def __init__(self):
+        """
+        Initialize the statistics service whose counters ticket writes maintain
+        and the retention service owning the archive.
+        """
+        self.stats = StatsService()
+        self.retention = RetentionService()
+
     async def create_ticket(self, ticket_data: TicketCreate, user: User, db: AsyncSession):
         """
         Create a new support ticket for the authenticated user.
@@ -23,27 +56,68 @@ class TicketService:
         Returns:
             Created ticket object.
         """
-        ticket = Ticket(**ticket_data.dict(), user_id=user.id)
-        db.add(ticket)
+        # INSERT ... RETURNING yields the row with its defaults, so no refresh follows the commit
+        result = await db.scalars(insert(Ticket).values(**ticket_data.model_dump(), user_id=user.id).returning(Ticket))
+        ticket = result.one()
+        await self.stats.record_tickets(db, user.id, [ticket.created_at], ticket.status)
         await db.commit()
-        await db.refresh(ticket)
         return ticket
 
-    async def get_tickets(self, user: User, db: AsyncSession):
+    async def get_tickets(
+        self,
+        user: User,
+        db: AsyncSession,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        fields: Optional[Iterable[str]] = None,
+        archived: bool = False,
+    ):
         """
-        Retrieve all tickets for the authenticated user.
+        Retrieve one keyset-paginated page of tickets for the authenticated user, newest first.
         
         Args:
             user: Authenticated user.
             db: Async database session.
+            limit: Maximum number of tickets to return.
+            cursor: Opaque cursor from a previous page, if any.
+            status: Only return tickets with this status.
+            created_after: Only return tickets created at or after this time.
+            created_before: Only return tickets created before this time.
+            fields: Ticket fields to include in each item; all fields if omitted.
+            archived: List archived tickets instead of live ones.
         
         Returns:
-            List of ticket objects.
+            Dictionary with the page items and the next/prev cursors.
+        
+        Raises:
+            HTTPException: If an unknown field is requested or the cursor is invalid.
         """
-        result = await db.execute(select(Ticket).filter(Ticket.user_id == user.id))
-        return result.scalars().all()
+        selected = list(fields) if fields else list(TICKET_LIST_FIELDS)
+        unknown = [name for name in selected if name not in TICKET_LIST_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
 
-    async def get_ticket(self, ticket_id: UUID, user: User, db: AsyncSession):
+        # Only read the projected columns, plus the sort key needed for cursors
+        model = ArchivedTicket if archived else Ticket
+        columns = {name: getattr(model, name) for name in ("id", "created_at", *selected)}
+        stmt = select(*columns.values()).filter(model.user_id == user.id)
+        if status is not None:
+            stmt = stmt.filter(model.status == status)
+        if created_after is not None:
+            stmt = stmt.filter(model.created_at >= created_after)
+        if created_before is not None:
+            stmt = stmt.filter(model.created_at < created_before)
+
+        rows, next_cursor, prev_cursor = await fetch_keyset_page(
+            db, stmt, model.created_at, model.id, limit=limit, cursor=cursor
+        )
+        items = [{name: getattr(row, name) for name in selected} for row in rows]
+        return {"items": items, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
+    async def get_ticket(self, ticket_id: UUID, user: User, db: AsyncSession, include_archived: bool = False):
         """
         Retrieve a specific ticket by ID, ensuring it belongs to the user.
         
@@ -51,23 +125,188 @@ class TicketService:
             ticket_id: UUID of the ticket.
             user: Authenticated user.
             db: Async database session.
+            include_archived: Fall back to the archive if the ticket is not live.
         
         Returns:
-            Ticket object.
+            Ticket object, or ArchivedTicket object for an archived ticket.
         
         Raises:
             HTTPException: If ticket is not found or doesn't belong to the user.
         """
         result = await db.execute(select(Ticket).filter(Ticket.id == ticket_id, Ticket.user_id == user.id))
         ticket = result.scalars().first()
+        if not ticket and include_archived:
+            result = await db.execute(
+                select(ArchivedTicket).filter(ArchivedTicket.id == ticket_id, ArchivedTicket.user_id == user.id)
+            )
+            ticket = result.scalars().first()
         if not ticket:
             raise HTTPException(status_code=404, detail="Ticket not found")
         return ticket
 
+    async def get_visible_ticket(self, ticket_id: UUID, user: User, db: AsyncSession, include_archived: bool = False):
+        """
+        Retrieve a ticket the user may view: their own, one an agent has claimed, or any ticket for admins.
+        
+        Args:
+            ticket_id: UUID of the ticket.
+            user: Authenticated user.
+            db: Async database session.
+            include_archived: Fall back to the archive if the ticket is not live.
+        
+        Returns:
+            Ticket object, or ArchivedTicket object for an archived ticket.
+        
+        Raises:
+            HTTPException: If ticket is not found or is not visible to the user.
+        """
+        if user.role == "agent":
+            ticket = await db.get(Ticket, ticket_id)
+            if ticket is not None and ticket.assigned_to == user.id:
+                return ticket
+        if user.role != "admin":
+            return await self.get_ticket(ticket_id, user, db, include_archived)
+        ticket = await db.get(Ticket, ticket_id)
+        if not ticket and include_archived:
+            ticket = await db.get(ArchivedTicket, ticket_id)
+        if not ticket:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        return ticket
+
+    async def update_status(self, ticket_id: UUID, status_update: TicketStatusUpdate, user: User, db: AsyncSession):
+        """
+        Change a ticket's status, e.g. close it once resolved.
+        
+        Reopening an archived ticket moves it and its messages back to the live tables.
+        Closing a ticket ends any agent claim on it. The change is a conditional
+        UPDATE on the status that was read, so of two concurrent identical
+        changes only one moves the dashboard counters.
+        
+        Args:
+            ticket_id: UUID of the ticket.
+            status_update: New status.
+            user: Authenticated user; agents may update tickets they claimed, admins any ticket.
+            db: Async database session.
+        
+        Returns:
+            Updated ticket object.
+        
+        Raises:
+            HTTPException: If ticket is not found or is not visible to the user.
+        """
+        ticket = await self.get_visible_ticket(ticket_id, user, db, include_archived=True)
+        if isinstance(ticket, ArchivedTicket):
+            if status_update.status == ticket.status:
+                return ticket
+            ticket = await self.retention.restore(ticket.id, db)
+        values: Dict[str, Any] = {"status": status_update.status}
+        if status_update.status == "closed":
+            values.update(assigned_to=None, lease_expires_at=None)
+        while True:
+            old_status = ticket.status or "open"
+            if old_status == status_update.status:
+                return ticket
+            result = await db.scalars(
+                update(Ticket)
+                .where(Ticket.id == ticket.id, func.coalesce(Ticket.status, "open") == old_status)
+                .values(**values, status_changed_at=datetime.utcnow())
+                .returning(Ticket)
+                .execution_options(populate_existing=True)
+            )
+            changed = result.first()
+            if changed is not None:
+                await self.stats.record_status_change(db, changed.user_id, changed.created_at, old_status, changed.status)
+                await db.commit()
+                return changed
+            # Another request changed the status first; start again from the status it left
+            ticket = await db.get(Ticket, ticket.id, populate_existing=True)
+            if ticket is None:
+                raise HTTPException(status_code=404, detail="Ticket not found")
+
+    async def get_messages(
+        self,
+        ticket_id: UUID,
+        user: User,
+        db: AsyncSession,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        after: Optional[UUID] = None,
+    ):
+        """
+        Retrieve one keyset-paginated page of a ticket's messages in creation order.
+        
+        Passing the id of the newest message a client holds as ``after`` returns
+        only newer messages, so polling costs one index range scan. Messages
+        keep their place in the conversation; an AI message returned while
+        still streaming is re-read with get_message until it settles.
+        
+        Args:
+            ticket_id: UUID of the ticket.
+            user: Authenticated user; admins may read any ticket.
+            db: Async database session.
+            limit: Maximum number of messages to return.
+            cursor: Opaque cursor from a previous page, if any.
+            after: Only return messages created after this message.
+        
+        Returns:
+            Dictionary with the page items and the next/prev cursors.
+        
+        Raises:
+            HTTPException: If the ticket or the ``after`` message is not found, or the cursor is invalid.
+        """
+        ticket = await self.get_visible_ticket(ticket_id, user, db, include_archived=True)
+        # Archived conversations are paged from the archive table with the same keyset
+        model = ArchivedMessage if isinstance(ticket, ArchivedTicket) else Message
+        if after is not None and cursor is None:
+            result = await db.execute(
+                select(model.created_at).filter(model.id == after, model.ticket_id == ticket_id)
+            )
+            created_at = result.scalar()
+            if created_at is None:
+                raise HTTPException(status_code=404, detail="Message not found")
+            cursor = encode_cursor(created_at, after, "next")
+
+        stmt = select(
+            model.id, model.content, model.is_ai, model.status, model.created_at, model.ticket_id
+        ).filter(model.ticket_id == ticket_id)
+        rows, next_cursor, prev_cursor = await fetch_keyset_page(
+            db, stmt, model.created_at, model.id, limit=limit, cursor=cursor, descending=False
+        )
+        # Rows are validated straight into MessageOut by attribute, without ORM objects
+        return {"items": rows, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
+    async def get_message(self, ticket_id: UUID, message_id: UUID, user: User, db: AsyncSession):
+        """
+        Retrieve one message of a ticket, e.g. to re-read an AI message that was still streaming.
+        
+        Args:
+            ticket_id: UUID of the ticket.
+            message_id: UUID of the message.
+            user: Authenticated user; admins may read any ticket.
+            db: Async database session.
+        
+        Returns:
+            Message or ArchivedMessage object.
+        
+        Raises:
+            HTTPException: If the ticket or message is not found.
+        """
+        ticket = await self.get_visible_ticket(ticket_id, user, db, include_archived=True)
+        model = ArchivedMessage if isinstance(ticket, ArchivedTicket) else Message
+        result = await db.execute(select(model).filter(model.id == message_id, model.ticket_id == ticket_id))
+        message = result.scalars().first()
+        if message is None:
+            raise HTTPException(status_code=404, detail="Message not found")
+        return message
+
     async def add_message(self, ticket_id: UUID, message_data: MessageCreate, user: User, db: AsyncSession):
         """
         Add a message to a specific ticket.
         
+        The ownership check is folded into a single INSERT ... SELECT that only
+        produces a row for a live ticket of the user; the ticket is looked up
+        separately only to explain a rejected insert.
+        
         Args:
             ticket_id: UUID of the ticket.
             message_data: Message creation data (content).
@@ -76,10 +315,127 @@ class TicketService:
         
         Returns:
             Created message object.
+        
+        Raises:
+            HTTPException: If ticket is not found, or 409 if it is archived.
         """
-        ticket = await self.get_ticket(ticket_id, user, db)
-        message = Message(**message_data.dict(), ticket_id=ticket.id)
-        db.add(message)
+        message = Message(
+            id=uuid4(), content=message_data.content, is_ai=False, status="complete",
+            created_at=datetime.utcnow(), ticket_id=ticket_id,
+        )
+        owned = select(
+            *(literal(getattr(message, name), getattr(Message, name).type) for name in MESSAGE_INSERT_COLUMNS[:-1]),
+            Ticket.id,
+        ).filter(Ticket.id == ticket_id, Ticket.user_id == user.id)
+        try:
+            result = await db.execute(
+                insert(Message).from_select(MESSAGE_INSERT_COLUMNS, owned).returning(Message.id)
+            )
+            inserted = result.scalar()
+        except IntegrityError:
+            # The ticket was archived between the statement's snapshot and its foreign key check
+            await db.rollback()
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        if inserted is None:
+            ticket = await self.get_ticket(ticket_id, user, db, include_archived=True)
+            if isinstance(ticket, ArchivedTicket):
+                raise HTTPException(status_code=409, detail="Ticket is archived; reopen it to add messages")
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        await self.stats.record_messages(db, user.id, human=1)
         await db.commit()
-        await db.refresh(message)
-        return message
\ No newline at end of file
+        return message
+
+    async def bulk_create_tickets(self, items: List[Dict[str, Any]], user: User, db: AsyncSession):
+        """
+        Create many tickets for the authenticated user in one transaction.
+        
+        Invalid items are reported and skipped; valid ones are inserted with a
+        single multi-row INSERT ... RETURNING.
+        
+        Args:
+            items: Raw ticket payloads (title, description).
+            user: Authenticated user.
+            db: Async database session.
+        
+        Returns:
+            Dictionary with created/failed counts and per-item results.
+        """
+        results: List[Dict[str, Any]] = [None] * len(items)
+        rows, indexes = [], []
+        for index, item in enumerate(items):
+            try:
+                ticket_data = TicketCreate.model_validate(item)
+            except ValidationError as exc:
+                results[index] = {"index": index, "status": "error", "error": _describe_validation_error(exc)}
+                continue
+            rows.append({**ticket_data.model_dump(), "user_id": user.id})
+            indexes.append(index)
+
+        if rows:
+            result = await db.execute(
+                insert(Ticket).returning(Ticket.id, Ticket.created_at, sort_by_parameter_order=True), rows
+            )
+            created = result.all()
+            for index, (ticket_id, _) in zip(indexes, created):
+                results[index] = {"index": index, "status": "created", "id": ticket_id}
+            await self.stats.record_tickets(db, user.id, [created_at for _, created_at in created])
+            await db.commit()
+        return self._bulk_summary(results)
+
+    async def bulk_add_messages(self, items: List[Dict[str, Any]], user: User, db: AsyncSession):
+        """
+        Add many messages, possibly across several tickets, in one transaction.
+        
+        Ownership is checked once per distinct ticket; messages for missing or
+        foreign tickets and invalid items are reported and skipped.
+        
+        Args:
+            items: Raw message payloads (ticket_id, content).
+            user: Authenticated user.
+            db: Async database session.
+        
+        Returns:
+            Dictionary with created/failed counts, per-item results and the
+            created Message objects under "messages".
+        """
+        results: List[Dict[str, Any]] = [None] * len(items)
+        parsed = []
+        for index, item in enumerate(items):
+            try:
+                parsed.append((index, BulkMessageItem.model_validate(item)))
+            except ValidationError as exc:
+                results[index] = {"index": index, "status": "error", "error": _describe_validation_error(exc)}
+
+        ticket_ids = {message.ticket_id for _, message in parsed}
+        owned = set()
+        if ticket_ids:
+            result = await db.execute(
+                select(Ticket.id).filter(Ticket.id.in_(ticket_ids), Ticket.user_id == user.id)
+            )
+            owned = set(result.scalars().all())
+
+        rows, indexes, messages = [], [], []
+        for index, message in parsed:
+            if message.ticket_id not in owned:
+                results[index] = {"index": index, "status": "error", "error": "Ticket not found"}
+                continue
+            rows.append({"ticket_id": message.ticket_id, "content": message.content, "is_ai": False})
+            indexes.append(index)
+
+        if rows:
+            result = await db.execute(
+                insert(Message).returning(Message, sort_by_parameter_order=True), rows
+            )
+            messages = result.scalars().all()
+            for index, message in zip(indexes, messages):
+                results[index] = {"index": index, "status": "created", "id": message.id}
+            await self.stats.record_messages(db, user.id, human=len(rows))
+            await db.commit()
+        return {**self._bulk_summary(results), "messages": messages}
+
+    def _bulk_summary(self, results: List[Dict[str, Any]]):
+        """
+        Wrap per-item results with created/failed counts.
+        """
+        created = sum(1 for item in results if item["status"] == "created")
+        return {"created": created, "failed": len(results) - created, "results": results}
\ No newline at end of file
@@ -0,0 +1,110 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+class LRUCache:
+    """
+    Bounded in-process cache with least-recently-used eviction and a per-entry TTL.
+    Intended for use from a single event loop, so no locking is performed.
+    """
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            maxsize: Maximum number of entries kept before evicting the least recently used.
+            ttl: Seconds an entry stays valid, or None for no expiry.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for a key, counting a hit or a miss.
+        
+        Args:
+            key: Cache key.
+            default: Value returned when the key is absent or expired.
+        
+        Returns:
+            Cached value or default.
+        """
+        value = self._lookup(key)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Store a value, evicting the least recently used entries beyond maxsize.
+        
+        Args:
+            key: Cache key.
+            value: Value to store.
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove a key from the cache.
+        
+        Args:
+            key: Cache key.
+            default: Value returned when the key is absent.
+        
+        Returns:
+            The removed value or default.
+        """
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        """
+        Remove every entry from the cache.
+        """
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return cache counters for metrics endpoints.
+        """
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _lookup(self, key: Hashable) -> Any:
+        """
+        Return the live value for a key, dropping it if it has expired.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
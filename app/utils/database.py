@@ -1,9 +1,98 @@
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.utils.instrumentation import instrument_engine, record_pool_wait
+from app.utils.metrics import registry
+from typing import Any, Dict
+import asyncio
+import time
 
-# Create async SQLAlchemy engine for PostgreSQL
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+# Alembic revision the models match; bump together with every new migration
+SCHEMA_REVISION = "0012"
+
+# Sync or driverless URLs mapped to the async driver used for the same database
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that records how long checkouts wait for a connection.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - started
+            record_pool_wait(wait)
+            self.checkouts += 1
+            self.total_wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+def async_database_url(url: str) -> str:
+    """
+    Normalize a database URL to its async driver (asyncpg for PostgreSQL, aiosqlite for SQLite).
+    
+    Args:
+        url: Database URL from settings.
+    
+    Returns:
+        URL string using an async driver.
+    """
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    Build create_async_engine keyword arguments from settings for a database URL.
+    
+    Args:
+        url: Async database URL.
+    
+    Returns:
+        Engine keyword arguments.
+    """
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        # SQLite picks its own pool; sizing and recycling don't apply
+        return options
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if make_url(url).get_driver_name() == "asyncpg":
+        # Reuse server-side prepared statements for repeated queries on each connection
+        options["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
+# Create async SQLAlchemy engine with pool settings from configuration
+DATABASE_URL = async_database_url(settings.DATABASE_URL)
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument_engine(engine)
 
 # Configure session factory for async database sessions
 async_session = sessionmaker(
@@ -18,4 +107,76 @@ async def get_db():
     Yields a session and ensures it is closed after use.
     """
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def verify_schema():
+    """
+    Check that the database is migrated to the revision the models expect.
+    
+    A single-row read of alembic_version, much cheaper than reflecting or
+    creating tables on every worker boot.
+    
+    Raises:
+        RuntimeError: If the database is unmigrated or at another revision.
+    """
+    async with engine.connect() as conn:
+        try:
+            revisions = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars().all()
+        except DBAPIError:
+            revisions = []
+    if revisions != [SCHEMA_REVISION]:
+        found = ", ".join(revisions) or "none"
+        raise RuntimeError(
+            f"Database schema revision is {found}, expected {SCHEMA_REVISION}; run 'alembic upgrade head'"
+        )
+
+async def warm_pool(connections: int):
+    """
+    Open pooled connections ahead of the first requests.
+    
+    Args:
+        connections: Connections to open concurrently, capped at the pool size.
+    """
+    pool = engine.sync_engine.pool
+    if hasattr(pool, "size"):
+        connections = min(connections, pool.size())
+
+    async def connect():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    if connections > 0:
+        await asyncio.gather(*(connect() for _ in range(connections)))
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    Report live connection pool statistics.
+    
+    Returns:
+        Pool size, checked-out and overflow connections, and checkout wait times.
+    """
+    pool = engine.sync_engine.pool
+    stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        checkouts = pool.checkouts or 1
+        stats.update(
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            avg_wait_ms=round(pool.total_wait_seconds / checkouts * 1000, 3),
+            max_wait_ms=round(pool.max_wait_seconds * 1000, 3),
+        )
+    return stats
+
+registry.gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool", lambda: pool_stats().get("checked_out")
+)
+registry.gauge("db_pool_overflow", "Overflow connections currently open", lambda: pool_stats().get("overflow"))
+registry.gauge("db_pool_timeouts", "Checkouts that timed out waiting for a connection", lambda: pool_stats().get("timeouts"))
@@ -0,0 +1,109 @@
+import asyncio
+from collections import OrderedDict, deque
+from typing import Any, Deque, Hashable, Tuple
+
+class FairQueue:
+    """
+    Queue that serves tenants round-robin, FIFO within each tenant.
+    
+    A tenant with many queued items only gets one turn per round, so it cannot
+    starve tenants that queue a few. Intended for use from a single event loop.
+    """
+    def __init__(self, maxsize: int = 0):
+        """
+        Initialize an empty queue.
+        
+        Args:
+            maxsize: Maximum items across all tenants, or 0 for unbounded.
+        """
+        self.maxsize = maxsize
+        self._tenants: "OrderedDict[Hashable, Deque[Any]]" = OrderedDict()
+        self._size = 0
+        self._available = asyncio.Event()
+
+    def put_nowait(self, tenant: Hashable, item: Any):
+        """
+        Append an item to a tenant's queue.
+        
+        Raises:
+            asyncio.QueueFull: If the queue holds maxsize items.
+        """
+        if self.full():
+            raise asyncio.QueueFull
+        self._tenants.setdefault(tenant, deque()).append(item)
+        self._size += 1
+        self._available.set()
+
+    def put_front(self, tenant: Hashable, item: Any):
+        """
+        Return an item to the head of the queue, ahead of every tenant's turn.
+        Used when a dequeued item could not be served yet.
+        """
+        self._tenants.setdefault(tenant, deque()).appendleft(item)
+        self._tenants.move_to_end(tenant, last=False)
+        self._size += 1
+        self._available.set()
+
+    def get_nowait(self) -> Tuple[Hashable, Any]:
+        """
+        Remove and return the next item in round-robin tenant order.
+        
+        Returns:
+            Tuple of (tenant, item).
+        
+        Raises:
+            asyncio.QueueEmpty: If no items are queued.
+        """
+        if not self._tenants:
+            raise asyncio.QueueEmpty
+        tenant, items = self._tenants.popitem(last=False)
+        item = items.popleft()
+        if items:
+            # Tenant goes to the back of the rotation
+            self._tenants[tenant] = items
+        self._size -= 1
+        if not self._size:
+            self._available.clear()
+        return tenant, item
+
+    async def get(self) -> Tuple[Hashable, Any]:
+        """
+        Wait for and return the next item in round-robin tenant order.
+        """
+        while not self._size:
+            await self._available.wait()
+        return self.get_nowait()
+
+    def remove(self, tenant: Hashable, item: Any) -> bool:
+        """
+        Remove a specific queued item, e.g. when its waiter gives up.
+        
+        Returns:
+            True if the item was queued and has been removed.
+        """
+        items = self._tenants.get(tenant)
+        if not items or item not in items:
+            return False
+        items.remove(item)
+        if not items:
+            del self._tenants[tenant]
+        self._size -= 1
+        if not self._size:
+            self._available.clear()
+        return True
+
+    def tenant_size(self, tenant: Hashable) -> int:
+        """
+        Return the number of items queued for a tenant.
+        """
+        items = self._tenants.get(tenant)
+        return len(items) if items else 0
+
+    def qsize(self) -> int:
+        return self._size
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
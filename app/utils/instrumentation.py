@@ -0,0 +1,226 @@
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import settings
+from app.utils.metrics import registry
+from typing import Any, Dict, List, Optional
+import logging
+import time
+
+slow_request_logger = logging.getLogger("app.slow_requests")
+
+# Buckets for per-request SQL statement counts
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+# Buckets for streamed tokens per second
+RATE_BUCKETS = (5, 10, 25, 50, 100, 200, 400, 800, 1600)
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from request start until the response is fully sent",
+    ("method", "route", "status"),
+)
+REQUEST_STATEMENTS = registry.histogram(
+    "http_request_db_statements", "SQL statements executed per request", ("method", "route"), STATEMENT_BUCKETS
+)
+REQUEST_DB_SECONDS = registry.histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request", ("method", "route")
+)
+REQUEST_POOL_WAIT = registry.histogram(
+    "http_request_pool_wait_seconds", "Time spent waiting for a pooled connection per request", ("method", "route")
+)
+REQUEST_HASH_SECONDS = registry.histogram(
+    "http_request_password_hash_seconds", "Time spent hashing or verifying passwords per request", ("method", "route")
+)
+STREAM_FIRST_BYTE = registry.histogram(
+    "http_stream_first_byte_seconds", "Time until a streaming response sends its first body bytes", ("route",)
+)
+STREAM_DURATION = registry.histogram(
+    "http_stream_duration_seconds", "Total duration of streaming responses", ("route",)
+)
+DB_STATEMENTS = registry.counter("db_statements_total", "SQL statements executed, including background work")
+DB_STATEMENT_SECONDS = registry.histogram("db_statement_seconds", "Execution time of individual SQL statements")
+LLM_FIRST_TOKEN = registry.histogram(
+    "llm_time_to_first_token_seconds", "Time from the upstream LLM call until its first token", ("model",)
+)
+LLM_STREAM_DURATION = registry.histogram(
+    "llm_stream_duration_seconds", "Total duration of upstream LLM streams", ("model",)
+)
+LLM_TOKENS_PER_SECOND = registry.histogram(
+    "llm_tokens_per_second",
+    "Estimated tokens per second of upstream LLM responses after the first token",
+    ("model",),
+    RATE_BUCKETS,
+)
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "Estimated completion tokens streamed from the upstream LLM", ("model",)
+)
+
+@dataclass
+class RequestStats:
+    """
+    Resource accounting of one HTTP request, collected while it is served.
+    """
+    method: str  # HTTP method
+    path: str  # Raw request path, for the slow-request log
+    started: float = field(default_factory=time.perf_counter)  # perf_counter at request start
+    statements: int = 0  # SQL statements executed
+    db_seconds: float = 0.0  # Time spent executing SQL
+    pool_wait_seconds: float = 0.0  # Time spent waiting for pooled connections
+    hash_seconds: float = 0.0  # Time spent hashing or verifying passwords
+    queries: Dict[str, List[float]] = field(default_factory=dict)  # SQL text -> [count, seconds]
+
+# Accounting of the request being served by the current task, if any
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def record_statement(statement: str, seconds: float):
+    """
+    Account an executed SQL statement to the global metrics and the current request.
+    """
+    DB_STATEMENTS.inc()
+    DB_STATEMENT_SECONDS.observe(seconds)
+    stats = current_request.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.db_seconds += seconds
+    entry = stats.queries.get(statement)
+    if entry is None:
+        stats.queries[statement] = [1, seconds]
+    else:
+        entry[0] += 1
+        entry[1] += seconds
+
+def record_pool_wait(seconds: float):
+    """
+    Account time spent waiting for a pooled connection to the current request.
+    """
+    stats = current_request.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+def record_password_hash(seconds: float):
+    """
+    Account time spent hashing or verifying a password to the current request.
+    """
+    stats = current_request.get()
+    if stats is not None:
+        stats.hash_seconds += seconds
+
+def record_llm_stream(model: str, first_token: Optional[float], duration: float, tokens: int, chunks: int):
+    """
+    Record the timing and size of one upstream LLM stream.
+
+    Args:
+        model: Model the stream was generated by.
+        first_token: Seconds until the first token, or None if no token arrived.
+        duration: Total seconds of the stream.
+        tokens: Estimated completion tokens of the streamed text.
+        chunks: Content chunks streamed; a single chunk gives no streaming rate.
+    """
+    LLM_STREAM_DURATION.observe(duration, model=model)
+    LLM_TOKENS.inc(tokens, model=model)
+    if first_token is None:
+        return
+    LLM_FIRST_TOKEN.observe(first_token, model=model)
+    if chunks > 1 and duration > first_token:
+        LLM_TOKENS_PER_SECOND.observe(tokens / (duration - first_token), model=model)
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    Time every SQL statement executed through an engine.
+
+    Args:
+        engine: Async engine to instrument.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["statement_started"].pop()
+        record_statement(statement, time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        connection = context.connection
+        if connection is not None and connection.info.get("statement_started"):
+            connection.info["statement_started"].pop()
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, SQL, pool and hashing metrics.
+
+    Requests are labelled by route template rather than raw path. Streaming
+    (text/event-stream) responses also record time to first body bytes and
+    total duration. Requests slower than SLOW_REQUEST_SECONDS are logged with
+    their most expensive SQL statements; for streams the time to first bytes
+    is compared instead of the total.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(method=scope["method"], path=scope["path"])
+        token = current_request.set(stats)
+        response: Dict[str, Any] = {"status": 500, "streaming": False, "first_byte": None}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name == b"content-type" and value.startswith(b"text/event-stream"):
+                        response["streaming"] = True
+            elif message["type"] == "http.response.body" and response["first_byte"] is None and message.get("body"):
+                response["first_byte"] = time.perf_counter() - stats.started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self._finish(stats, route, response)
+
+    def _finish(self, stats: RequestStats, route: str, response: Dict[str, Any]):
+        """
+        Record a finished request and log it if it was slow.
+        """
+        duration = time.perf_counter() - stats.started
+        labels = {"method": stats.method, "route": route}
+        REQUEST_DURATION.observe(duration, status=response["status"], **labels)
+        REQUEST_STATEMENTS.observe(stats.statements, **labels)
+        REQUEST_DB_SECONDS.observe(stats.db_seconds, **labels)
+        REQUEST_POOL_WAIT.observe(stats.pool_wait_seconds, **labels)
+        REQUEST_HASH_SECONDS.observe(stats.hash_seconds, **labels)
+
+        latency = duration
+        if response["streaming"]:
+            STREAM_DURATION.observe(duration, route=route)
+            if response["first_byte"] is not None:
+                STREAM_FIRST_BYTE.observe(response["first_byte"], route=route)
+                latency = response["first_byte"]
+        if 0 < settings.SLOW_REQUEST_SECONDS <= latency:
+            self._log_slow(stats, route, response["status"], latency)
+
+    def _log_slow(self, stats: RequestStats, route: str, status: int, latency: float):
+        """
+        Log a slow request with its time breakdown and most expensive SQL statements.
+        """
+        top = sorted(stats.queries.items(), key=lambda item: item[1][1], reverse=True)
+        breakdown = "".join(
+            f"\n  {seconds * 1000:8.1f} ms  x{count:<4} {' '.join(statement.split())[:200]}"
+            for statement, (count, seconds) in top[: settings.SLOW_REQUEST_TOP_QUERIES]
+        )
+        slow_request_logger.warning(
+            "Slow request %s %s (%s) status=%s latency=%.1fms sql=%d/%.1fms pool_wait=%.1fms hashing=%.1fms%s",
+            stats.method, stats.path, route, status, latency * 1000, stats.statements, stats.db_seconds * 1000,
+            stats.pool_wait_seconds * 1000, stats.hash_seconds * 1000, breakdown,
+        )
@@ -0,0 +1,152 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from uuid import UUID
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+@dataclass(frozen=True)
+class Cursor:
+    """
+    Decoded keyset cursor: the (created_at, id) key of a boundary row and the
+    direction to walk from it ("next" or "prev").
+    """
+    created_at: datetime
+    id: UUID
+    direction: str = "next"
+
+def encode_cursor(created_at: datetime, row_id: UUID, direction: str = "next") -> str:
+    """
+    Encode a keyset position as an opaque, URL-safe cursor string.
+    
+    Args:
+        created_at: Creation timestamp of the boundary row.
+        row_id: UUID of the boundary row.
+        direction: "next" to continue past the row, "prev" to go back before it.
+    
+    Returns:
+        Opaque cursor string.
+    """
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(row_id), "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Cursor:
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Args:
+        cursor: Opaque cursor string.
+    
+    Returns:
+        Decoded Cursor.
+    
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = data.get("d", "next")
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return Cursor(datetime.fromisoformat(data["c"]), UUID(data["i"]), direction)
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_offset_cursor(offset: int) -> str:
+    """
+    Encode a result offset as an opaque cursor, for orderings without a stable key (e.g. relevance).
+    
+    Args:
+        offset: Number of results already returned.
+    
+    Returns:
+        Opaque cursor string.
+    """
+    raw = json.dumps({"o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_offset_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by encode_offset_cursor.
+    
+    Args:
+        cursor: Opaque cursor string.
+    
+    Returns:
+        Result offset.
+    
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded.encode()))["o"]
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(offset)
+        return offset
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_keyset_page(
+    db: AsyncSession,
+    stmt: Select,
+    created_col: Any,
+    id_col: Any,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = True,
+) -> Tuple[List[Any], Optional[str], Optional[str]]:
+    """
+    Fetch one page of rows using keyset pagination on (created_col, id_col).
+    
+    The statement must select columns named ``created_at`` and ``id`` so the
+    boundary rows can be turned into cursors. Each page costs one index range
+    scan of ``limit + 1`` rows, independent of how deep the page is.
+    
+    Args:
+        db: Async database session.
+        stmt: Base select statement with filters applied, without ordering or limit.
+        created_col: Timestamp column of the sort key.
+        id_col: Unique tie-breaker column of the sort key.
+        limit: Maximum number of rows to return.
+        cursor: Opaque cursor from a previous page, if any.
+        descending: Whether pages are presented newest first.
+    
+    Returns:
+        Tuple of (rows, next_cursor, prev_cursor).
+    """
+    key = decode_cursor(cursor) if cursor else None
+    backwards = key is not None and key.direction == "prev"
+    # Walking backwards scans the index in the opposite order and flips the result
+    scan_desc = descending != backwards
+
+    if key is not None:
+        position = tuple_(created_col, id_col)
+        boundary = tuple_(key.created_at, key.id)
+        stmt = stmt.where(position < boundary if scan_desc else position > boundary)
+    if scan_desc:
+        stmt = stmt.order_by(created_col.desc(), id_col.desc())
+    else:
+        stmt = stmt.order_by(created_col.asc(), id_col.asc())
+
+    result = await db.execute(stmt.limit(limit + 1))
+    rows = list(result.all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backwards:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        first, last = rows[0], rows[-1]
+        if backwards or has_more:
+            next_cursor = encode_cursor(last.created_at, last.id, "next")
+        if (backwards and has_more) or (not backwards and key is not None):
+            prev_cursor = encode_cursor(first.created_at, first.id, "prev")
+    return rows, next_cursor, prev_cursor
@@ -1,10 +1,16 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from typing import Any, Callable, Dict
 from app.core.config import settings
+from app.utils.instrumentation import record_password_hash
+import asyncio
+import time
 
-# Configure password hashing context using bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Configure password hashing context using bcrypt with a configurable work factor
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 def hash_password(password: str) -> str:
     """
@@ -31,6 +37,128 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     return pwd_context.verify(plain_password, hashed_password)
 
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a dedicated, size-limited thread pool.
+    
+    bcrypt releases the GIL, so offloading it keeps the event loop serving other
+    requests during login/signup bursts. The number of queued plus running jobs
+    is capped; beyond that, requests are rejected with 503 instead of queueing
+    without bound. Queue wait and hashing time are tracked for tuning.
+    """
+    def __init__(self, workers: int, max_pending: int):
+        """
+        Initialize the hasher; the thread pool is created on first use.
+        
+        Args:
+            workers: Number of threads running bcrypt.
+            max_pending: Maximum jobs queued or running at once.
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a plain-text password off the event loop.
+        
+        Args:
+            password: Plain-text password to hash.
+        
+        Returns:
+            Hashed password string.
+        """
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Verify a plain-text password against a hash off the event loop.
+        
+        Args:
+            plain_password: Plain-text password to verify.
+            hashed_password: Hashed password to compare against.
+        
+        Returns:
+            True if the password matches, False otherwise.
+        """
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return queue-depth and timing counters for the hashing pool.
+        """
+        completed = self.completed or 1
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_seconds / completed * 1000, 3),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            "avg_run_ms": round(self.total_run_seconds / completed * 1000, 3),
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        }
+
+    def shutdown(self):
+        """
+        Stop the thread pool, waiting for running jobs to finish.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self, func: Callable, *args) -> Any:
+        """
+        Run a bcrypt call on the pool, enforcing the queue limit and recording timings.
+        
+        Raises:
+            HTTPException: If the pool already has max_pending jobs.
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+        def timed():
+            started = time.perf_counter()
+            return func(*args), started, time.perf_counter()
+
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        submitted = time.perf_counter()
+        job = self._executor.submit(timed)
+        # Free the slot when the thread is done with the job, not when a cancelled request stops waiting
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        result, started, finished = await asyncio.wrap_future(job)
+        wait = started - submitted
+        record_password_hash(finished - started)
+        self.completed += 1
+        self.total_wait_seconds += wait
+        self.total_run_seconds += finished - started
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        return result
+
+    def _release(self):
+        """
+        Free the slot of a job that left the pool, on the event loop thread.
+        """
+        self.pending -= 1
+
+# Shared hashing pool for the application
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
 def create_access_token(data: dict) -> str:
     """
     Create a JWT access token with an expiration time.
@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, AsyncIterator, List, Optional
+
+class Flight:
+    """
+    A single in-flight producer whose output is replayed to any number of subscribers.
+    Subscribers that join late first receive every item produced so far.
+    """
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._changed = asyncio.Condition()
+
+    async def publish(self, item: Any):
+        """
+        Append an item and wake every subscriber.
+        """
+        async with self._changed:
+            self.items.append(item)
+            self._changed.notify_all()
+
+    async def finish(self, error: Optional[BaseException] = None):
+        """
+        Mark the flight as complete, optionally with the error that ended it.
+        """
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """
+        Yield every item of the flight, from the first, until it finishes.
+        
+        Raises:
+            Exception: The producer's error, once all items before it were yielded.
+        """
+        position = 0
+        self.subscribers += 1
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: self.done or position < len(self.items))
+                    pending = self.items[position:]
+                    finished, error = self.done, self.error
+                for item in pending:
+                    yield item
+                position += len(pending)
+                if finished and position >= len(self.items):
+                    if error is not None:
+                        raise error
+                    return
+        finally:
+            self.subscribers -= 1
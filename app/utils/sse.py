@@ -0,0 +1,82 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Optional
+
+# Comment line sent to keep idle connections (and intermediaries) from timing out
+HEARTBEAT = ": heartbeat\n\n"
+
+# Headers that stop proxies from buffering or caching an event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def format_sse(data: Any, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """
+    Frame a payload as a Server-Sent Event.
+    
+    Args:
+        data: JSON-serializable payload.
+        event: Event type; omitted for the default "message" type.
+        event_id: Event ID clients send back as Last-Event-ID when reconnecting.
+    
+    Returns:
+        SSE frame terminated by a blank line.
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event and event != "message":
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    """
+    Parse a Last-Event-ID header, ignoring values this server did not issue.
+    
+    Args:
+        value: Raw header value.
+    
+    Returns:
+        Event ID as an integer, or None.
+    """
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+async def with_heartbeats(items: AsyncIterator[Any], interval: float) -> AsyncIterator[Optional[Any]]:
+    """
+    Re-yield items from an async iterator, yielding None whenever it is idle for too long.
+    
+    The pending read is kept across heartbeats rather than cancelled, so the
+    wrapped iterator is never interrupted mid-item.
+    
+    Args:
+        items: Source async iterator.
+        interval: Seconds of inactivity before a heartbeat is emitted.
+    
+    Yields:
+        Items from the source, or None as a heartbeat marker.
+    """
+    iterator = items.__aiter__()
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield None
+                continue
+            try:
+                item = pending.result()
+            except StopAsyncIteration:
+                return
+            finally:
+                pending = None
+            yield item
+    finally:
+        if pending is not None:
+            pending.cancel()
+        elif hasattr(iterator, "aclose"):
+            # Consumer went away between items: close the source so its cleanup runs now
+            await iterator.aclose()
@@ -0,0 +1,173 @@
+import numpy as np
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+class VectorIndex:
+    """
+    In-memory index of unit-length vectors for exact top-k cosine search.
+    
+    Vectors live in one contiguous float32 matrix that grows by doubling, so a
+    search is a single matrix-vector product plus a partial sort. Removal moves
+    the last row into the freed slot to keep the matrix dense. Entries may carry
+    a group, such as the tenant that owns them, and a search can be confined to
+    one group. Intended for use
+    from a single event loop, so no locking is performed.
+    """
+    def __init__(self, dimension: int, capacity: int = 1024):
+        """
+        Initialize an empty index.
+        
+        Args:
+            dimension: Length of the indexed vectors.
+            capacity: Rows allocated up front; the matrix doubles when full.
+        """
+        self.dimension = dimension
+        self._matrix = np.zeros((max(capacity, 1), dimension), dtype=np.float32)
+        # Integer code of each row's group, -1 for none, so group filters are vectorized
+        self._groups = np.full(max(capacity, 1), -1, dtype=np.int64)
+        self._group_codes: Dict[Hashable, int] = {}
+        self._keys: List[Hashable] = []
+        self._payloads: List[Any] = []
+        self._rows: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rows
+
+    def upsert(self, key: Hashable, vector: np.ndarray, payload: Any = None, group: Optional[Hashable] = None):
+        """
+        Insert or replace the vector and payload stored under a key.
+        
+        Args:
+            key: Identifier of the entry.
+            vector: Unit-length vector of the index dimension.
+            payload: Value returned with search hits.
+            group: Group the entry belongs to, if any.
+        """
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            self._reserve(row + 1)
+            self._rows[key] = row
+            self._keys.append(key)
+            self._payloads.append(payload)
+        else:
+            self._payloads[row] = payload
+        self._matrix[row] = vector
+        self._groups[row] = self._group_code(group)
+
+    def upsert_many(
+        self,
+        keys: Sequence[Hashable],
+        vectors: np.ndarray,
+        payloads: Sequence[Any],
+        groups: Optional[Sequence[Optional[Hashable]]] = None,
+    ):
+        """
+        Insert or replace many entries, copying new vectors into the matrix as one block.
+        
+        Args:
+            keys: Identifiers of the entries.
+            vectors: Matrix with one unit-length row per key.
+            payloads: Values returned with search hits, one per key.
+            groups: Groups of the entries, one per key; None for no groups.
+        """
+        groups = groups if groups is not None else [None] * len(keys)
+        new = [index for index, key in enumerate(keys) if key not in self._rows]
+        for index, key in enumerate(keys):
+            if key in self._rows:
+                self.upsert(key, vectors[index], payloads[index], groups[index])
+        if not new:
+            return
+        start = len(self._keys)
+        self._reserve(start + len(new))
+        self._matrix[start:start + len(new)] = vectors[new]
+        self._groups[start:start + len(new)] = [self._group_code(groups[index]) for index in new]
+        for offset, index in enumerate(new):
+            self._rows[keys[index]] = start + offset
+            self._keys.append(keys[index])
+            self._payloads.append(payloads[index])
+
+    def remove(self, key: Hashable) -> bool:
+        """
+        Remove an entry if present.
+        
+        Args:
+            key: Identifier of the entry.
+        
+        Returns:
+            True if the entry existed.
+        """
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+        last = len(self._keys) - 1
+        if row != last:
+            # Move the last entry into the freed row
+            self._matrix[row] = self._matrix[last]
+            self._groups[row] = self._groups[last]
+            self._keys[row] = self._keys[last]
+            self._payloads[row] = self._payloads[last]
+            self._rows[self._keys[row]] = row
+        self._keys.pop()
+        self._payloads.pop()
+        return True
+
+    def search(
+        self,
+        vector: np.ndarray,
+        k: int,
+        min_score: float = -1.0,
+        exclude: Optional[Hashable] = None,
+        group: Optional[Hashable] = None,
+    ) -> List[Tuple[Hashable, float, Any]]:
+        """
+        Find the entries most similar to a unit-length query vector.
+        
+        Args:
+            vector: Query vector of the index dimension.
+            k: Maximum number of hits.
+            min_score: Lowest cosine similarity returned.
+            exclude: Key never returned, e.g. the entry the query was built from.
+            group: Only return entries of this group; None searches every entry.
+        
+        Returns:
+            (key, score, payload) tuples, most similar first.
+        """
+        count = len(self._keys)
+        if count == 0 or k <= 0:
+            return []
+        if group is not None and group not in self._group_codes:
+            return []
+        scores = self._matrix[:count] @ vector.astype(np.float32, copy=False)
+        if group is not None:
+            scores[self._groups[:count] != self._group_codes[group]] = -np.inf
+        if exclude is not None and exclude in self._rows:
+            scores[self._rows[exclude]] = -np.inf
+        k = min(k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (self._keys[row], float(scores[row]), self._payloads[row])
+            for row in top
+            if scores[row] >= min_score
+        ]
+
+    def _group_code(self, group: Optional[Hashable]) -> int:
+        if group is None:
+            return -1
+        return self._group_codes.setdefault(group, len(self._group_codes))
+
+    def _reserve(self, rows: int):
+        capacity = len(self._matrix)
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        matrix = np.zeros((capacity, self.dimension), dtype=np.float32)
+        matrix[:len(self._keys)] = self._matrix[:len(self._keys)]
+        groups = np.full(capacity, -1, dtype=np.int64)
+        groups[:len(self._keys)] = self._groups[:len(self._keys)]
+        self._matrix = matrix
+        self._groups = groups
@@ -0,0 +1,414 @@
+"""
+Offline load and latency benchmark of the API.
+
+Boots app.main:app under uvicorn on a local port, against a throwaway SQLite
+database (or any database given with --database-url), with the AI service's
+client swapped for the deterministic fake streaming LLM. Scripted scenarios
+are then run over real HTTP:
+
+    signup          concurrent registrations
+    login           concurrent logins of the registered users
+    create_ticket   ticket creation, seeding the later scenarios
+    list_tickets    first page of each user's ticket listing
+    post_message    messages posted to every ticket
+    ai_stream       concurrent AI response streams (with time to first token)
+
+Each scenario reports p50/p95/p99 latency, requests/sec, errors, SQL
+queries per request and database round trips (statements plus commits) per
+request; results are written as JSON and can be compared with a previous run.
+With --db-latency-ms every round trip to the SQLite database is delayed, which
+emulates a database across the network.
+
+Usage:
+    python -m benchmarks.loadtest [--users 50] [--concurrency 25] [--streams 20]
+        [--tokens-per-second 50] [--database-url URL] [--db-latency-ms MS]
+        [--output FILE] [--baseline FILE]
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+
+# Metrics compared against a baseline run; lower is better for all but rps
+COMPARED_METRICS = (
+    "rps", "p50_ms", "p95_ms", "p99_ms", "ttft_p50_ms", "ttft_p95_ms", "queries_per_request",
+    "round_trips_per_request",
+)
+
+def configure_environment(args: argparse.Namespace):
+    """
+    Point the application settings at the benchmark database and the fake LLM.
+    Must run before any app module is imported.
+    """
+    database_url = args.database_url
+    if database_url is None:
+        database_url = f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='support-bench-')}/bench.db"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["AI_PROVIDER"] = "fake"
+    os.environ["DB_SCHEMA_CHECK"] = "create"
+    os.environ["AI_FAKE_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["AI_FAKE_RESPONSE_TOKENS"] = str(args.response_tokens)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    os.environ.setdefault("GROQ_API_KEY", "unused")
+    # Keep client-side provider limits out of the way unless explicitly configured
+    os.environ.setdefault("AI_RATE_REQUESTS_PER_MINUTE", "1000000")
+    os.environ.setdefault("AI_RATE_TOKENS_PER_MINUTE", "1000000000")
+    os.environ.setdefault("AI_CONCURRENCY_INITIAL", str(args.streams))
+    os.environ.setdefault("AI_CONCURRENCY_MAX", str(max(args.streams, 32)))
+    os.environ.setdefault("AI_ADMISSION_MAX_QUEUED_PER_USER", str(args.streams))
+    if args.bcrypt_rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of a list of values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def milliseconds(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value * 1000, 3)
+
+@dataclass
+class ScenarioResult:
+    """
+    Raw measurements of one scenario.
+    """
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    first_tokens: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+    queries: int = 0
+    round_trips: int = 0
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Aggregate the measurements into the reported metrics.
+        """
+        requests = len(self.latencies) + self.errors
+        summary = {
+            "requests": requests,
+            "errors": self.errors,
+            "rps": round(len(self.latencies) / self.elapsed, 2) if self.elapsed else None,
+            "p50_ms": milliseconds(percentile(self.latencies, 0.50)),
+            "p95_ms": milliseconds(percentile(self.latencies, 0.95)),
+            "p99_ms": milliseconds(percentile(self.latencies, 0.99)),
+            "max_ms": milliseconds(max(self.latencies)) if self.latencies else None,
+            "queries_per_request": round(self.queries / requests, 2) if requests else None,
+            "round_trips_per_request": round(self.round_trips / requests, 2) if requests else None,
+        }
+        if self.first_tokens:
+            summary.update(
+                ttft_p50_ms=milliseconds(percentile(self.first_tokens, 0.50)),
+                ttft_p95_ms=milliseconds(percentile(self.first_tokens, 0.95)),
+                ttft_p99_ms=milliseconds(percentile(self.first_tokens, 0.99)),
+            )
+        return summary
+
+class QueryCounter:
+    """
+    Counts SQL statements and commits executed by the application's engine.
+    """
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        self.commits = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._count)
+        event.listen(engine.sync_engine, "commit", self._commit)
+
+    @property
+    def round_trips(self) -> int:
+        return self.count + self.commits
+
+    def _count(self, *args):
+        self.count += 1
+
+    def _commit(self, *args):
+        self.commits += 1
+
+def emulate_database_latency(seconds: float):
+    """
+    Delay each statement, commit and rollback sent to SQLite by a network round trip.
+    
+    The delay is awaited on the server's event loop, as a remote database's
+    reply would be, so it costs latency but not throughput of other requests.
+    """
+    import aiosqlite
+
+    def delayed(method):
+        async def call(self, *args, **kwargs):
+            await asyncio.sleep(seconds)
+            return await method(self, *args, **kwargs)
+        return call
+
+    for cls, names in ((aiosqlite.Cursor, ("execute", "executemany")), (aiosqlite.Connection, ("commit", "rollback"))):
+        for name in names:
+            setattr(cls, name, delayed(getattr(cls, name)))
+
+async def run_scenario(
+    name: str,
+    calls: List[Callable[[], Awaitable[Optional[float]]]],
+    concurrency: int,
+    counter: QueryCounter,
+) -> ScenarioResult:
+    """
+    Run calls with bounded concurrency, timing each one.
+    
+    Args:
+        name: Scenario name.
+        calls: Coroutine functions performing one request each; they may return a time to first token.
+        concurrency: Maximum calls in flight.
+        counter: SQL statement counter of the application engine.
+    
+    Returns:
+        Measurements of the scenario.
+    """
+    result = ScenarioResult(name)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def timed(call):
+        async with limit:
+            started = time.perf_counter()
+            try:
+                first_token = await call()
+            except Exception:
+                result.errors += 1
+                return
+            result.latencies.append(time.perf_counter() - started)
+            if first_token is not None:
+                result.first_tokens.append(first_token)
+
+    queries_before, round_trips_before = counter.count, counter.round_trips
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(call) for call in calls))
+    result.elapsed = time.perf_counter() - started
+    result.queries = counter.count - queries_before
+    result.round_trips = counter.round_trips - round_trips_before
+    print(f"{name:<15}{json.dumps(result.summary())}")
+    return result
+
+async def stream_response(client, path: str, headers: Dict[str, str]) -> float:
+    """
+    Read an SSE response to the end and return the time to its first content event.
+    """
+    started = time.perf_counter()
+    first_token = None
+    async with client.stream("GET", path, headers=headers) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if first_token is None and line.startswith('data: {"content"'):
+                first_token = time.perf_counter() - started
+            if line.startswith("event: error") or line.startswith("event: aborted"):
+                raise RuntimeError(f"Stream ended with {line}")
+    if first_token is None:
+        raise RuntimeError("Stream produced no content")
+    return first_token
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Boot the application, run every scenario and return the results document.
+    """
+    import httpx
+    import uvicorn
+    from app.main import app
+    from app.api.endpoints import tickets
+    from app.services.llm import FakeLLMClient, LLMProvider, LLMRouter
+    from app.utils.database import engine
+
+    tickets.ai_service.router = LLMRouter([LLMProvider("fake", FakeLLMClient(
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        first_token_delay=args.first_token_delay,
+    ))])
+    counter = QueryCounter(engine)
+    if args.db_latency_ms:
+        if engine.dialect.name != "sqlite":
+            raise SystemExit("--db-latency-ms only applies to the SQLite database")
+        emulate_database_latency(args.db_latency_ms / 1000)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    # The server gets its own thread and event loop, so the load generator does not share its loop
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="on"))
+    serving = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    serving.start()
+    while not server.started:
+        if not serving.is_alive():
+            raise RuntimeError("Server failed to start")
+        await asyncio.sleep(0.05)
+
+    run_id = int(time.time())
+    users = [(f"bench-{run_id}-{i}@example.com", f"password-{i}") for i in range(args.users)]
+    tokens: Dict[str, str] = {}
+    ticket_ids: Dict[str, List[str]] = {email: [] for email, _ in users}
+    results: Dict[str, ScenarioResult] = {}
+    limits = httpx.Limits(max_connections=args.concurrency + args.streams)
+
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits) as client:
+            def auth(email: str) -> Dict[str, str]:
+                return {"Authorization": f"Bearer {tokens[email]}"}
+
+            def signup(email: str, password: str):
+                async def call():
+                    response = await client.post("/auth/signup", json={"email": email, "password": password})
+                    response.raise_for_status()
+                    tokens[email] = response.json()["access_token"]
+                return call
+
+            def login(email: str, password: str):
+                async def call():
+                    response = await client.post("/auth/login", params={"email": email, "password": password})
+                    response.raise_for_status()
+                    tokens[email] = response.json()["access_token"]
+                return call
+
+            def create_ticket(email: str, index: int):
+                async def call():
+                    response = await client.post(
+                        "/tickets/",
+                        # Distinct prompts per ticket, so AI streams are not served from the response cache
+                        json={"title": f"Printer issue {index}", "description": f"Printer {index} of {email} shows error"},
+                        headers=auth(email),
+                    )
+                    response.raise_for_status()
+                    ticket_ids[email].append(response.json()["id"])
+                return call
+
+            def list_tickets(email: str):
+                async def call():
+                    response = await client.get("/tickets/", params={"limit": 50}, headers=auth(email))
+                    response.raise_for_status()
+                return call
+
+            def post_message(email: str, ticket_id: str):
+                async def call():
+                    response = await client.post(
+                        f"/tickets/{ticket_id}/messages",
+                        json={"content": "It still does not work after restarting."},
+                        headers=auth(email),
+                    )
+                    response.raise_for_status()
+                return call
+
+            def ai_stream(email: str, ticket_id: str):
+                async def call():
+                    return await stream_response(client, f"/tickets/{ticket_id}/ai-response", auth(email))
+                return call
+
+            run = lambda name, calls, concurrency=args.concurrency: run_scenario(name, calls, concurrency, counter)
+            results["signup"] = await run("signup", [signup(*user) for user in users])
+            results["login"] = await run("login", [login(*user) for user in users if user[0] in tokens])
+            active = [email for email, _ in users if email in tokens]
+            results["create_ticket"] = await run(
+                "create_ticket", [create_ticket(email, i) for email in active for i in range(args.tickets_per_user)]
+            )
+            results["list_tickets"] = await run(
+                "list_tickets", [list_tickets(email) for _ in range(args.list_rounds) for email in active]
+            )
+            owned = [(email, ticket_id) for email in active for ticket_id in ticket_ids[email]]
+            results["post_message"] = await run("post_message", [post_message(*pair) for pair in owned])
+            streams = owned[: args.streams]
+            results["ai_stream"] = await run("ai_stream", [ai_stream(*pair) for pair in streams], len(streams) or 1)
+    finally:
+        server.should_exit = True
+        await asyncio.to_thread(serving.join)
+
+    return {
+        "started_at": datetime.utcfromtimestamp(run_id).isoformat() + "Z",
+        "commit": git_commit(),
+        "config": {
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "db_latency_ms": args.db_latency_ms,
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "tickets_per_user": args.tickets_per_user,
+            "list_rounds": args.list_rounds,
+            "streams": args.streams,
+            "tokens_per_second": args.tokens_per_second,
+            "response_tokens": args.response_tokens,
+            "first_token_delay": args.first_token_delay,
+            "bcrypt_rounds": os.environ.get("BCRYPT_ROUNDS"),
+        },
+        "scenarios": {name: result.summary() for name, result in results.items()},
+    }
+
+def git_commit() -> Optional[str]:
+    """
+    Return the current git commit, if the benchmark runs inside a checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]):
+    """
+    Print the change of each compared metric relative to a baseline run.
+    """
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('started_at')}):")
+    for name, summary in current["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = previous.get(metric), summary.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            worse = change < 0 if metric == "rps" else change > 0
+            flag = "  (worse)" if worse and abs(change) >= 10 else ""
+            print(f"  {name:<15}{metric:<22}{before:>12}{after:>12}{change:>+9.1f}%{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="Users signed up and logged in")
+    parser.add_argument("--concurrency", type=int, default=25, help="Requests in flight for non-streaming scenarios")
+    parser.add_argument("--tickets-per-user", type=int, default=4, help="Tickets created per user")
+    parser.add_argument("--list-rounds", type=int, default=5, help="Ticket listings per user")
+    parser.add_argument("--streams", type=int, default=20, help="Concurrent AI response streams")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Fake LLM streaming rate (0 = unthrottled)")
+    parser.add_argument("--response-tokens", type=int, default=60, help="Tokens per fake LLM reply")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="Fake LLM delay before the first token")
+    parser.add_argument("--bcrypt-rounds", type=int, default=None, help="Override BCRYPT_ROUNDS for the run")
+    parser.add_argument("--database-url", default=None, help="Database to run against (default: temporary SQLite)")
+    parser.add_argument(
+        "--db-latency-ms", type=float, default=0.0, help="Emulated network latency per SQLite round trip"
+    )
+    parser.add_argument("--output", default=None, help="Results file (default: benchmarks/results/loadtest-<time>.json)")
+    parser.add_argument("--baseline", default=None, help="Previous results file to compare against")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    results = asyncio.run(run_benchmark(args))
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"loadtest-{datetime.utcnow():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as handle:
+        json.dump(results, handle, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            compare(json.load(handle), results)
+
+if __name__ == "__main__":
+    main()
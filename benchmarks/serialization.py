@@ -0,0 +1,90 @@
+"""
+Micro-benchmark of the ticket and message list serialization paths.
+
+Compares the per-item cost of the previous path (ORM objects validated one by
+one into TicketOut/MessageOut, run through jsonable_encoder and the standard
+json encoder) with the current one (column rows validated once through a
+TypeAdapter and encoded with orjson).
+
+Usage:
+    python -m benchmarks.serialization [--items 200] [--rounds 200]
+"""
+from app.models.message import Message
+from app.models.ticket import Ticket
+from app.schemas.message import MessageOut, MessagePage
+from app.schemas.ticket import TicketOut, TicketPage
+from app.utils.serialization import serialize
+from collections import namedtuple
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+import argparse
+import json
+import timeit
+import uuid
+
+TicketRow = namedtuple("TicketRow", "id title description status created_at user_id")
+MessageRow = namedtuple("MessageRow", "id content is_ai status created_at ticket_id")
+
+def build_data(count: int):
+    """
+    Build equivalent ORM objects and column rows for tickets and messages.
+    """
+    now = datetime.utcnow()
+    user_id, ticket_id = uuid.uuid4(), uuid.uuid4()
+    ticket_rows = [
+        TicketRow(uuid.uuid4(), f"Ticket {i}", "The printer on floor 3 is jammed again " * 3, "open",
+                  now - timedelta(seconds=i), user_id)
+        for i in range(count)
+    ]
+    message_rows = [
+        MessageRow(uuid.uuid4(), "Have you tried restarting the device? " * 4, i % 2 == 1, "complete",
+                   now + timedelta(seconds=i), ticket_id)
+        for i in range(count)
+    ]
+    tickets = [Ticket(**row._asdict()) for row in ticket_rows]
+    messages = [Message(**row._asdict()) for row in message_rows]
+    return tickets, messages, ticket_rows, message_rows
+
+def legacy(schema, objects) -> bytes:
+    """
+    Previous path: per-item validation from ORM objects, jsonable_encoder, json.dumps.
+    """
+    items = [schema.model_validate(obj) for obj in objects]
+    return json.dumps(jsonable_encoder({"items": items, "next_cursor": None})).encode()
+
+def fast(adapter: TypeAdapter, rows) -> bytes:
+    """
+    Current path: one TypeAdapter validation of column rows, encoded with orjson.
+    """
+    return serialize(adapter, {"items": rows, "next_cursor": None}).body
+
+def measure(label: str, func, items: int, rounds: int) -> float:
+    """
+    Print and return the mean cost per item in microseconds.
+    """
+    seconds = min(timeit.repeat(func, number=rounds, repeat=3)) / rounds
+    per_item = seconds / items * 1e6
+    print(f"{label:<36}{per_item:>10.2f} us/item")
+    return per_item
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200, help="Items per serialized page")
+    parser.add_argument("--rounds", type=int, default=200, help="Pages serialized per measurement")
+    args = parser.parse_args()
+
+    tickets, messages, ticket_rows, message_rows = build_data(args.items)
+    ticket_adapter, message_adapter = TypeAdapter(TicketPage), TypeAdapter(MessagePage)
+    assert json.loads(legacy(TicketOut, tickets))["items"] == json.loads(fast(ticket_adapter, ticket_rows))["items"]
+
+    for name, schema, objects, adapter, rows in (
+        ("tickets", TicketOut, tickets, ticket_adapter, ticket_rows),
+        ("messages", MessageOut, messages, message_adapter, message_rows),
+    ):
+        before = measure(f"{name}: ORM + json (before)", lambda: legacy(schema, objects), args.items, args.rounds)
+        after = measure(f"{name}: rows + orjson (after)", lambda: fast(adapter, rows), args.items, args.rounds)
+        print(f"{name}: {before / after:.1f}x faster\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+# Settings are read when the app is imported, so point it at a throwaway SQLite database first
+TEST_DB_DIR = tempfile.mkdtemp(prefix="support-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{TEST_DB_DIR}/test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+os.environ.setdefault("AI_PROVIDER", "fake")
+os.environ.setdefault("DB_SCHEMA_CHECK", "create")
+
+import pytest
+from app.models import archive, conversation, job, message, search, stats, ticket, user
+from app.models.user import Base, User
+from app.utils.database import async_session, engine
+import uuid
+
+@pytest.fixture
+async def db():
+    """
+    Async session on freshly created tables, dropped again after the test.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_session() as session:
+        yield session
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+@pytest.fixture
+def make_user(db):
+    """
+    Factory adding a committed user with a given role.
+    """
+    async def make(role: str = "user") -> User:
+        user = User(id=uuid.uuid4(), email=f"{uuid.uuid4().hex}@example.com", hashed_password="x", role=role)
+        db.add(user)
+        await db.commit()
+        return user
+
+    return make
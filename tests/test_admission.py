@@ -0,0 +1,93 @@
+from app.services.admission import AdaptiveConcurrency, AdmissionController, CircuitBreaker
+import asyncio
+import pytest
+
+def make_controller(concurrency: int = 1, cooldown: float = 30.0) -> AdmissionController:
+    return AdmissionController(
+        requests_per_minute=1000,
+        tokens_per_minute=1_000_000,
+        concurrency=AdaptiveConcurrency(concurrency, concurrency, concurrency, latency_target=60.0),
+        breaker=CircuitBreaker(failure_threshold=1, cooldown=cooldown),
+        max_wait=5.0,
+        max_queued_per_user=10,
+    )
+
+async def hold(controller: AdmissionController, entered: asyncio.Event, release: asyncio.Event):
+    async with controller.admit("a", 10):
+        entered.set()
+        await release.wait()
+
+async def test_admits_up_to_the_concurrency_limit():
+    controller = make_controller(concurrency=2)
+    entered = [asyncio.Event() for _ in range(3)]
+    release = asyncio.Event()
+    tasks = [asyncio.create_task(hold(controller, event, release)) for event in entered]
+    await asyncio.sleep(0.01)
+    assert [event.is_set() for event in entered] == [True, True, False]
+    release.set()
+    await asyncio.gather(*tasks)
+    assert controller.in_flight == 0 and controller.admitted == 3
+
+async def test_cancelled_waiter_does_not_leak_a_slot():
+    controller = make_controller()
+    entered, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold(controller, entered, release))
+    await entered.wait()
+    waiting = asyncio.create_task(hold(controller, asyncio.Event(), asyncio.Event()))
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    release.set()
+    await holder
+    assert controller.in_flight == 0
+    assert controller.stats()["queued"] == 0
+
+async def test_granted_then_cancelled_waiter_hands_back_its_slot():
+    controller = make_controller()
+    entered, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold(controller, entered, release))
+    await entered.wait()
+    waiting = asyncio.create_task(hold(controller, asyncio.Event(), asyncio.Event()))
+    await asyncio.sleep(0.01)
+    release.set()
+    # Let the holder leave, which grants the waiter's slot, then cancel the waiter before it resumes
+    while not holder.done():
+        await asyncio.sleep(0)
+    assert controller.in_flight == 1
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert controller.in_flight == 0
+    async with asyncio.timeout(1):
+        async with controller.admit("b", 10):
+            pass
+
+async def test_cancelled_probe_does_not_block_the_breaker():
+    controller = make_controller(cooldown=0.01)
+    with pytest.raises(RuntimeError):
+        async with controller.admit("a", 10):
+            raise RuntimeError("upstream failed")
+    assert controller.breaker.state == "open"
+    await asyncio.sleep(0.02)
+
+    entered = asyncio.Event()
+    probe = asyncio.create_task(hold(controller, entered, asyncio.Event()))
+    await entered.wait()
+    assert controller.breaker.probing
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    assert not controller.breaker.probing
+    async with asyncio.timeout(1):
+        async with controller.admit("b", 10):
+            pass
+    assert controller.breaker.state == "closed"
+
+def test_hedges_need_budget_but_failovers_are_always_charged():
+    controller = make_controller()
+    controller.requests.level = 0.0
+    assert controller.reserve_attempt(10) is False
+    assert controller.hedges_skipped == 1 and controller.requests.level < 1
+    assert controller.reserve_attempt(10, optional=False) is True
+    assert controller.requests.level < 0
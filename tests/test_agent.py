@@ -0,0 +1,69 @@
+from app.models.ticket import Ticket
+from app.services.agent import AgentQueueService
+from app.utils.database import async_session
+from fastapi import HTTPException
+from sqlalchemy import update
+from datetime import datetime, timedelta
+import asyncio
+import pytest
+import uuid
+
+async def open_tickets(db, owner, count):
+    """
+    Add open tickets created one second apart, oldest first.
+    """
+    started = datetime.utcnow() - timedelta(minutes=1)
+    tickets = [
+        Ticket(id=uuid.uuid4(), title=f"t{index}", description="d", user_id=owner.id, created_at=started + timedelta(seconds=index))
+        for index in range(count)
+    ]
+    db.add_all(tickets)
+    await db.commit()
+    return [ticket.id for ticket in tickets]
+
+async def claim_in_own_session(queue, agent):
+    async with async_session() as session:
+        ticket = await queue.claim(agent, session)
+        return ticket.id if ticket is not None else None
+
+async def test_concurrent_claims_never_hand_out_a_ticket_twice(db, make_user):
+    owner, first, second, third = [await make_user(role) for role in ("user", "agent", "agent", "agent")]
+    ids = await open_tickets(db, owner, 2)
+    queue = AgentQueueService()
+    claimed = await asyncio.gather(*(claim_in_own_session(queue, agent) for agent in (first, second, third)))
+    assert sorted(ticket_id for ticket_id in claimed if ticket_id) == sorted(ids)
+    assert claimed.count(None) == 1
+
+async def test_heartbeat_and_release_require_the_claim(db, make_user):
+    owner, agent, other = await make_user(), await make_user("agent"), await make_user("agent")
+    [ticket_id] = await open_tickets(db, owner, 1)
+    queue = AgentQueueService()
+    claimed = await queue.claim(agent, db)
+    assert claimed.id == ticket_id and claimed.assigned_to == agent.id
+
+    renewed = await queue.heartbeat(ticket_id, agent, db)
+    assert renewed.lease_expires_at >= claimed.lease_expires_at
+    for call in (queue.heartbeat, queue.release):
+        with pytest.raises(HTTPException) as error:
+            await call(ticket_id, other, db)
+        assert error.value.status_code == 409
+
+    released = await queue.release(ticket_id, agent, db)
+    assert released.assigned_to is None and released.lease_expires_at is None
+    assert (await queue.claim(other, db)).id == ticket_id
+
+async def test_lapsed_lease_is_reclaimed_before_unclaimed_tickets(db, make_user):
+    owner, agent, other = await make_user(), await make_user("agent"), await make_user("agent")
+    older, newer = await open_tickets(db, owner, 2)
+    queue = AgentQueueService()
+    assert (await queue.claim(agent, db)).id == older
+    await db.execute(
+        update(Ticket).where(Ticket.id == older).values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    await db.commit()
+
+    assert (await queue.claim(other, db)).id == older
+    with pytest.raises(HTTPException):
+        await queue.heartbeat(older, agent, db)
+    assert (await queue.claim(agent, db)).id == newer
+    assert await queue.claim(agent, db) is None
@@ -0,0 +1,57 @@
+from app.models.message import Message
+from app.models.ticket import Ticket
+from app.schemas.ticket import TicketCreate
+from app.services.stats import StatsService
+from app.services.ticket import TicketService
+from sqlalchemy.future import select
+import uuid
+
+async def test_invalid_tickets_are_reported_and_the_rest_created(db, make_user):
+    user, tickets, stats = await make_user(), TicketService(), StatsService()
+    items = [
+        {"title": "Printer offline", "description": "printer broken"},
+        {"title": "No description"},
+        {"title": "Login fails", "description": "password reset loops"},
+        "not an object",
+    ]
+    report = await tickets.bulk_create_tickets(items, user, db)
+
+    assert (report["created"], report["failed"]) == (2, 2)
+    assert [(item["index"], item["status"]) for item in report["results"]] == [
+        (0, "created"), (1, "error"), (2, "created"), (3, "error")
+    ]
+    assert report["results"][1]["error"] == "description: Field required"
+    rows = (await db.execute(select(Ticket.id, Ticket.title).filter(Ticket.user_id == user.id))).all()
+    assert {(row.id, row.title) for row in rows} == {
+        (report["results"][0]["id"], "Printer offline"), (report["results"][2]["id"], "Login fails")
+    }
+    assert (await stats.get_stats(db, user.id))["tickets"]["total"] == 2
+
+async def test_nothing_is_written_when_every_ticket_is_invalid(db, make_user):
+    user, tickets = await make_user(), TicketService()
+    report = await tickets.bulk_create_tickets([{}, {"title": 1}], user, db)
+    assert (report["created"], report["failed"]) == (0, 2)
+    assert (await db.execute(select(Ticket.id))).all() == []
+
+async def test_messages_for_foreign_missing_or_invalid_items_are_skipped(db, make_user):
+    user, other, tickets, stats = await make_user(), await make_user(), TicketService(), StatsService()
+    own = await tickets.create_ticket(TicketCreate(title="a", description="printer broken"), user, db)
+    foreign = await tickets.create_ticket(TicketCreate(title="b", description="login fails"), other, db)
+    items = [
+        {"ticket_id": str(own.id), "content": "first"},
+        {"ticket_id": str(foreign.id), "content": "not mine"},
+        {"ticket_id": str(uuid.uuid4()), "content": "no such ticket"},
+        {"ticket_id": "not-a-uuid", "content": "bad id"},
+        {"ticket_id": str(own.id), "content": "second"},
+    ]
+    report = await tickets.bulk_add_messages(items, user, db)
+
+    assert (report["created"], report["failed"]) == (2, 3)
+    assert [item["status"] for item in report["results"]] == ["created", "error", "error", "error", "created"]
+    assert [item["error"] for item in report["results"][1:3]] == ["Ticket not found", "Ticket not found"]
+    assert report["results"][3]["error"].startswith("ticket_id: ")
+    assert [message.content for message in report["messages"]] == ["first", "second"]
+    contents = (await db.execute(select(Message.ticket_id, Message.content))).all()
+    assert sorted(contents, key=lambda row: row.content) == [(own.id, "first"), (own.id, "second")]
+    assert (await stats.get_stats(db, user.id))["messages"]["human"] == 2
+    assert (await stats.get_stats(db, other.id))["messages"]["human"] == 0
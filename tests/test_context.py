@@ -0,0 +1,50 @@
+from app.core.config import settings
+from app.models.message import Message
+from app.models.ticket import Ticket
+from app.services.context import ContextBuilder, estimate_tokens
+from datetime import datetime, timedelta
+import uuid
+
+async def make_ticket(db, user, turns):
+    """
+    Add a ticket with messages alternating between the customer and the AI.
+    """
+    ticket = Ticket(id=uuid.uuid4(), title="t", description="printer broken", user_id=user.id)
+    db.add(ticket)
+    started = datetime.utcnow()
+    for index, (is_ai, content) in enumerate(turns):
+        db.add(Message(ticket_id=ticket.id, is_ai=is_ai, content=content, created_at=started + timedelta(seconds=index)))
+    await db.commit()
+    return ticket
+
+async def test_recent_turns_fit_verbatim(db, make_user):
+    ticket = await make_ticket(db, await make_user(), [(False, "hello"), (True, "hi"), (False, "still broken")])
+    messages = await ContextBuilder().build_messages(ticket, db)
+    assert [m["content"] for m in messages[1:]] == ["hello", "hi", "still broken"]
+    assert "Summary of earlier conversation" not in messages[0]["content"]
+
+async def test_older_turns_are_folded_into_summary(db, make_user):
+    turns = [(index % 2 == 1, f"turn {index}") for index in range(6)]
+    ticket = await make_ticket(db, await make_user(), turns)
+    messages = await ContextBuilder(recent_turns=2).build_messages(ticket, db)
+    assert [m["content"] for m in messages[1:]] == ["turn 4", "turn 5"]
+    assert "User: turn 0" in messages[0]["content"]
+
+async def test_newest_customer_message_is_never_folded(db, make_user):
+    question = "why is my order " + "really " * 200 + "late?"
+    ticket = await make_ticket(db, await make_user(), [(False, "hello"), (True, "hi"), (False, question)])
+    messages = await ContextBuilder(token_budget=50).build_messages(ticket, db)
+    assert messages[-1] == {"role": "user", "content": question}
+
+async def test_explicit_zero_is_not_the_default(db, make_user):
+    ticket = await make_ticket(db, await make_user(), [(False, "hello"), (True, "hi"), (False, "question")])
+    messages = await ContextBuilder(recent_turns=0).build_messages(ticket, db)
+    assert [m["content"] for m in messages[1:]] == ["question"]
+
+async def test_prompt_with_its_grown_summary_stays_within_budget(db, make_user):
+    turns = [(index % 2 == 1, f"turn {index} " + "details " * 175) for index in range(20)]
+    ticket = await make_ticket(db, await make_user(), turns)
+    messages = await ContextBuilder().build_messages(ticket, db)
+    assert "Summary of earlier conversation" in messages[0]["content"]
+    assert sum(estimate_tokens(m["content"]) for m in messages) <= settings.AI_CONTEXT_TOKEN_BUDGET
+    assert messages[-1]["content"].startswith("turn 19 ")
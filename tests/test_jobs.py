@@ -0,0 +1,93 @@
+from app.models.job import GenerationJob
+from app.services.jobs import JobQueue
+from app.utils.singleflight import Flight
+from fastapi import HTTPException
+from sqlalchemy.future import select
+from datetime import datetime, timedelta
+from uuid import UUID
+import asyncio
+import pytest
+import uuid
+
+class BlockedCommitSession:
+    """
+    Stand-in session whose commit never returns, to cancel a submission mid-commit.
+    """
+    def __init__(self):
+        self.committing = asyncio.Event()
+
+    def add(self, instance):
+        pass
+
+    async def commit(self):
+        self.committing.set()
+        await asyncio.Event().wait()
+
+def make_queue(runner, **options) -> JobQueue:
+    defaults = dict(workers=1, max_queued=1, retain=10, retain_seconds=60, abandon_seconds=60, sweep_seconds=3600)
+    return JobQueue(runner, **{**defaults, **options})
+
+async def test_concurrent_submissions_cannot_overfill_the_queue(db):
+    release = asyncio.Event()
+
+    async def runner(job_id: UUID, ticket_id: UUID, flight: Flight):
+        await release.wait()
+
+    queue = make_queue(runner)
+    try:
+        await queue.submit(uuid.uuid4(), "busy", db)
+        await asyncio.sleep(0.05)  # The only worker takes the job and blocks
+        results = await asyncio.gather(
+            queue.submit(uuid.uuid4(), "a", db), queue.submit(uuid.uuid4(), "b", db), return_exceptions=True
+        )
+        rejected = [r for r in results if isinstance(r, HTTPException)]
+        assert len(rejected) == 1 and rejected[0].status_code == 503
+        assert not any(isinstance(r, asyncio.QueueFull) for r in results)
+        assert queue.stats()["queued"] == 1
+        assert len(queue._active) == 2
+    finally:
+        release.set()
+        await queue.stop()
+
+async def test_cancelled_submission_unregisters_its_key(db):
+    async def runner(job_id: UUID, ticket_id: UUID, flight: Flight):
+        return None
+
+    queue = make_queue(runner)
+    session = BlockedCommitSession()
+    try:
+        task = asyncio.create_task(queue.submit(uuid.uuid4(), "key", session))
+        await session.committing.wait()
+        job_id = queue._active["key"]
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert "key" not in queue._active
+        assert queue._reserved == 0
+        # A client that coalesced onto the job sees it fail instead of waiting forever
+        with pytest.raises(RuntimeError):
+            async for _ in queue.attach(job_id, db):
+                pass
+        assert await queue.submit(uuid.uuid4(), "key", db) != job_id
+    finally:
+        await queue.stop()
+
+async def test_recover_fails_orphaned_jobs_only(db):
+    async def runner(job_id: UUID, ticket_id: UUID, flight: Flight):
+        return None
+
+    queue = make_queue(runner, stale_seconds=60)
+    old = datetime.utcnow() - timedelta(minutes=5)
+    orphaned = GenerationJob(id=uuid.uuid4(), ticket_id=uuid.uuid4(), status="running", created_at=old)
+    recent = GenerationJob(id=uuid.uuid4(), ticket_id=uuid.uuid4(), status="queued")
+    held = GenerationJob(id=uuid.uuid4(), ticket_id=uuid.uuid4(), status="queued", created_at=old)
+    db.add_all([orphaned, recent, held])
+    await db.commit()
+    queue._flights[held.id] = Flight()
+
+    assert await queue.recover() == 1
+    statuses = {
+        job.id: job.status
+        for job in (await db.scalars(select(GenerationJob).execution_options(populate_existing=True))).all()
+    }
+    assert statuses == {orphaned.id: "failed", recent.id: "queued", held.id: "queued"}
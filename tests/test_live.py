@@ -0,0 +1,105 @@
+from app.core.config import settings
+from app.main import app
+from app.models.ticket import Ticket
+from app.utils.database import engine
+from app.utils.security import create_access_token
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+import pytest
+import uuid
+
+def token(user):
+    return create_access_token({"sub": str(user.id), "role": user.role})
+
+def receive_until(socket, event):
+    """
+    Read frames until an event of the given type arrives, and return all frames read.
+    """
+    frames = []
+    while not frames or frames[-1]["event"] != event:
+        frames.append(socket.receive_json())
+    return frames
+
+@pytest.fixture
+async def client(db, monkeypatch):
+    """
+    Test client running the app's startup and shutdown around the test.
+    """
+    monkeypatch.setattr(settings, "AI_FAKE_TOKENS_PER_SECOND", 0.0)
+    monkeypatch.setattr(settings, "AI_FAKE_FIRST_TOKEN_DELAY", 0.0)
+    # The app runs on the test client's own event loop, so it must not reuse this loop's connections
+    await engine.dispose()
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+async def ticket(db, make_user):
+    owner = await make_user()
+    ticket = Ticket(id=uuid.uuid4(), title="Printer offline", description="printer broken", user_id=owner.id)
+    db.add(ticket)
+    await db.commit()
+    return ticket, owner
+
+async def test_socket_requires_a_token_for_a_visible_ticket(client, ticket, make_user):
+    ticket, owner = ticket
+    stranger = await make_user()
+    for query in ("", f"?token={token(stranger)}"):
+        with pytest.raises(WebSocketDisconnect) as refused:
+            with client.websocket_connect(f"/tickets/{ticket.id}/ws{query}") as socket:
+                socket.receive_json()
+        assert refused.value.code == 1008
+
+async def test_owner_posts_over_the_socket_and_receives_ai_chunks(client, ticket):
+    ticket, owner = ticket
+    with client.websocket_connect(f"/tickets/{ticket.id}/ws?token={token(owner)}") as socket:
+        socket.send_json({"type": "ping"})
+        assert socket.receive_json()["event"] == "pong"
+        socket.send_text("not json")
+        assert socket.receive_json()["data"] == {"status": 400, "detail": "Frames must be JSON objects"}
+        socket.send_json({"type": "message", "content": 42})
+        assert socket.receive_json()["event"] == "rejected"
+
+        socket.send_json({"type": "message", "content": "It is still offline"})
+        posted = socket.receive_json()
+        assert posted["event"] == "message_posted"
+        assert (posted["data"]["content"], posted["data"]["is_ai"]) == ("It is still offline", False)
+        frames = receive_until(socket, "done")
+        assert frames[0]["event"] == "start"
+        chunks = [frame["data"]["content"] for frame in frames if frame["event"] == "message"]
+        assert chunks and "".join(chunks).strip()
+        assert [frame["id"] for frame in frames] == sorted(frame["id"] for frame in frames)
+
+async def test_admin_watches_but_cannot_post(client, ticket, make_user):
+    ticket, owner = ticket
+    admin = await make_user("admin")
+    with client.websocket_connect(f"/tickets/{ticket.id}/ws?token={token(admin)}") as socket:
+        socket.send_json({"type": "message", "content": "hello"})
+        assert socket.receive_json()["data"] == {"status": 403, "detail": "Only the ticket owner can post"}
+
+        response = client.post(
+            f"/tickets/{ticket.id}/messages", json={"content": "posted over REST"},
+            headers={"Authorization": f"Bearer {token(owner)}"},
+        )
+        assert response.status_code == 200
+        assert socket.receive_json()["data"]["content"] == "posted over REST"
+
+async def test_bulk_messages_are_announced_after_the_batch_commits(client, ticket):
+    ticket, owner = ticket
+    with client.websocket_connect(f"/tickets/{ticket.id}/ws?token={token(owner)}") as socket:
+        response = client.post(
+            "/tickets/messages/bulk",
+            json={"messages": [
+                {"ticket_id": str(ticket.id), "content": "first"},
+                {"ticket_id": str(uuid.uuid4()), "content": "lost"},
+                {"ticket_id": str(ticket.id), "content": "second"},
+            ]},
+            headers={"Authorization": f"Bearer {token(owner)}"},
+        )
+        assert response.json()["created"] == 2
+        frames = [socket.receive_json(), socket.receive_json()]
+        assert [(frame["event"], frame["data"]["content"]) for frame in frames] == [
+            ("message_posted", "first"), ("message_posted", "second")
+        ]
+        assert [frame["data"]["id"] for frame in frames] == [
+            item["id"] for item in response.json()["results"] if item["status"] == "created"
+        ]
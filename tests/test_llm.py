@@ -0,0 +1,59 @@
+from app.core.config import settings
+from app.services.llm import FakeLLMClient, FakeProviderError, LLMProvider, LLMRouter
+import pytest
+
+PROMPT = [{"role": "user", "content": "hello"}]
+
+@pytest.fixture(autouse=True)
+def fast_hedging(monkeypatch):
+    monkeypatch.setattr(settings, "AI_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "AI_HEDGE_MIN_DELAY_SECONDS", 0.02)
+    monkeypatch.setattr(settings, "AI_HEDGE_MAX_DELAY_SECONDS", 0.02)
+    monkeypatch.setattr(settings, "AI_HEDGE_MAX_RATIO", 1.0)
+    monkeypatch.setattr(settings, "AI_LATENCY_MIN_SAMPLES", 2)
+
+def provider(name: str, first_token_delay: float = 0.0, failure_rate: float = 0.0) -> LLMProvider:
+    client = FakeLLMClient(tokens_per_second=0, response_tokens=3, first_token_delay=first_token_delay, failure_rate=failure_rate)
+    return LLMProvider(name, client)
+
+async def collect(router: LLMRouter, reserve=None) -> str:
+    return "".join([chunk async for chunk in router.stream(PROMPT, "model", reserve)])
+
+async def test_hedge_is_charged_to_the_caller():
+    slow, fast = provider("slow", first_token_delay=0.5), provider("fast")
+    charged = []
+    await collect(LLMRouter([slow, fast]), lambda optional: charged.append(optional) or True)
+    assert charged == [True]
+    assert fast.won == 1 and slow.won == 0
+
+async def test_hedge_is_skipped_without_budget():
+    slow, fast = provider("slow", first_token_delay=0.05), provider("fast")
+    router = LLMRouter([slow, fast])
+    assert await collect(router, lambda optional: False)
+    assert router.hedges == 0 and fast.requests == 0 and slow.won == 1
+
+async def test_losing_attempt_is_recorded_only_above_the_p95():
+    slow, fast = provider("slow", first_token_delay=0.5), provider("fast")
+    slow.latency.samples.extend([0.001, 0.001])
+    await collect(LLMRouter([slow, fast]))
+    assert len(slow.latency.samples) == 3 and slow.latency.samples[-1] > 0.001
+
+    slow.latency.samples.clear()
+    slow.latency.samples.extend([10.0, 10.0])
+    await collect(LLMRouter([slow, fast]))
+    assert list(slow.latency.samples) == [10.0, 10.0]
+
+async def test_fails_over_before_the_first_token():
+    broken, healthy = provider("broken", failure_rate=1.0), provider("healthy")
+    router = LLMRouter([broken, healthy])
+    charged = []
+    assert await collect(router, lambda optional: charged.append(optional) or True)
+    assert router.failovers == 1 and charged == [False]
+    assert broken.failed == 1 and healthy.won == 1
+
+async def test_raises_when_every_provider_fails():
+    only = provider("only", failure_rate=1.0)
+    with pytest.raises(FakeProviderError):
+        await collect(LLMRouter([only]))
+    # A lone provider is retried once before giving up
+    assert only.requests == 2 and only.failed == 2
@@ -0,0 +1,67 @@
+from app.core.config import settings
+from app.models.message import Message
+from app.models.ticket import Ticket
+from app.services.ai import AIService
+from app.services.context import ContextBuilder, estimate_tokens
+from app.services.export import ExportService
+from app.services.ticket import TicketService
+from app.utils.instrumentation import LLM_TOKENS
+from app.utils.singleflight import Flight
+from datetime import datetime, timedelta
+import orjson
+import uuid
+
+async def test_completed_ai_message_keeps_its_place_in_the_conversation(db, make_user):
+    user = await make_user()
+    ticket = Ticket(id=uuid.uuid4(), title="t", description="printer broken", user_id=user.id)
+    first = Message(
+        id=uuid.uuid4(), ticket_id=ticket.id, content="Q1", created_at=datetime.utcnow() - timedelta(seconds=1)
+    )
+    db.add_all([ticket, first])
+    await db.commit()
+    tickets, ai = TicketService(), AIService()
+
+    partial = await ai._checkpoint(db, ticket, None, ["Try"], "streaming")
+    second = Message(id=uuid.uuid4(), ticket_id=ticket.id, content="Q2", created_at=datetime.utcnow())
+    db.add(second)
+    await db.commit()
+    page = await tickets.get_messages(ticket.id, user, db, after=first.id)
+    assert [(row.content, row.status) for row in page["items"]] == [("Try", "streaming"), ("Q2", "complete")]
+
+    await ai._checkpoint(db, ticket, partial, ["Try", " restarting it."], "complete")
+    page = await tickets.get_messages(ticket.id, user, db)
+    assert [row.content for row in page["items"]] == ["Q1", "Try restarting it.", "Q2"]
+    # A poll past the newest message returns nothing; the streaming message is re-read by id
+    assert (await tickets.get_messages(ticket.id, user, db, after=second.id))["items"] == []
+    refreshed = await tickets.get_message(ticket.id, partial.id, user, db)
+    assert (refreshed.content, refreshed.status) == ("Try restarting it.", "complete")
+
+    messages = await ContextBuilder().build_messages(ticket, db)
+    assert [message["role"] for message in messages[1:]] == ["user", "assistant", "user"]
+
+async def test_incremental_export_picks_up_rewritten_ai_message(db, make_user):
+    user = await make_user()
+    ticket = Ticket(id=uuid.uuid4(), title="t", description="printer broken", user_id=user.id)
+    db.add(ticket)
+    await db.commit()
+    ai, exports = AIService(), ExportService()
+    partial = await ai._checkpoint(db, ticket, None, ["Try"], "streaming")
+    since = datetime.utcnow()
+
+    await ai._checkpoint(db, ticket, partial, ["Try", " again."], "complete")
+    rows = [orjson.loads(line) async for chunk in exports.export("messages", since=since) for line in chunk.splitlines()]
+    assert [(row["id"], row["content"], row["status"]) for row in rows] == [(str(partial.id), "Try again.", "complete")]
+
+async def test_streamed_tokens_are_counted_from_the_text_not_the_chunks(db, make_user, monkeypatch):
+    monkeypatch.setattr(settings, "AI_FAKE_FIRST_TOKEN_DELAY", 0.0)
+    monkeypatch.setattr(settings, "AI_FAKE_TOKENS_PER_SECOND", 0.0)
+    user = await make_user()
+    ticket = Ticket(id=uuid.uuid4(), title="t", description="printer broken", user_id=user.id)
+    db.add_all([ticket, Message(id=uuid.uuid4(), ticket_id=ticket.id, content="It is offline again")])
+    await db.commit()
+    ai = AIService()
+    before = sum(LLM_TOKENS._values.values())
+
+    message_id = await ai._generate(uuid.uuid4(), ticket.id, Flight())
+    reply = await db.get(Message, message_id)
+    assert sum(LLM_TOKENS._values.values()) - before == estimate_tokens(reply.content)
@@ -0,0 +1,41 @@
+from app.models.ticket import Ticket
+from app.utils.pagination import decode_cursor, encode_cursor, fetch_keyset_page
+from fastapi import HTTPException
+from sqlalchemy.future import select
+from datetime import datetime, timedelta
+import pytest
+import uuid
+
+def test_cursor_round_trip():
+    created_at, row_id = datetime(2026, 10, 18, 12, 30, 1, 250000), uuid.uuid4()
+    for direction in ("next", "prev"):
+        cursor = decode_cursor(encode_cursor(created_at, row_id, direction))
+        assert (cursor.created_at, cursor.id, cursor.direction) == (created_at, row_id, direction)
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime.utcnow(), uuid.uuid4(), "sideways")])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+async def test_pages_walk_forward_and_back(db, make_user):
+    user = await make_user()
+    started = datetime.utcnow()
+    # Two tickets share a timestamp so the id tie-breaker is exercised
+    stamps = [started, started, started + timedelta(seconds=1), started + timedelta(seconds=2), started + timedelta(seconds=3)]
+    db.add_all(Ticket(id=uuid.uuid4(), title="t", description="d", user_id=user.id, created_at=stamp) for stamp in stamps)
+    await db.commit()
+    stmt = select(Ticket.id, Ticket.created_at).filter(Ticket.user_id == user.id)
+    expected = [row.id for row in (await db.execute(stmt.order_by(Ticket.created_at.desc(), Ticket.id.desc()))).all()]
+
+    async def page(cursor=None):
+        rows, next_cursor, prev_cursor = await fetch_keyset_page(db, stmt, Ticket.created_at, Ticket.id, 2, cursor)
+        return [row.id for row in rows], next_cursor, prev_cursor
+
+    first, cursor, prev_cursor = await page()
+    assert first == expected[:2] and prev_cursor is None
+    second, cursor, back = await page(cursor)
+    assert second == expected[2:4]
+    third, end, _ = await page(cursor)
+    assert third == expected[4:] and end is None
+    assert (await page(back))[0] == first
@@ -0,0 +1,65 @@
+from app.models.archive import ArchivedMessage, ArchivedTicket
+from app.models.message import Message
+from app.models.ticket import Ticket
+from app.schemas.message import MessageCreate
+from app.schemas.ticket import TicketCreate, TicketStatusUpdate
+from app.services.retention import RetentionService
+from app.services.stats import StatsService
+from app.services.ticket import TicketService
+from fastapi import HTTPException
+from sqlalchemy import func, update
+from sqlalchemy.future import select
+from datetime import datetime, timedelta
+import pytest
+
+async def closed_ticket(db, tickets, user, title, closed_days_ago):
+    """
+    Create a ticket with one customer message and close it a number of days ago.
+    """
+    ticket = await tickets.create_ticket(TicketCreate(title=title, description="printer broken"), user, db)
+    await tickets.add_message(ticket.id, MessageCreate(content=f"{title} details"), user, db)
+    await tickets.update_status(ticket.id, TicketStatusUpdate(status="closed"), user, db)
+    closed_at = datetime.utcnow() - timedelta(days=closed_days_ago)
+    await db.execute(update(Ticket).where(Ticket.id == ticket.id).values(status_changed_at=closed_at))
+    await db.commit()
+    return ticket.id
+
+async def count(db, model):
+    return (await db.execute(select(func.count()).select_from(model))).scalar()
+
+async def test_archived_ticket_stays_readable_and_moves_back_on_reopen(db, make_user):
+    user, tickets, stats, retention = await make_user(), TicketService(), StatsService(), RetentionService()
+    old = await closed_ticket(db, tickets, user, "old", closed_days_ago=100)
+    recent = await closed_ticket(db, tickets, user, "recent", closed_days_ago=1)
+    before = await stats.get_stats(db, user.id)
+    del before["open_tickets"]["average_age_seconds"]
+
+    assert await retention.archive_batch(db, datetime.utcnow() - timedelta(days=90), 10) == 1
+    # An empty batch rolls the session back, expiring the user
+    assert await retention.archive_batch(db, datetime.utcnow() - timedelta(days=90), 10) == 0
+    await db.refresh(user)
+    assert (await count(db, ArchivedTicket), await count(db, Ticket)) == (1, 1)
+    after = await stats.get_stats(db, user.id)
+    del after["open_tickets"]["average_age_seconds"]
+    assert after == before
+    rebuilt = await stats.rebuild(db)
+    assert rebuilt["before"] == rebuilt["after"]
+
+    archived = await tickets.get_ticket(old, user, db, include_archived=True)
+    assert isinstance(archived, ArchivedTicket) and archived.archived_at is not None
+    page = await tickets.get_messages(old, user, db)
+    assert [row.content for row in page["items"]] == ["old details"]
+    with pytest.raises(HTTPException) as error:
+        await tickets.add_message(old, MessageCreate(content="one more thing"), user, db)
+    assert error.value.status_code == 409
+    assert (await tickets.get_ticket(recent, user, db)).status == "closed"
+
+    reopened = await tickets.update_status(old, TicketStatusUpdate(status="open"), user, db)
+    assert isinstance(reopened, Ticket) and reopened.status == "open"
+    assert (await count(db, ArchivedTicket), await count(db, ArchivedMessage)) == (0, 0)
+    assert await count(db, Message) == 2
+    await tickets.add_message(old, MessageCreate(content="one more thing"), user, db)
+    report = await stats.get_stats(db, user.id)
+    assert report["tickets"] == {"total": 2, "by_status": {"open": 1, "closed": 1}}
+    rebuilt = await stats.rebuild(db)
+    assert rebuilt["before"] == rebuilt["after"]
@@ -0,0 +1,73 @@
+from app.core.config import settings
+from app.models.message import Message
+from app.models.ticket import Ticket
+from app.services.search import SearchService
+from app.utils.pagination import encode_offset_cursor
+from fastapi import HTTPException
+from sqlalchemy import update
+import pytest
+import uuid
+
+async def add_ticket(db, owner, title, description="nothing to see", messages=()):
+    ticket = Ticket(id=uuid.uuid4(), title=title, description=description, user_id=owner.id)
+    db.add(ticket)
+    db.add_all(Message(ticket_id=ticket.id, content=content) for content in messages)
+    await db.commit()
+    return ticket.id
+
+async def search(user, db, query, limit=20, cursor=None):
+    page = await SearchService().search_tickets(user, db, query, limit, cursor)
+    return [row.id for row in page["items"]], page["next_cursor"]
+
+async def test_triggers_keep_the_index_in_sync(db, make_user):
+    user = await make_user()
+    ticket_id = await add_ticket(db, user, "Printer jammed", messages=["the tray is stuck"])
+    assert (await search(user, db, "printers"))[0] == [ticket_id]
+    assert (await search(user, db, "tray"))[0] == [ticket_id]
+
+    await db.execute(update(Ticket).where(Ticket.id == ticket_id).values(title="Scanner offline"))
+    await db.execute(update(Message).where(Message.ticket_id == ticket_id).values(content="the lid is open"))
+    await db.commit()
+    assert (await search(user, db, "printer"))[0] == []
+    assert (await search(user, db, "tray"))[0] == []
+    assert (await search(user, db, "scanner"))[0] == (await search(user, db, "lid"))[0] == [ticket_id]
+
+async def test_title_and_message_matches_outrank_description_matches(db, make_user):
+    user = await make_user()
+    described = await add_ticket(db, user, "Help needed", "my router keeps dropping the connection")
+    titled = await add_ticket(db, user, "Router keeps dropping", "please help")
+    discussed = await add_ticket(db, user, "Router keeps dropping", "please help", ["router rebooted", "router again"])
+    assert (await search(user, db, "router"))[0] == [discussed, titled, described]
+
+async def test_users_only_find_their_own_tickets(db, make_user):
+    alice, bob, admin = await make_user(), await make_user(), await make_user("admin")
+    mine = await add_ticket(db, alice, "Invoice missing")
+    theirs = await add_ticket(db, bob, "Where is my order", messages=["the invoice never arrived"])
+    assert (await search(alice, db, "invoice"))[0] == [mine]
+    assert (await search(bob, db, "invoice"))[0] == [theirs]
+    assert sorted((await search(admin, db, "invoice"))[0]) == sorted([mine, theirs])
+
+async def test_pages_follow_the_offset_cursor_up_to_the_result_cap(db, make_user, monkeypatch):
+    user = await make_user()
+    for index in range(5):
+        await add_ticket(db, user, f"Password reset {index}")
+    first, cursor = await search(user, db, "password", limit=2)
+    second, cursor = await search(user, db, "password", limit=2, cursor=cursor)
+    third, cursor = await search(user, db, "password", limit=2, cursor=cursor)
+    assert len(first + second + third) == len(set(first + second + third)) == 5 and cursor is None
+
+    monkeypatch.setattr(settings, "SEARCH_MAX_RESULTS", 3)
+    first, cursor = await search(user, db, "password", limit=2)
+    second, cursor = await search(user, db, "password", limit=2, cursor=cursor)
+    assert (len(first), len(second), cursor) == (2, 1, None)
+    assert (await search(user, db, "password", cursor=encode_offset_cursor(3)))[0] == []
+    with pytest.raises(HTTPException):
+        await search(user, db, "password", cursor="not-a-cursor")
+
+async def test_query_syntax_is_not_passed_to_fts5(db, make_user):
+    user = await make_user()
+    ticket_id = await add_ticket(db, user, "Login fails")
+    assert (await search(user, db, 'login" fails*'))[0] == [ticket_id]
+    # Operators are searched for as plain words, never parsed
+    assert (await search(user, db, "login OR NEAR(*"))[0] == []
+    assert (await search(user, db, "!!!"))[0] == []
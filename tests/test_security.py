@@ -0,0 +1,35 @@
+from app.utils.security import PasswordHasher
+from fastapi import HTTPException
+import asyncio
+import pytest
+import threading
+
+async def test_cancelled_request_keeps_its_slot_until_the_thread_finishes():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    running, release = threading.Event(), threading.Event()
+
+    def slow_hash():
+        running.set()
+        release.wait(5)
+        return "hashed"
+
+    request = asyncio.create_task(hasher._run(slow_hash))
+    assert await asyncio.to_thread(running.wait, 5)
+    request.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await request
+    # The thread is still hashing, so the pool is still full
+    assert hasher.pending == 1
+    with pytest.raises(HTTPException) as busy:
+        await hasher._run(lambda: "hashed")
+    assert busy.value.status_code == 503
+
+    release.set()
+    for _ in range(100):
+        if hasher.pending == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert hasher.pending == 0
+    assert await hasher._run(lambda: "hashed") == "hashed"
+    assert (hasher.pending, hasher.completed, hasher.rejected) == (0, 1, 1)
+    hasher.shutdown()
@@ -0,0 +1,12 @@
+from app.core.config import settings
+from app.server import worker_ports
+
+def test_single_worker_serves_the_server_port(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 1)
+    assert worker_ports() == [settings.SERVER_PORT]
+
+def test_each_of_several_workers_gets_its_own_port(monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 4)
+    monkeypatch.setattr(settings, "SERVER_PORT", 8000)
+    # The upstream servers of the shipped proxy config
+    assert worker_ports() == [8001, 8002, 8003, 8004]
@@ -0,0 +1,61 @@
+from app.core.config import settings
+from app.models.ticket import Ticket
+from app.services.ai import AIService
+from app.services.similarity import SimilarTicketService
+from app.utils.vectorindex import VectorIndex
+import numpy as np
+import uuid
+
+PRINTER = ("Printer offline", "The office printer shows offline after the update")
+ANSWER = "Restart the print spooler and re-add the printer."
+
+def index_resolved(service, owner, title, description, answer=ANSWER):
+    """
+    Index a resolved ticket owned by a customer and return its ID.
+    """
+    ticket_id = uuid.uuid4()
+    batch = [(ticket_id, title, description, answer, owner)]
+    service._apply(batch, service.embedder.embed([f"{title}\n{description}"]))
+    return ticket_id
+
+def ai_with_index(service):
+    ai = AIService()
+    ai.similar = service
+    return ai
+
+def prompt():
+    return [{"role": "system", "content": "You are a support agent."}, {"role": "user", "content": PRINTER[1]}]
+
+def test_group_filter_survives_removal_and_growth():
+    index = VectorIndex(2, capacity=1)
+    index.upsert("a", np.array([1.0, 0.0]), "a", group="x")
+    index.upsert_many(["b", "c"], np.array([[1.0, 0.0], [0.0, 1.0]]), ["b", "c"], ["y", "x"])
+    index.remove("a")
+    assert [key for key, _, _ in index.search(np.array([1.0, 0.0]), 3, group="x")] == ["c"]
+    assert [key for key, _, _ in index.search(np.array([1.0, 0.0]), 3, group="y")] == ["b"]
+    assert index.search(np.array([1.0, 0.0]), 3, group="unknown") == []
+
+def test_answers_are_not_reused_or_quoted_across_customers():
+    service = SimilarTicketService()
+    index_resolved(service, uuid.uuid4(), *PRINTER)
+    ai = ai_with_index(service)
+    ticket = Ticket(id=uuid.uuid4(), title=PRINTER[0], description=PRINTER[1], user_id=uuid.uuid4())
+    messages = prompt()
+    assert ai._ground_in_similar(ticket, messages) is None
+    assert messages == prompt()
+
+def test_own_resolved_answer_is_reused():
+    service = SimilarTicketService()
+    owner = uuid.uuid4()
+    index_resolved(service, owner, *PRINTER)
+    ticket = Ticket(id=uuid.uuid4(), title=PRINTER[0], description=PRINTER[1], user_id=owner)
+    assert ai_with_index(service)._ground_in_similar(ticket, prompt()) == ANSWER
+
+def test_cross_tenant_grounding_is_opt_in_and_never_verbatim(monkeypatch):
+    monkeypatch.setattr(settings, "SIMILAR_CROSS_TENANT", True)
+    service = SimilarTicketService()
+    index_resolved(service, uuid.uuid4(), *PRINTER)
+    ticket = Ticket(id=uuid.uuid4(), title=PRINTER[0], description=PRINTER[1], user_id=uuid.uuid4())
+    messages = prompt()
+    assert ai_with_index(service)._ground_in_similar(ticket, messages) is None
+    assert ANSWER in messages[0]["content"]
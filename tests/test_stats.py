@@ -0,0 +1,35 @@
+from app.schemas.message import MessageCreate
+from app.schemas.ticket import TicketCreate, TicketStatusUpdate
+from app.services.stats import StatsService
+from app.services.ticket import TicketService
+from app.utils.database import async_session
+import asyncio
+
+async def test_counters_follow_ticket_and_message_writes(db, make_user):
+    user, tickets, stats = await make_user(), TicketService(), StatsService()
+    first = await tickets.create_ticket(TicketCreate(title="a", description="printer broken"), user, db)
+    await tickets.create_ticket(TicketCreate(title="b", description="login fails"), user, db)
+    await tickets.add_message(first.id, MessageCreate(content="any news?"), user, db)
+    await tickets.update_status(first.id, TicketStatusUpdate(status="closed"), user, db)
+
+    report = await stats.get_stats(db, user.id)
+    assert report["tickets"] == {"total": 2, "by_status": {"open": 1, "closed": 1}}
+    assert report["open_tickets"]["count"] == 1
+    assert (report["messages"]["human"], report["messages"]["ai"]) == (1, 0)
+    assert (await stats.get_stats(db))["tickets"] == report["tickets"]
+
+async def test_concurrent_identical_status_changes_count_once(db, make_user):
+    user, tickets, stats = await make_user(), TicketService(), StatsService()
+    ticket = await tickets.create_ticket(TicketCreate(title="a", description="printer broken"), user, db)
+
+    async def close():
+        async with async_session() as session:
+            return await tickets.update_status(ticket.id, TicketStatusUpdate(status="closed"), user, session)
+
+    results = await asyncio.gather(close(), close())
+    assert [result.status for result in results] == ["closed", "closed"]
+    report = await stats.get_stats(db, user.id)
+    assert report["tickets"] == {"total": 1, "by_status": {"closed": 1}}
+
+    rebuilt = await stats.rebuild(db)
+    assert rebuilt["before"] == rebuilt["after"]